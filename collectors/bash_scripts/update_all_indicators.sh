@@ -54,6 +54,7 @@ declare -A COLLECTORS=(
     ["building_permits_collector.py"]="🏗️ Разрешения на строительство"
     ["umcsi_collector.py"]="🛒 Потребительские настроения Michigan"
     ["ism_manufacturing_collector.py"]="🏭 ISM Manufacturing PMI"
+    ["ism_services_collector.py"]="🏢 ISM Services PMI"
     ["gdp_collector.py"]="🏛️ Реальный ВВП США"
 )
 
@@ -67,41 +68,6 @@ activate_venv() {
     print_success "Виртуальное окружение активировано"
 }
 
-# Запуск одного коллектора
-run_collector() {
-    local script_name="$1"
-    local description="$2"
-    local script_path="$COLLECTORS_DIR/$script_name"
-    
-    if [ ! -f "$script_path" ]; then
-        print_warning "Скрипт не найден: $script_name"
-        return 1
-    fi
-    
-    print_status "$description"
-    echo "━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━"
-    
-    local start_time=$(date +%s)
-    
-    if [ "$VERBOSE" = true ]; then
-        python "$script_path"
-    else
-        python "$script_path" 2>/dev/null || {
-            print_error "Ошибка в $script_name"
-            return 1
-        }
-    fi
-    
-    local end_time=$(date +%s)
-    local duration=$((end_time - start_time))
-    
-    echo "━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━"
-    print_success "$description завершен за ${duration}с"
-    echo ""
-    
-    return 0
-}
-
 # Проверка статуса базы данных
 check_database_status() {
     print_status "🔍 Проверка состояния базы данных..."
@@ -115,56 +81,26 @@ check_database_status() {
     echo ""
 }
 
+# Обновление через Python-оркестратор: коллекторы выполняются в одном процессе,
+# сетевые загрузки идут параллельно, запись в БД — через одного писателя
+run_orchestrator() {
+    local args=("$@")
+    if [ "$VERBOSE" = true ]; then
+        args+=("--verbose")
+    fi
+    python "$COLLECTORS_DIR/update_all_indicators.py" "${args[@]}"
+}
+
 # Быстрый режим (только критичные индикаторы)
 run_quick_update() {
-    local quick_collectors=(
-        "gdp_collector.py"
-        "umcsi_collector.py"
-        "ism_manufacturing_collector.py"
-    )
-    
     print_header "БЫСТРОЕ ОБНОВЛЕНИЕ КЛЮЧЕВЫХ ИНДИКАТОРОВ"
-    
-    local success_count=0
-    local total_count=${#quick_collectors[@]}
-    
-    for script in "${quick_collectors[@]}"; do
-        if [ -n "${COLLECTORS[$script]}" ]; then
-            if run_collector "$script" "${COLLECTORS[$script]}"; then
-                ((success_count++))
-            fi
-        fi
-    done
-    
-    echo ""
-    print_status "Результат быстрого обновления: $success_count/$total_count успешно"
+    run_orchestrator --quick || print_warning "Часть коллекторов завершилась с ошибкой"
 }
 
 # Полное обновление всех индикаторов
 run_full_update() {
     print_header "ПОЛНОЕ ОБНОВЛЕНИЕ ВСЕХ ИНДИКАТОРОВ"
-    
-    local success_count=0
-    local total_count=${#COLLECTORS[@]}
-    local failed_collectors=()
-    
-    for script in "${!COLLECTORS[@]}"; do
-        if run_collector "$script" "${COLLECTORS[$script]}"; then
-            ((success_count++))
-        else
-            failed_collectors+=("$script")
-        fi
-    done
-    
-    echo ""
-    print_status "Результат полного обновления: $success_count/$total_count успешно"
-    
-    if [ ${#failed_collectors[@]} -gt 0 ]; then
-        print_warning "Неудачные коллекторы:"
-        for failed in "${failed_collectors[@]}"; do
-            echo "  - $failed"
-        done
-    fi
+    run_orchestrator || print_warning "Часть коллекторов завершилась с ошибкой"
 }
 
 # Показать помощь
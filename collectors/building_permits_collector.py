@@ -9,8 +9,8 @@ current_dir = os.path.dirname(os.path.abspath(__file__))
 parent_dir = os.path.dirname(current_dir)
 sys.path.append(parent_dir)
 
-from dao import IndicatorDAO
-from collectors.fred_parser import get_fred_series_history
+from dao import IndicatorDAO, WIDE_STORAGE
+from collectors.fred_parser import get_fred_series_batch
 
 INDICATOR_CONFIG = {
     'name': 'building_permits_us',
@@ -27,6 +27,9 @@ PERMIT_SERIES = [
 ]
 
 def main():
+    """
+    Возвращает число добавленных записей или None при ошибке.
+    """
     dao = None
     try:
         print("--- Запуск сборщика данных Building Permits ---")
@@ -36,36 +39,41 @@ def main():
         if not indicator_id:
             print("Не удалось получить ID индикатора.")
             return
+        if WIDE_STORAGE:
+            dao.enable_wide_storage(indicator_id)
         print(f"Индикатор '{INDICATOR_CONFIG['name']}' зарегистрирован с ID: {indicator_id}")
 
-        start_date = dao.get_latest_indicator_date(indicator_id)
-        if start_date:
-            print(f"Последняя дата в БД: {start_date}. Загружаем данные с этой даты.")
-        else:
-            print("Данных в БД нет. Загружаем всю историю.")
+        # Каждая серия догружается со своей последней даты: отставшая не тянет за собой остальные
+        watermarks = dao.get_watermarks(indicator_id)
+        start_dates = {}
+        for cfg in PERMIT_SERIES:
+            start_dates[cfg['fred_id']] = (watermarks.get(cfg['category']) or {}).get('last_date')
+            if start_dates[cfg['fred_id']]:
+                print(f"{cfg['category']}: последняя дата в БД {start_dates[cfg['fred_id']]}, загружаем с неё.")
+            else:
+                print(f"{cfg['category']}: данных в БД нет, загружаем всю историю.")
 
-        total_records = 0
-        for series_config in PERMIT_SERIES:
-            print(f"\nЗагрузка серии {series_config['fred_id']} ({series_config['category']})...")
-            series_df = get_fred_series_history(series_id=series_config['fred_id'], start_date=start_date)
+        # Все серии загружаются параллельно одним клиентом FRED
+        wide_df = get_fred_series_batch([cfg['fred_id'] for cfg in PERMIT_SERIES], start_dates=start_dates)
+        dao.mark_fetched(indicator_id, [cfg['category'] for cfg in PERMIT_SERIES if cfg['fred_id'] in wide_df.columns])
+        if wide_df.empty:
+            print("Нет новых данных для сохранения.")
+            return 0
 
-            if series_df.empty:
-                print(f"Нет новых данных для {series_config['category']}")
-                continue
+        categories = {cfg['fred_id']: cfg['category'] for cfg in PERMIT_SERIES}
+        permits_df = (wide_df.rename(columns=categories)
+                      .reset_index()
+                      .melt(id_vars='date', var_name='category', value_name='value')
+                      .dropna(subset=['value']))
+        for category, count in permits_df['category'].value_counts(sort=False).items():
+            print(f"Получено {count} записей для {category}")
 
-            for _, row in series_df.iterrows():
-                dao.add_indicator_value(
-                    indicator_id=indicator_id,
-                    date=row['date'].strftime('%Y-%m-%d'),
-                    value=row['value'],
-                    category=series_config['category']
-                )
+        # Все серии пишем одной транзакцией
+        stats = dao.add_indicator_values_bulk(indicator_id, permits_df, category_col='category')
 
-            total_records += len(series_df)
-            print(f"Сохранено {len(series_df)} записей для {series_config['category']}")
-
-        print(f"\nВсего обработано {total_records} записей.")
+        print(f"\nВсего обработано {len(permits_df)} записей, добавлено {stats['inserted']}.")
         print("Сбор данных Building Permits завершен.")
+        return stats['inserted']
 
     except Exception as e:
         print(f"Произошла ошибка: {e}")
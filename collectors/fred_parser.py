@@ -1,10 +1,11 @@
 # collectors/fred_parser.py
 import pandas as pd
-from fredapi import Fred
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import os
 from dotenv import load_dotenv
 
+from collectors.http_client import http_get
+
 # --- ЗАГРУЗКА ПЕРЕМЕННЫХ ОКРУЖЕНИЯ ---
 load_dotenv()
 FRED_API_KEY = os.getenv('FRED_API_KEY')
@@ -12,6 +13,44 @@ FRED_API_KEY = os.getenv('FRED_API_KEY')
 if not FRED_API_KEY:
     raise ValueError("FRED_API_KEY не найден в .env файле")
 
+FRED_BASE_URL = os.getenv('FRED_BASE_URL', 'https://api.stlouisfed.org/fred')
+
+# FRED допускает 120 запросов в минуту на ключ; лимит хоста задан в http_client
+FRED_MAX_WORKERS = 4
+
+# Ряды запрашиваются без observation_end, новые наблюдения выходят в день релиза:
+# кэш всегда перепроверяется условным запросом (304 — ответ из кэша без тела)
+FRED_CACHE_TTL = 0
+
+def fetch_fred_series(series_id: str, observation_start: str = None) -> pd.Series:
+    """
+    Наблюдения ряда FRED (fred/series/observations, JSON) через общий http_client:
+    общая сессия, лимиты хоста и дисковый кэш с перепроверкой на каждом запросе
+    (api_key в ключ кэша не входит).
+    Returns: pd.Series float по датам (пропуски FRED '.' — NaN), имя — series_id.
+    """
+    params = {
+        'series_id': series_id,
+        'observation_start': observation_start,
+        'file_type': 'json',
+        'api_key': FRED_API_KEY,
+    }
+    response = http_get(f"{FRED_BASE_URL}/series/observations", params=params, cache=True,
+                        cache_ttl=FRED_CACHE_TTL, cache_ignore_params=('api_key',))
+    if not response.ok:
+        try:
+            message = response.json().get('error_message')
+        except ValueError:
+            message = None
+        if not message:
+            response.raise_for_status()
+        raise ValueError(message)
+
+    observations = response.json().get('observations', [])
+    dates = pd.to_datetime([o['date'] for o in observations])
+    values = pd.to_numeric(pd.Series([o['value'] for o in observations], dtype=object), errors='coerce')
+    return pd.Series(values.to_numpy(dtype=float), index=dates, name=series_id)
+
 def get_fred_series_history(series_id: str, start_date: str = None) -> pd.DataFrame:
     """
     Универсальная функция для загрузки любого ряда из FRED API.
@@ -25,9 +64,7 @@ def get_fred_series_history(series_id: str, start_date: str = None) -> pd.DataFr
     """
     try:
         print(f"Загрузка серии {series_id} из FRED API...")
-        fred = Fred(api_key=FRED_API_KEY)
-        
-        series_data = fred.get_series(series_id, observation_start=start_date)
+        series_data = fetch_fred_series(series_id, observation_start=start_date)
         
         if series_data.empty:
             print(f"Нет данных для серии {series_id}")
@@ -45,6 +82,48 @@ def get_fred_series_history(series_id: str, start_date: str = None) -> pd.DataFr
         print(f"Ошибка при загрузке серии {series_id}: {e}")
         return pd.DataFrame()
 
+def get_fred_series_batch(series_ids: list, start_date: str = None, join: str = 'outer',
+                          max_workers: int = FRED_MAX_WORKERS, start_dates: dict = None) -> pd.DataFrame:
+    """
+    Параллельная загрузка нескольких рядов FRED (общая сессия http_client).
+    
+    Args:
+        series_ids: Список ID серий (например, ['PERMIT1', 'PERMIT'])
+        start_date: Дата начала в формате 'YYYY-MM-DD' или None для всей истории
+        start_dates: Свои даты начала для отдельных серий {series_id: 'YYYY-MM-DD' или None}
+        join: 'outer' — все даты, 'inner' — только общие для всех рядов
+        max_workers: Число одновременных запросов (частоту ограничивает http_client)
+        
+    Returns:
+        Широкий DataFrame: индекс 'date', по колонке на серию в порядке series_ids.
+        Серии, которые не удалось загрузить, в результат не попадают.
+    """
+    print(f"Загрузка {len(series_ids)} серий из FRED API: {', '.join(series_ids)}")
+    series_data = {}
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(series_ids)))) as pool:
+        futures = {
+            pool.submit(fetch_fred_series, series_id,
+                        observation_start=(start_dates or {}).get(series_id, start_date)): series_id
+            for series_id in series_ids
+        }
+        for future in as_completed(futures):
+            series_id = futures[future]
+            try:
+                series_data[series_id] = future.result()
+            except Exception as e:
+                print(f"Ошибка при загрузке серии {series_id}: {e}")
+
+    loaded = [series_id for series_id in series_ids if series_id in series_data]
+    if not loaded:
+        return pd.DataFrame()
+
+    df = pd.concat({series_id: series_data[series_id] for series_id in loaded}, axis=1, join=join)
+    df.index.name = 'date'
+    df.sort_index(inplace=True)
+    print(f"Загружено {len(df)} дат для {len(loaded)} серий")
+    return df
+
 def get_fred_calculated_series(series_configs: list, calculation_func, start_date: str = None) -> pd.DataFrame:
     """
     Функция для загрузки и расчета составных индикаторов (как Real M2).
@@ -59,14 +138,10 @@ def get_fred_calculated_series(series_configs: list, calculation_func, start_dat
     """
     try:
         print("Загрузка составных серий из FRED API...")
-        fred = Fred(api_key=FRED_API_KEY)
-        
-        series_data = {}
-        for config in series_configs:
-            series_data[config['name']] = fred.get_series(config['id'], observation_start=start_date)
-        
         # Объединяем все серии по датам
-        df = pd.concat(series_data, axis=1, join='inner')
+        df = get_fred_series_batch([config['id'] for config in series_configs],
+                                   start_date=start_date, join='inner')
+        df = df.rename(columns={config['id']: config['name'] for config in series_configs})
         
         if df.empty:
             print("Нет данных для расчета составного индикатора")
@@ -85,4 +160,4 @@ def get_fred_calculated_series(series_configs: list, calculation_func, start_dat
         
     except Exception as e:
         print(f"Ошибка при расчете составного индикатора: {e}")
-        return pd.DataFrame()
\ No newline at end of file
+        return pd.DataFrame()
@@ -1,7 +1,6 @@
 # collectors/gdp_collector.py
 import os
 import sys
-import pandas as pd
 from dotenv import load_dotenv
 
 # --- ЗАГРУЗКА ПЕРЕМЕННЫХ ОКРУЖЕНИЯ ---
@@ -24,10 +23,12 @@ INDICATOR_CONFIG = {
 }
 
 FRED_SERIES_ID = 'GDPC1'
+REVISION_TOLERANCE = 0.01  # Порог ревизии с учетом погрешности округления, млрд
 
 def main():
     """
     Коллектор данных по реальному ВВП США (GDPC1) из FRED API.
+    Возвращает число записанных записей (новые + ревизии) или None при ошибке.
     """
     dao = None
     try:
@@ -65,41 +66,19 @@ def main():
 
         if gdp_df.empty:
             print("Нет новых данных для сохранения.")
-            return
-        
-        print(f"Найдено {len(gdp_df)} записей для обработки. Сохраняем в БД (дубликаты будут проигнорированы)...")
-        
-        # Сохраняем данные в БД с учетом возможных обновлений значений
-        saved_count = 0
-        updated_count = 0
-        
-        for _, row in gdp_df.iterrows():
-            date_str = row['date'].strftime('%Y-%m-%d')
-            
-            # Проверяем, существует ли уже запись для этой даты
-            existing_data = dao.get_indicator_values(indicator_id)
-            if not existing_data.empty:
-                existing_record = existing_data[existing_data['date'] == date_str]
-                if not existing_record.empty:
-                    old_value = existing_record.iloc[0]['value']
-                    new_value = row['value']
-                    
-                    # Если значение изменилось (ревизия), обновляем
-                    if abs(old_value - new_value) > 0.01:  # Учитываем погрешность округления
-                        print(f"Ревизия для {date_str}: {old_value:.1f} → {new_value:.1f} млрд")
-                        updated_count += 1
-            
-            success = dao.add_indicator_value(
-                indicator_id=indicator_id,
-                date=date_str,
-                value=row['value']
-            )
-            if success:
-                saved_count += 1
+            return 0
         
-        if updated_count > 0:
-            print(f"Обнаружено {updated_count} ревизий данных ВВП")
-        print(f"Обработано {saved_count} записей (новые + обновления).")
+        print(f"Найдено {len(gdp_df)} записей для обработки. Сохраняем в БД с учетом ревизий...")
+
+        # Сверка с БД одним запросом: новые даты вставляются, ревизии обновляются
+        report = dao.upsert_indicator_values(indicator_id, gdp_df, tolerance=REVISION_TOLERANCE)
+
+        for rev in report['revisions'].itertuples(index=False):
+            print(f"Ревизия для {rev.date}: {rev.old_value:.1f} → {rev.new_value:.1f} млрд")
+        if report['updated'] > 0:
+            print(f"Обнаружено и сохранено {report['updated']} ревизий данных ВВП")
+        print(f"Добавлено {report['inserted']} новых записей, без изменений {report['unchanged']} "
+              f"из {len(gdp_df)} обработанных.")
         print("Обработка завершена.")
 
         # Показываем последние записи для проверки
@@ -108,6 +87,8 @@ def main():
             print("\nПоследние 5 записей:")
             print(latest_data.tail(5)[['date', 'value']].to_string(index=False))
 
+        return report['inserted'] + report['updated']
+
     except Exception as e:
         print(f"Произошла ошибка: {e}")
         import traceback
@@ -0,0 +1,131 @@
+# collectors/http_cache.py
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import requests
+from dotenv import load_dotenv
+from requests.structures import CaseInsensitiveDict
+
+# --- Загрузка переменных окружения ---
+load_dotenv()
+CACHE_DIR = Path(os.getenv("HTTP_CACHE_DIR", Path.home() / ".cache" / "economic_indicators" / "http"))
+
+# Сколько секунд ответ источника считается свежим без обращения к сети
+DEFAULT_TTL = 3600
+SOURCE_TTLS = {
+    "home.treasury.gov": 6 * 3600,
+    # Ряды FRED открыты справа: в день релиза новое наблюдение появляется в любой момент,
+    # поэтому ответ всегда перепроверяется условным запросом (ETag/Last-Modified)
+    "api.stlouisfed.org": 0,
+    "www.ismworld.org": 3600,
+    "www.sca.isr.umich.edu": 3600,
+}
+
+# Заголовки, которые сохраняем вместе с телом ответа
+STORED_HEADERS = ("Content-Type", "ETag", "Last-Modified")
+
+def source_ttl(url: str) -> float:
+    return SOURCE_TTLS.get(urlsplit(url).netloc, DEFAULT_TTL)
+
+def canonical_url(url: str, params: dict | None = None, ignore_params=()) -> str:
+    """
+    URL с отсортированными параметрами запроса, без параметров из ignore_params.
+    """
+    parts = urlsplit(url)
+    query = parse_qsl(parts.query, keep_blank_values=True)
+    query += [(k, str(v)) for k, v in (params or {}).items() if v is not None]
+    query = sorted((k, v) for k, v in query if k not in ignore_params)
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, urlencode(query), ""))
+
+class ResponseCache:
+    """
+    Дисковый кэш HTTP-ответов. Ключ — sha256 от URL с отсортированными параметрами,
+    файл — gzip: строка JSON-метаданных, затем тело ответа.
+    """
+    def __init__(self, cache_dir: Path | str = CACHE_DIR):
+        self.cache_dir = Path(cache_dir)
+
+    @staticmethod
+    def make_key(url: str, params: dict | None = None, ignore_params=()) -> str:
+        """
+        Параметры из ignore_params (например, api_key) в ключ не входят.
+        """
+        canonical = canonical_url(url, params, ignore_params)
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.gz"
+
+    def load(self, key: str) -> dict | None:
+        """
+        Запись кэша: {'meta': {...}, 'body': bytes} или None.
+        """
+        path = self._path(key)
+        try:
+            raw = gzip.decompress(path.read_bytes())
+        except (OSError, EOFError):
+            return None
+        header, _, body = raw.partition(b"\n")
+        try:
+            meta = json.loads(header)
+        except ValueError:
+            return None
+        return {"meta": meta, "body": body}
+
+    def store(self, key: str, response: requests.Response, ignore_params=()) -> dict:
+        meta = {
+            "url": canonical_url(response.url, ignore_params=ignore_params),
+            "status_code": response.status_code,
+            "encoding": response.encoding,
+            "headers": {h: response.headers[h] for h in STORED_HEADERS if h in response.headers},
+            "fetched_at": time.time(),
+        }
+        self._write(key, meta, response.content)
+        return {"meta": meta, "body": response.content}
+
+    def touch(self, key: str, entry: dict) -> dict:
+        """
+        Ответ подтверждён сервером (304) — обновляем время проверки.
+        """
+        entry["meta"]["fetched_at"] = time.time()
+        self._write(key, entry["meta"], entry["body"])
+        return entry
+
+    def _write(self, key: str, meta: dict, body: bytes):
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        payload = gzip.compress(json.dumps(meta).encode("utf-8") + b"\n" + body)
+        fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(payload)
+            os.replace(tmp_name, path)
+        except OSError:
+            if os.path.exists(tmp_name):
+                os.remove(tmp_name)
+            raise
+
+    @staticmethod
+    def is_fresh(entry: dict, ttl: float) -> bool:
+        return time.time() - entry["meta"]["fetched_at"] < ttl
+
+    @staticmethod
+    def to_response(entry: dict) -> requests.Response:
+        """
+        Восстанавливаем requests.Response из записи кэша (атрибут from_cache=True).
+        """
+        meta = entry["meta"]
+        response = requests.Response()
+        response._content = entry["body"]
+        response.status_code = meta["status_code"]
+        response.headers = CaseInsensitiveDict(meta["headers"])
+        response.encoding = meta["encoding"]
+        response.url = meta["url"]
+        response.from_cache = True
+        return response
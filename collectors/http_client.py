@@ -0,0 +1,219 @@
+# collectors/http_client.py
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from collectors.http_cache import ResponseCache, source_ttl
+
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0",
+    "Accept-Encoding": "gzip, deflate",
+}
+DEFAULT_TIMEOUT = 30
+
+# Повторы: 429/5xx и сетевые сбои, экспоненциальная пауза с джиттером
+RETRY_TOTAL = 3
+RETRY_BACKOFF = 0.5
+RETRY_JITTER = 0.5
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+# Пул соединений и ограничения по хостам
+POOL_SIZE = 16
+DEFAULT_HOST_CONCURRENCY = 4
+HOST_LIMITS = {
+    "home.treasury.gov": {"max_concurrency": 6, "requests_per_second": 4},
+    # FRED: не больше 120 запросов в минуту на API-ключ
+    "api.stlouisfed.org": {"max_concurrency": 4, "requests_per_second": 2},
+    "www.ismworld.org": {"max_concurrency": 2, "requests_per_second": 1},
+    "www.sca.isr.umich.edu": {"max_concurrency": 2, "requests_per_second": 1},
+}
+
+_session = None
+_session_lock = threading.Lock()
+_hosts_lock = threading.Lock()
+_host_semaphores: dict[str, threading.BoundedSemaphore] = {}
+_host_limiters: dict = {}
+_host_stats: dict[str, dict] = {}
+_validators_lock = threading.Lock()
+_validators: dict[str, requests.Response] = {}
+_cache = ResponseCache()
+
+class RateLimiter:
+    """
+    Потокобезопасный ограничитель: не больше rate запросов в секунду.
+    """
+    def __init__(self, rate: float | None):
+        self.interval = 1.0 / rate if rate else 0.0
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+def get_session() -> requests.Session:
+    """
+    Общая для всех парсеров сессия с keep-alive, пулом соединений и повторами.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            retry = Retry(
+                total=RETRY_TOTAL,
+                backoff_factor=RETRY_BACKOFF,
+                backoff_jitter=RETRY_JITTER,
+                status_forcelist=RETRY_STATUSES,
+                allowed_methods=frozenset(["GET", "HEAD"]),
+                respect_retry_after_header=True,
+                raise_on_status=False,
+            )
+            adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE, max_retries=retry)
+            session = requests.Session()
+            session.headers.update(DEFAULT_HEADERS)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _session = session
+        return _session
+
+def configure_host(host: str, max_concurrency: int | None = None,
+                   requests_per_second: float | None = None):
+    """
+    Переопределение лимитов хоста (число одновременных запросов и запросов в секунду).
+    """
+    with _hosts_lock:
+        limits = HOST_LIMITS.setdefault(host, {})
+        if max_concurrency is not None:
+            limits["max_concurrency"] = max_concurrency
+            _host_semaphores.pop(host, None)
+        if requests_per_second is not None:
+            limits["requests_per_second"] = requests_per_second
+            _host_limiters.pop(host, None)
+
+def configure_cache(cache_dir):
+    """
+    Смена каталога дискового кэша (например, для тестов).
+    """
+    global _cache
+    _cache = ResponseCache(cache_dir)
+
+def _host_controls(host: str) -> tuple[threading.BoundedSemaphore, RateLimiter]:
+    with _hosts_lock:
+        limits = HOST_LIMITS.get(host, {})
+        if host not in _host_semaphores:
+            _host_semaphores[host] = threading.BoundedSemaphore(
+                limits.get("max_concurrency", DEFAULT_HOST_CONCURRENCY))
+        if host not in _host_limiters:
+            _host_limiters[host] = RateLimiter(limits.get("requests_per_second"))
+        return _host_semaphores[host], _host_limiters[host]
+
+def _host_stats_entry(host: str) -> dict:
+    return _host_stats.setdefault(host, {
+        "requests": 0, "errors": 0, "not_modified": 0, "cache_hits": 0,
+        "bytes": 0, "total_time": 0.0, "max_time": 0.0,
+    })
+
+def _record(host: str, elapsed: float, response: requests.Response | None):
+    with _hosts_lock:
+        stats = _host_stats_entry(host)
+        stats["requests"] += 1
+        stats["total_time"] += elapsed
+        stats["max_time"] = max(stats["max_time"], elapsed)
+        if response is None or response.status_code >= 400:
+            stats["errors"] += 1
+        elif response.status_code == 304:
+            stats["not_modified"] += 1
+        else:
+            stats["bytes"] += len(response.content)
+
+def _record_cache_hit(host: str):
+    with _hosts_lock:
+        _host_stats_entry(host)["cache_hits"] += 1
+
+def _add_validators(request_headers: dict, stored_headers):
+    if stored_headers.get("ETag"):
+        request_headers["If-None-Match"] = stored_headers["ETag"]
+    if stored_headers.get("Last-Modified"):
+        request_headers["If-Modified-Since"] = stored_headers["Last-Modified"]
+
+def http_get(url: str, params: dict | None = None, headers: dict | None = None,
+             timeout: float = DEFAULT_TIMEOUT, conditional: bool = False, cache: bool = False,
+             cache_ttl: float | None = None, cache_ignore_params=()) -> requests.Response:
+    """
+    GET через общую сессию с учётом лимитов хоста и сбором статистики.
+    conditional=True отправляет If-None-Match/If-Modified-Since по прошлому ответу
+    и на 304 возвращает сохранённый ответ.
+    cache=True включает дисковый кэш (http_cache): свежая запись (моложе cache_ttl,
+    по умолчанию — TTL источника) отдаётся без сети, устаревшая перепроверяется
+    условным запросом. Параметры из cache_ignore_params в ключ кэша не входят.
+    Статус ответа не проверяется — raise_for_status() остаётся за вызывающим.
+    """
+    host = urlsplit(url).netloc
+    request_headers = dict(headers or {})
+
+    entry = None
+    previous = None
+    if cache:
+        cache_key = _cache.make_key(url, params, cache_ignore_params)
+        entry = _cache.load(cache_key)
+        ttl = source_ttl(url) if cache_ttl is None else cache_ttl
+        if entry is not None:
+            if _cache.is_fresh(entry, ttl):
+                _record_cache_hit(host)
+                return _cache.to_response(entry)
+            _add_validators(request_headers, entry["meta"]["headers"])
+    elif conditional:
+        validator_key = requests.Request("GET", url, params=params).prepare().url
+        with _validators_lock:
+            previous = _validators.get(validator_key)
+        if previous is not None:
+            _add_validators(request_headers, previous.headers)
+
+    semaphore, limiter = _host_controls(host)
+    response = None
+    started = time.perf_counter()
+    try:
+        with semaphore:
+            limiter.wait()
+            response = get_session().get(url, params=params, headers=request_headers, timeout=timeout)
+    finally:
+        _record(host, time.perf_counter() - started, response)
+
+    if cache:
+        if response.status_code == 304 and entry is not None:
+            return _cache.to_response(_cache.touch(cache_key, entry))
+        if response.status_code == 200:
+            _cache.store(cache_key, response, cache_ignore_params)
+    elif conditional:
+        if response.status_code == 304 and previous is not None:
+            return previous
+        if response.ok and (response.headers.get("ETag") or response.headers.get("Last-Modified")):
+            with _validators_lock:
+                _validators[validator_key] = response
+    return response
+
+def get_host_stats() -> dict[str, dict]:
+    """
+    Снимок статистики по хостам: число запросов, ошибки, 304, попадания в кэш,
+    байты и время (с).
+    """
+    with _hosts_lock:
+        snapshot = {host: dict(stats) for host, stats in _host_stats.items()}
+    for stats in snapshot.values():
+        stats["avg_time"] = stats["total_time"] / stats["requests"] if stats["requests"] else 0.0
+    return snapshot
+
+def print_host_stats():
+    for host, stats in sorted(get_host_stats().items()):
+        print(f"🌐 {host}: запросов {stats['requests']}, ошибок {stats['errors']}, "
+              f"304: {stats['not_modified']}, из кэша: {stats['cache_hits']}, {stats['bytes'] / 1024:.0f} КБ, "
+              f"среднее {stats['avg_time']:.2f}с, макс {stats['max_time']:.2f}с")
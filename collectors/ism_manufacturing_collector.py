@@ -2,45 +2,58 @@
 # collectors/ism_manufacturing_collector.py
 
 import sys
+import pandas as pd
 from pathlib import Path
 
 # Добавляем корневую директорию проекта в sys.path (из collectors/)
 project_root = Path(__file__).parent.parent
 sys.path.append(str(project_root))
 
-from dao import IndicatorDAO
-from collectors.ism_manufacturing_parser import get_ism_manufacturing_data, check_if_data_exists_in_db
+from dao import IndicatorDAO, WIDE_STORAGE
+from collectors.ism_manufacturing_parser import get_ism_manufacturing_data
+
+INDICATOR_CONFIG = {
+    'name': "us_ism_manufacturing_pmi",
+    'full_name': "ISM Manufacturing Purchasing Managers Index",
+    'source': "ISM",
+    'description': "ISM Manufacturing PMI and sub-indices including New Orders, Production, Employment, etc."
+}
 
 def collect_ism_manufacturing_pmi():
     """
     Коллектор данных ISM Manufacturing PMI
+    Возвращает число добавленных записей (0 — данные уже есть) или None при ошибке
+    """
+    return collect_ism_report(INDICATOR_CONFIG, get_ism_manufacturing_data, "ISM Manufacturing PMI")
+
+def collect_ism_report(indicator_config, get_data, title):
+    """
+    Общий коллектор отчётов ISM (Manufacturing, Services): get_data — парсер сайта ISM.
     Проверяет наличие данных в БД и загружает новые данные с сайта ISM
+    Возвращает число добавленных записей (0 — данные уже есть) или None при ошибке
     """
     
     dao = IndicatorDAO()
     
     try:
         # 1. Получаем/регистрируем индикатор
-        indicator_id = dao.add_indicator(
-            name="us_ism_manufacturing_pmi",
-            full_name="ISM Manufacturing Purchasing Managers Index",
-            source="ISM", 
-            description="ISM Manufacturing PMI and sub-indices including New Orders, Production, Employment, etc."
-        )
+        indicator_id = dao.add_indicator(**indicator_config)
         
         if not indicator_id:
             print("Ошибка при регистрации индикатора")
-            return False
+            return None
+        if WIDE_STORAGE:
+            dao.enable_wide_storage(indicator_id)
             
-        print(f"Работаем с индикатором: us_ism_manufacturing_pmi (ID: {indicator_id})")
+        print(f"Работаем с индикатором: {indicator_config['name']} (ID: {indicator_id})")
         
         # 2. Парсим данные с сайта ISM
-        print("\nЗапускаем парсер ISM Manufacturing PMI...")
-        ism_data = get_ism_manufacturing_data()
+        print(f"\nЗапускаем парсер {title}...")
+        ism_data = get_data()
         
         if not ism_data:
             print("Не удалось получить данные с сайта ISM")
-            return False
+            return None
             
         expected_date = ism_data['date']
         values_data = ism_data['values']
@@ -49,28 +62,30 @@ def collect_ism_manufacturing_pmi():
         print(f"Получены данные за: {expected_date}")
         print(f"Количество показателей: {len(values_data)}")
         
-        # 3. Проверяем, есть ли уже данные в БД за этот месяц
-        if check_if_data_exists_in_db(dao, indicator_id, expected_date):
+        # 3. Проверяем, какие показатели за этот месяц уже есть в БД (один запрос по индексу);
+        # дописываем только недостающие — например, после частично сохранённого релиза
+        existing = dao.existing_keys(indicator_id, [expected_date], values_data.keys())
+        new_values = {category: value for category, value in values_data.items()
+                      if (expected_date, category) not in existing}
+        if not new_values:
             print("Данные за этот период уже существуют в БД")
-            return True
+            return 0
+        if existing:
+            print(f"Уже в БД: {len(existing)} показателей, недостающих: {len(new_values)}")
         
         # 4. Записываем данные в БД
         print(f"\nЗаписываем данные в БД...")
         
-        records_added = 0
-        for category, value in values_data.items():
-            try:
-                dao.add_indicator_value(
-                    indicator_id=indicator_id,
-                    date=expected_date,
-                    value=value,
-                    category=category
-                )
-                print(f"  {category}: {value}")
-                records_added += 1
-            except Exception as e:
-                print(f"Ошибка при записи {category}: {e}")
-        
+        values_df = pd.DataFrame({
+            'date': expected_date,
+            'category': list(new_values.keys()),
+            'value': list(new_values.values())
+        })
+        stats = dao.add_indicator_values_bulk(indicator_id, values_df, category_col='category')
+        for category, value in new_values.items():
+            print(f"  {category}: {value}")
+        records_added = stats['inserted']
+
         print(f"\nУспешно добавлено {records_added} записей в таблицу indicator_values")
         
         # 5. Сохраняем метаданные о релизе (опционально)
@@ -93,16 +108,16 @@ def collect_ism_manufacturing_pmi():
         except Exception as e:
             print(f"Предупреждение: не удалось сохранить метаданные релиза: {e}")
         
-        print(f"\nКоллекция данных ISM Manufacturing PMI завершена успешно!")
+        print(f"\nКоллекция данных {title} завершена успешно!")
         print(f"Дата: {expected_date}")
         print(f"Записей: {records_added}")
         print(f"URL: {source_url}")
         
-        return True
+        return records_added
         
     except Exception as e:
-        print(f"Ошибка в коллекторе ISM Manufacturing PMI: {e}")
-        return False
+        print(f"Ошибка в коллекторе {title}: {e}")
+        return None
     finally:
         dao.close()
 
@@ -110,9 +125,9 @@ def main():
     print("ISM Manufacturing PMI Data Collector")
     print("=" * 50)
     
-    success = collect_ism_manufacturing_pmi()
+    records_added = collect_ism_manufacturing_pmi()
     
-    if success:
+    if records_added is not None:
         print("\nДанные успешно собраны и сохранены!")
         print("Используйте _db_inspector.py для проверки данных")
     else:
@@ -1,9 +1,102 @@
 # collectors/ism_manufacturing_parser.py
+import io
 import requests
-from bs4 import BeautifulSoup
 import re
-from datetime import datetime, timedelta
+from datetime import datetime
 import calendar
+from lxml import etree
+
+from collectors.http_client import http_get
+
+# --- КОНФИГУРАЦИЯ ---
+# Строки таблицы индексов ("Manufacturing at a Glance"): категория -> шаблон подписи в первой ячейке.
+# Значение — первое число после подписи (столбец "Series Index" за отчётный месяц).
+MANUFACTURING_INDEX_ROWS = {
+    'headline': r'(?:Manufacturing\s+)?PMI',
+    'new_orders': r'New\s+Orders',
+    'production': r'Production',
+    'employment': r'Employment',
+    'supplier_deliveries': r'Supplier\s+Deliveries',
+    'inventories': r'Inventories',
+    'customers_inventories': r"Customers?['’]?\s+Inventories",
+    'prices_paid': r'Prices(?:\s+Paid)?',
+    'order_backlog': r'(?:Backlog\s+of\s+Orders|Order\s+Backlog)',
+    'exports': r'(?:New\s+Export\s+Orders|Exports)',
+    'imports': r'Imports',
+}
+# Меньше совпавших строк — это не таблица индексов (например, список отраслей)
+MIN_INDEX_ROWS = 3
+
+MONTHS = {name.lower(): number for number, name in enumerate(calendar.month_name) if name}
+REPORT_DATE_RE = re.compile(r'\b(' + '|'.join(MONTHS) + r')\s+(\d{4})\b', re.IGNORECASE)
+INDEX_VALUE_RE = re.compile(r'(\d+(?:\.\d+)?)\s*%?')
+# Элементы, в тексте которых ищется месяц отчёта (в порядке документа)
+REPORT_DATE_TAGS = ('title', 'h1', 'h2', 'h3', 'p')
+
+def compile_index_rows(rows: dict[str, str]) -> re.Pattern:
+    """
+    Подписи строк -> одно регулярное выражение с именованной группой на категорию
+    (полное совпадение с текстом ячейки, допускаются '®', 'Index' и '%' в конце).
+    """
+    alternatives = '|'.join(f'(?P<{category}>{pattern})' for category, pattern in rows.items())
+    return re.compile(rf'(?:{alternatives})(?:\s*®)?(?:\s+Index)?(?:\s*\(%\))?\s*', re.IGNORECASE)
+
+MANUFACTURING_INDEX_RE = compile_index_rows(MANUFACTURING_INDEX_ROWS)
+
+def _cell_text(cell) -> str:
+    return ' '.join(''.join(cell.itertext()).split())
+
+def _match_index_row(cells: list[str], row_re: re.Pattern) -> tuple[str, float] | None:
+    """
+    (категория, значение) для строки таблицы индексов или None.
+    """
+    if len(cells) < 2:
+        return None
+    label = row_re.fullmatch(cells[0])
+    if label is None:
+        return None
+    for cell in cells[1:]:
+        number = INDEX_VALUE_RE.fullmatch(cell)
+        if number:
+            value = float(number.group(1))
+            # Sanity check - PMI values should be between 0 and 100
+            return (label.lastgroup, value) if 0 <= value <= 100 else None
+    return None
+
+def parse_ism_report(content: bytes, row_re: re.Pattern = MANUFACTURING_INDEX_RE) -> dict | None:
+    """
+    Один потоковый проход lxml по странице отчёта ISM: месяц отчёта из заголовков
+    и таблица индексов — таблица с наибольшим числом подписей row_re (не меньше MIN_INDEX_ROWS).
+    Returns: {'date': 'YYYY-MM-01', 'values': {category: value}} или None.
+    """
+    categories = list(row_re.groupindex)
+    report_date = None
+    best = {}
+    table = {}
+    for _, element in etree.iterparse(io.BytesIO(content), events=('end',),
+                                      tag=('tr', 'table') + REPORT_DATE_TAGS, html=True):
+        if element.tag == 'tr':
+            matched = _match_index_row([_cell_text(c) for c in element if c.tag in ('td', 'th')], row_re)
+            if matched and matched[0] not in table:
+                table[matched[0]] = matched[1]
+            element.clear()
+        elif element.tag == 'table':
+            if len(table) > len(best):
+                best = table
+            table = {}
+            element.clear()
+            if len(best) == len(categories):
+                break
+        elif report_date is None:
+            # Заголовки и абзацы не очищаем: <p> часто лежит внутри ячейки (<td><p>New Orders</p></td>),
+            # и её текст ещё нужен на конце <tr>
+            found = REPORT_DATE_RE.search(_cell_text(element))
+            if found:
+                report_date = f"{int(found.group(2))}-{MONTHS[found.group(1).lower()]:02d}-01"
+
+    if report_date is None or len(best) < MIN_INDEX_ROWS:
+        return None
+    return {'date': report_date, 'values': {category: best[category] for category in categories if category in best}}
 
 def determine_expected_report_month():
     """
@@ -33,24 +126,32 @@ def determine_expected_report_month():
     month_name = calendar.month_name[expected_month].lower()
     return expected_year, expected_month, month_name
 
-def build_ism_url(month_name):
+def build_ism_url(month_name, report_path='pmi'):
     """
-    Build ISM report URL for given month
+    Build ISM report URL for given month ('pmi' — Manufacturing, 'services' — Services)
     """
-    base_url = "https://www.ismworld.org/supply-management-news-and-reports/reports/ism-report-on-business/pmi"
-    return f"{base_url}/{month_name}/"
+    base_url = "https://www.ismworld.org/supply-management-news-and-reports/reports/ism-report-on-business"
+    return f"{base_url}/{report_path}/{month_name}/"
 
 def get_ism_manufacturing_data():
     """
     Parse ISM Manufacturing PMI data from official ISM website
     Returns: dict with current data or None if no new data
     """
+    return get_ism_report_data('pmi', MANUFACTURING_INDEX_RE, 'ISM Manufacturing PMI')
+
+def get_ism_report_data(report_path, index_re, title):
+    """
+    Fetch and parse the latest ISM report page (report_path in the URL, index_re — row labels
+    of its index table, see compile_index_rows).
+    Returns: dict with current data or None if no new data
+    """
     
     # Determine expected report
     expected_year, expected_month, month_name = determine_expected_report_month()
     expected_date = f"{expected_year}-{expected_month:02d}-01"
     
-    print(f"Looking for ISM Manufacturing PMI report for: {calendar.month_name[expected_month]} {expected_year}")
+    print(f"Looking for {title} report for: {calendar.month_name[expected_month]} {expected_year}")
     print(f"Expected date format: {expected_date}")
     
     # Try multiple month variations in case our logic is off
@@ -74,7 +175,7 @@ def get_ism_manufacturing_data():
     print(f"Will try these month URLs: {month_variations}")
     
     for month_attempt in month_variations:
-        url = build_ism_url(month_attempt)
+        url = build_ism_url(month_attempt, report_path)
         print(f"Trying URL: {url}")
         
         try:
@@ -82,130 +183,27 @@ def get_ism_manufacturing_data():
                 'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
             }
             
-            response = requests.get(url, headers=headers, timeout=30)
+            response = http_get(url, headers=headers, timeout=30)
             
             if response.status_code == 404:
                 print(f"  → 404 Not Found for {month_attempt}")
                 continue
                 
             response.raise_for_status()
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Get all text content
-            all_text = soup.get_text()
-            
             print(f"  → Successfully loaded page for {month_attempt}")
-            
-            # Extract the report date from page content
-            # Look for patterns like "JULY 2025", "July 2025 Manufacturing ISM Report On Business"
-            date_patterns = [
-                r'(JANUARY|FEBRUARY|MARCH|APRIL|MAY|JUNE|JULY|AUGUST|SEPTEMBER|OCTOBER|NOVEMBER|DECEMBER)\s+(\d{4})',
-                r'(January|February|March|April|May|June|July|August|September|October|November|December)\s+(\d{4})',
-                r'Manufacturing\s+ISM\s+Report.*?(January|February|March|April|May|June|July|August|September|October|November|December)\s+(\d{4})'
-            ]
-            
-            report_month = None
-            report_year = None
-            
-            for pattern in date_patterns:
-                match = re.search(pattern, all_text)
-                if match:
-                    if len(match.groups()) == 2:
-                        report_month_name = match.group(1).capitalize()
-                        report_year = int(match.group(2))
-                    else:
-                        report_month_name = match.group(3).capitalize()
-                        report_year = int(match.group(4))
-                    
-                    month_map = {
-                        'January': 1, 'February': 2, 'March': 3, 'April': 4,
-                        'May': 5, 'June': 6, 'July': 7, 'August': 8,
-                        'September': 9, 'October': 10, 'November': 11, 'December': 12
-                    }
-                    report_month = month_map.get(report_month_name)
-                    break
-            
-            if not report_month or not report_year:
-                print(f"  → Could not extract report date from {month_attempt}")
-                continue
-                
-            report_date = f"{report_year}-{report_month:02d}-01"
-            print(f"  → Found report for: {calendar.month_name[report_month]} {report_year} ({report_date})")
-            
-            # Extract PMI data
-            extracted_data = {}
-            
-            # Define patterns for different PMI components
-            data_patterns = {
-                'headline': [
-                    r'Manufacturing\s+PMI.*?(\d+\.?\d*)%?',
-                    r'PMI.*?registered\s+(\d+\.?\d*)%?',
-                    r'PMI.*?(\d+\.?\d*)%?\s+percent',
-                    r'PMI\s*[:\-]?\s*(\d+\.?\d*)'
-                ],
-                'new_orders': [
-                    r'New\s+Orders.*?(\d+\.?\d*)%?',
-                    r'New\s+Orders\s+Index.*?(\d+\.?\d*)%?'
-                ],
-                'production': [
-                    r'Production.*?(\d+\.?\d*)%?',
-                    r'Production\s+Index.*?(\d+\.?\d*)%?'
-                ],
-                'employment': [
-                    r'Employment.*?(\d+\.?\d*)%?',
-                    r'Employment\s+Index.*?(\d+\.?\d*)%?'
-                ],
-                'supplier_deliveries': [
-                    r'Supplier\s+Deliveries.*?(\d+\.?\d*)%?',
-                    r'Deliveries.*?(\d+\.?\d*)%?'
-                ],
-                'inventories': [
-                    r'Inventories.*?(\d+\.?\d*)%?',
-                    r'Inventories\s+Index.*?(\d+\.?\d*)%?'
-                ],
-                'customers_inventories': [
-                    r'Customers.*?Inventories.*?(\d+\.?\d*)%?',
-                    r'Customer.*?Inventories.*?(\d+\.?\d*)%?'
-                ],
-                'prices_paid': [
-                    r'Prices.*?(\d+\.?\d*)%?',
-                    r'Prices\s+Paid.*?(\d+\.?\d*)%?'
-                ],
-                'order_backlog': [
-                    r'Backlog\s+of\s+Orders.*?(\d+\.\d+)',
-                    r'Order\s+Backlog.*?(\d+\.\d+)',
-                    r'Backlog.*?(\d+\.\d+)'
-                ],
-                'exports': [
-                    r'Exports.*?(\d+\.?\d*)%?',
-                    r'New\s+Export\s+Orders.*?(\d+\.?\d*)%?'
-                ],
-                'imports': [
-                    r'Imports.*?(\d+\.?\d*)%?'
-                ]
-            }
-            
-            # Try to extract each data point
-            for category, patterns in data_patterns.items():
-                for pattern in patterns:
-                    match = re.search(pattern, all_text, re.IGNORECASE)
-                    if match:
-                        try:
-                            value = float(match.group(1))
-                            # Sanity check - PMI values should be between 0 and 100
-                            if 0 <= value <= 100:
-                                extracted_data[category] = value
-                                print(f"  → Found {category}: {value}")
-                                break
-                        except (ValueError, IndexError):
-                            continue
-            
-            if not extracted_data:
-                print(f"  → No PMI data extracted from {month_attempt}")
+            report = parse_ism_report(response.content, index_re)
+            if report is None:
+                print(f"  → No index table or report date found for {month_attempt}")
                 continue
+
+            report_date = report['date']
+            extracted_data = report['values']
+            print(f"  → Found report for: {report_date}")
+            for category, value in extracted_data.items():
+                print(f"  → Found {category}: {value}")
             
             # If we found data, return it
-            print(f"✅ Successfully extracted PMI data for {report_date}")
+            print(f"✅ Successfully extracted {title} data for {report_date}")
             print(f"   Found {len(extracted_data)} data points: {list(extracted_data.keys())}")
             
             return {
@@ -221,33 +219,5 @@ def get_ism_manufacturing_data():
             print(f"  → Parsing error for {month_attempt}: {e}")
             continue
     
-    print("❌ Could not find or parse ISM Manufacturing PMI data from any URL")
+    print(f"❌ Could not find or parse {title} data from any URL")
     return None
-
-def check_if_data_exists_in_db(dao, indicator_id, expected_date):
-    """
-    Check if data for expected_date already exists in database
-    """
-    try:
-        latest_date = dao.get_latest_indicator_date(indicator_id)
-        if not latest_date:
-            print("No existing data in database")
-            return False
-        
-        print(f"Latest data in DB: {latest_date}")
-        print(f"Expected data date: {expected_date}")
-        
-        # Compare year-month only
-        latest_year_month = latest_date[:7]  # "2025-07"
-        expected_year_month = expected_date[:7]  # "2025-08"
-        
-        if latest_year_month >= expected_year_month:
-            print(f"✅ Data for {expected_year_month} already exists (latest: {latest_year_month})")
-            return True
-        else:
-            print(f"📥 Need to fetch data for {expected_year_month} (latest: {latest_year_month})")
-            return False
-            
-    except Exception as e:
-        print(f"Error checking database: {e}")
-        return False
\ No newline at end of file
@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+# collectors/ism_services_collector.py
+
+import sys
+from pathlib import Path
+
+# Добавляем корневую директорию проекта в sys.path (из collectors/)
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+from collectors.ism_manufacturing_collector import collect_ism_report
+from collectors.ism_services_parser import get_ism_services_data
+
+INDICATOR_CONFIG = {
+    'name': "us_ism_services_pmi",
+    'full_name': "ISM Services Purchasing Managers Index (formerly Non-Manufacturing, NMI)",
+    'source': "ISM",
+    'description': "ISM Services PMI and sub-indices including Business Activity, New Orders, Employment, Prices, etc."
+}
+
+def collect_ism_services_pmi():
+    """
+    Коллектор данных ISM Services PMI (тот же движок, что у Manufacturing)
+    Возвращает число добавленных записей (0 — данные уже есть) или None при ошибке
+    """
+    return collect_ism_report(INDICATOR_CONFIG, get_ism_services_data, "ISM Services PMI")
+
+def main():
+    print("ISM Services PMI Data Collector")
+    print("=" * 50)
+    
+    records_added = collect_ism_services_pmi()
+    
+    if records_added is not None:
+        print("\nДанные успешно собраны и сохранены!")
+    else:
+        print("\nОшибка при сборе данных")
+
+if __name__ == "__main__":
+    main()
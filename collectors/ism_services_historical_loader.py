@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+# collectors/ism_services_historical_loader.py
+
+import sys
+from pathlib import Path
+
+# Добавляем корневую директорию проекта в sys.path (из collectors/)
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+from collectors.ism_services_collector import INDICATOR_CONFIG
+from history_importers.csv_history_importer import import_history_csv
+
+# --- КОНФИГУРАЦИЯ ---
+CSV_FILE_PATH = project_root / "data" / "ism_nmi_historical.csv"
+IMPORT_CONFIG = {
+    'indicator': INDICATOR_CONFIG,
+    'date_column': 'Month',
+    'date_format': '%m/%d/%y',
+    # Колонки CSV -> категории (те же, что у парсера сайта ISM)
+    'columns': {
+        'NMI': 'headline',
+        'Business Activity': 'business_activity',
+        'New Orders': 'new_orders',
+        'Employment': 'employment',
+        'Deliveries': 'supplier_deliveries',
+        'Inventories': 'inventories',
+        'Prices': 'prices_paid',
+        'Order Backlog': 'order_backlog',
+        'Exports': 'exports',
+        'Imports': 'imports'
+    },
+    # 0.0 в архиве — пропуск (индекс диффузии не бывает нулевым)
+    'value_range': (1, 100),
+}
+
+def main():
+    print("🏢 ISM Services PMI - Загрузчик исторических данных")
+    print("=" * 60)
+    csv_path = Path(sys.argv[1]) if len(sys.argv) > 1 else CSV_FILE_PATH
+    if not csv_path.exists():
+        print(f"❌ Файл {csv_path} не найден!")
+        return
+
+    try:
+        import_history_csv(csv_path, IMPORT_CONFIG)
+        print("\n🎉 Загрузка исторических данных завершена успешно!")
+    except Exception as e:
+        print(f"\n❌ Ошибка при загрузке данных: {e}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,27 @@
+# collectors/ism_services_parser.py
+from collectors.ism_manufacturing_parser import compile_index_rows, get_ism_report_data
+
+# --- КОНФИГУРАЦИЯ ---
+# Строки таблицы индексов ("Services at a Glance"); категории — как в data/ism_nmi_historical.csv
+# (до 2020 года отчёт назывался Non-Manufacturing, головной индекс — NMI)
+SERVICES_INDEX_ROWS = {
+    'headline': r'(?:Services\s+PMI|(?:Non-Manufacturing\s+)?NMI)',
+    'business_activity': r'Business\s+Activity(?:\s*/\s*Production)?',
+    'new_orders': r'New\s+Orders',
+    'employment': r'Employment',
+    'supplier_deliveries': r'Supplier\s+Deliveries',
+    'inventories': r'Inventories',
+    'prices_paid': r'Prices(?:\s+Paid)?',
+    'order_backlog': r'(?:Backlog\s+of\s+Orders|Order\s+Backlog)',
+    'exports': r'(?:New\s+Export\s+Orders|Exports)',
+    'imports': r'Imports',
+    'inventory_sentiment': r'Inventory\s+Sentiment',
+}
+SERVICES_INDEX_RE = compile_index_rows(SERVICES_INDEX_ROWS)
+
+def get_ism_services_data():
+    """
+    Parse ISM Services PMI data from official ISM website
+    Returns: dict with current data or None if no new data
+    """
+    return get_ism_report_data('services', SERVICES_INDEX_RE, 'ISM Services PMI')
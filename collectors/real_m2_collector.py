@@ -1,7 +1,7 @@
 # collectors/fred_data_collector.py (refactored)
 import os
 import sys
-import pandas as pd
+from datetime import datetime, timedelta
 from dotenv import load_dotenv
 
 # --- ЗАГРУЗКА ПЕРЕМЕННЫХ ОКРУЖЕНИЯ ---
@@ -23,6 +23,10 @@ INDICATOR_CONFIG = {
     'description': 'Calculated as M2SL / CPIAUCSL * 100. Seasonally Adjusted.'
 }
 
+# Окно перезагрузки для ревизий и порог изменения, млрд долларов 1982-84
+REVISION_WINDOW_DAYS = 730
+REVISION_TOLERANCE = 0.01
+
 SERIES_CONFIGS = [
     {'id': 'M2SL', 'name': 'M2SL'},
     {'id': 'CPIAUCSL', 'name': 'CPIAUCSL'}
@@ -35,6 +39,7 @@ def calculate_real_m2(df):
 def main():
     """
     Рефакторированная версия с использованием общего FRED парсера.
+    Возвращает число записанных записей (новые + ревизии) или None при ошибке.
     """
     dao = None
     try:
@@ -47,10 +52,14 @@ def main():
             return
         print(f"Индикатор '{INDICATOR_CONFIG['name']}' зарегистрирован с ID: {indicator_id}")
 
-        start_date = dao.get_latest_indicator_date(indicator_id)
-        if start_date:
-            print(f"Последняя дата в БД: {start_date}. Загружаем данные с этой даты.")
+        latest_date = dao.get_latest_indicator_date(indicator_id)
+        if latest_date:
+            # M2 и CPI пересматриваются — перезагружаем окно ревизий
+            revision_start = (datetime.now() - timedelta(days=REVISION_WINDOW_DAYS)).strftime('%Y-%m-%d')
+            start_date = min(latest_date, revision_start)
+            print(f"Последняя дата в БД: {latest_date}. Загружаем данные с {start_date} для учета ревизий.")
         else:
+            start_date = None
             print("Данных в БД нет. Загружаем всю историю.")
         
         # ИСПОЛЬЗУЕМ НОВЫЙ ОБЩИЙ ПАРСЕР
@@ -62,17 +71,15 @@ def main():
 
         if real_m2_df.empty:
             print("Нет новых данных для сохранения.")
-            return
-        
-        print(f"Найдено {len(real_m2_df)} записей для обработки. Сохраняем в БД (дубликаты будут проигнорированы)...")
-        for _, row in real_m2_df.iterrows():
-            dao.add_indicator_value(
-                indicator_id=indicator_id,
-                date=row['date'].strftime('%Y-%m-%d'),
-                value=row['value']
-            )
+            return 0
         
+        print(f"Найдено {len(real_m2_df)} записей для обработки. Сохраняем в БД с учетом ревизий...")
+        report = dao.upsert_indicator_values(indicator_id, real_m2_df, tolerance=REVISION_TOLERANCE)
+        print(f"Добавлено {report['inserted']} записей, ревизий: {report['updated']}, "
+              f"без изменений: {report['unchanged']}.")
+
         print("Обработка завершена.")
+        return report['inserted'] + report['updated']
 
     except Exception as e:
         print(f"Произошла ошибка: {e}")
@@ -1,130 +1,366 @@
 # collectors/treasury_parser.py
+import csv
+import io
+import os
+import numpy as np
 import pandas as pd
 import requests
-from bs4 import BeautifulSoup
-from io import StringIO
+from lxml import etree
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, date
+from urllib.parse import urlsplit
 
+from collectors.http_client import http_get, configure_host
+
+# Базовый адрес можно переопределить (например, на локальный тестовый сервер)
+TREASURY_BASE_URL = os.getenv("TREASURY_BASE_URL", "https://home.treasury.gov")
 URL_TEMPLATE = (
-    "https://home.treasury.gov/resource-center/data-chart-center/interest-rates/"
+    TREASURY_BASE_URL + "/resource-center/data-chart-center/interest-rates/"
     "TextView?type={rate_type}&field_tdr_date_value={year_month}"
 )
+# Годовые файлы (CSV/XML) с теми же дневными ставками: один запрос на год вместо двенадцати.
+# year='all' в CSV — вся история одним файлом.
+FEED_URL_TEMPLATES = {
+    "csv": (
+        TREASURY_BASE_URL + "/resource-center/data-chart-center/interest-rates/daily-treasury-rates.csv/"
+        "{year}/all?type={rate_type}&field_tdr_date_value={year}&page&_format=csv"
+    ),
+    "xml": (
+        TREASURY_BASE_URL + "/resource-center/data-chart-center/interest-rates/pages/xml"
+        "?data={rate_type}&field_tdr_date_value={year}"
+    ),
+}
+# Начиная с этого числа лет догрузка в CSV идёт одним файлом всей истории
+FULL_HISTORY_MIN_YEARS = 10
+# Поля XML (OData) -> названия столбцов, как на странице TextView и в CSV
+FEED_XML_DATE_FIELD = "NEW_DATE"
+FEED_XML_FIELDS = {
+    "BC_1MONTH": "1 Mo", "BC_1_5MONTH": "1.5 Month", "BC_2MONTH": "2 Mo", "BC_3MONTH": "3 Mo",
+    "BC_4MONTH": "4 Mo", "BC_6MONTH": "6 Mo", "BC_1YEAR": "1 Yr", "BC_2YEAR": "2 Yr", "BC_3YEAR": "3 Yr",
+    "BC_5YEAR": "5 Yr", "BC_7YEAR": "7 Yr", "BC_10YEAR": "10 Yr", "BC_20YEAR": "20 Yr", "BC_30YEAR": "30 Yr",
+    "TC_5YEAR": "5 YR", "TC_7YEAR": "7 YR", "TC_10YEAR": "10 YR", "TC_20YEAR": "20 YR", "TC_30YEAR": "30 YR",
+}
+ODATA_METADATA_NS = "http://schemas.microsoft.com/ado/2007/08/dataservices/metadata"
+TREASURY_HOST = urlsplit(URL_TEMPLATE).netloc
 HEADERS = {
     "User-Agent": "Mozilla/5.0"
 }
 
-def _read_table_html(response_text: str) -> pd.DataFrame | None:
+def _cell_text(cell) -> str:
+    return "".join(cell.itertext()).strip()
+
+def _extract_table_columns(content: bytes) -> dict[str, np.ndarray] | None:
     """
-    Находим первую таблицу на странице и превращаем её в DataFrame.
-    BeautifulSoup повышает устойчивость, когда read_html по всей странице мимо.
+    Один потоковый проход lxml по байтам ответа до конца первой таблицы.
+    Результат — типизированные столбцы: 'date' (datetime64[D], NaT для
+    нераспознанных дат) и по столбцу float64 на каждый срок (NaN вместо 'N/A').
+    None — если таблицы нет или в ней нет колонки даты.
     """
-    soup = BeautifulSoup(response_text, "lxml")
-    table = soup.find("table")
-    if table is None:
+    header = None
+    rows = []
+    for _, element in etree.iterparse(io.BytesIO(content), events=("end",), tag=("tr", "table"), html=True):
+        if element.tag == "table":
+            break
+        cells = [child for child in element if child.tag in ("td", "th")]
+        if header is None and cells and all(cell.tag == "th" for cell in cells):
+            header = [_cell_text(cell) for cell in cells]
+        elif header is not None and len(cells) == len(header):
+            rows.append([_cell_text(cell) for cell in cells])
+        element.clear()
+
+    if header is None:
         return None
-    tables = pd.read_html(StringIO(str(table)))
-    if not tables:
+    return _rows_to_columns(header, rows)
+
+def _extract_csv_columns(content: bytes) -> dict[str, np.ndarray] | None:
+    """
+    Годовой CSV Treasury ("Date","1 Mo",...; даты mm/dd/YYYY) построчным csv.reader.
+    """
+    reader = csv.reader(io.TextIOWrapper(io.BytesIO(content), encoding="utf-8-sig", newline=""))
+    header = next(reader, None)
+    if not header:
         return None
-    return tables[0]
+    header = [name.strip() for name in header]
+    rows = [row for row in reader if len(row) == len(header)]
+    return _rows_to_columns(header, rows)
 
-def _normalize_date_column(df: pd.DataFrame, year: int, month: int) -> pd.DataFrame | None:
+def _extract_xml_columns(content: bytes) -> dict[str, np.ndarray] | None:
     """
-    Находим колонку даты без учёта регистра и приводим к datetime (mm/dd/YYYY).
+    Годовой XML Treasury (OData): потоковый проход по записям m:properties,
+    поля переименовываются по FEED_XML_FIELDS, остальные пропускаются.
     """
-    date_col = next((c for c in df.columns if str(c).strip().lower() == "date"), None)
-    if not date_col:
-        print(f"❌ Не найдена колонка даты за {year}-{month:02d}. Колонки: {list(df.columns)}")
+    header = None
+    rows = []
+    for _, element in etree.iterparse(io.BytesIO(content), events=("end",),
+                                      tag=f"{{{ODATA_METADATA_NS}}}properties"):
+        fields = {etree.QName(child).localname: (child.text or "") for child in element}
+        if header is None:
+            header = ["date"] + [FEED_XML_FIELDS[name] for name in fields if name in FEED_XML_FIELDS]
+            keys = [FEED_XML_DATE_FIELD] + [name for name in fields if name in FEED_XML_FIELDS]
+        rows.append([fields.get(key, "")[:10] if key == FEED_XML_DATE_FIELD else fields.get(key, "")
+                     for key in keys])
+        element.clear()
+
+    if header is None:
         return None
-    df = df.rename(columns={date_col: "date"}).copy()
-    df["date"] = pd.to_datetime(df["date"], format="%m/%d/%Y", errors="coerce")
-    df = df.dropna(subset=["date"])
-    return df
+    return _rows_to_columns(header, rows, date_format="%Y-%m-%d")
 
-def _reduce_month_rows(long_df: pd.DataFrame, year: int, month: int) -> pd.DataFrame:
+def _rows_to_columns(header: list[str], rows: list[list[str]],
+                     date_format: str = "%m/%d/%Y") -> dict[str, np.ndarray]:
     """
-    Сужаем ежедневные данные месяца до одной даты:
-    1) Если есть пятницы — берём все ряды за пятницы (как было).
-    2) Если пятниц нет — берём последнюю доступную дату месяца (fallback).
+    Строки таблицы -> типизированные столбцы: 'date' (datetime64[D], NaT для
+    нераспознанных дат) и float64 на каждый срок (NaN вместо 'N/A').
+    Без колонки даты — словарь с None вместо столбцов (для сообщения об ошибке).
     """
-    fridays = long_df[long_df["date"].dt.dayofweek == 4]
-    if not fridays.empty:
-        return fridays.copy()
+    date_idx = next((i for i, name in enumerate(header) if name.lower() == "date"), None)
+    if date_idx is None:
+        return {name: None for name in header}
 
-    last_date = long_df["date"].max()
-    fallback = long_df[long_df["date"] == last_date].copy()
-    print(f"⚠️ За {year}-{month:02d} пятниц нет, взята последняя дата: {last_date.date()}")
-    return fallback
+    cells = np.array(rows, dtype=object).reshape(len(rows), len(header))
+    dates = pd.to_datetime(cells[:, date_idx], format=date_format, errors="coerce")
+    columns = {"date": dates.to_numpy().astype("datetime64[D]")}
+    for i, name in enumerate(header):
+        if i != date_idx:
+            columns[name] = pd.to_numeric(cells[:, i], errors="coerce").astype(np.float64)
+    return columns
 
-def _fetch_and_parse_month(rate_type: str, year: int, month: int) -> pd.DataFrame | None:
+def _columns_to_long(columns: dict[str, np.ndarray]) -> pd.DataFrame:
     """
-    Загрузка и парсинг данных за один месяц.
-    rate_type:
-      - 'daily_treasury_yield_curve' (номинальная кривая)
-      - 'daily_treasury_real_yield_curve' (реальная кривая)
+    Столбцы -> long-формат [date, category, value] без пустых значений.
+    Категория — любой столбец, кроме date (порядок как у melt).
+    """
+    columns = dict(columns)
+    dates = columns.pop("date")
+    valid = ~np.isnat(dates)
+    categories = list(columns)
+    dates = dates[valid]
+    values = np.concatenate([columns[c][valid] for c in categories]) if categories else np.empty(0)
+    long_df = pd.DataFrame({
+        "date": np.tile(dates, len(categories)).astype("datetime64[ns]"),
+        "category": np.repeat(np.array(categories, dtype=object), len(dates)),
+        "value": values,
+    })
+    # Нечисловые значения ('N/A', '—') уже стали NaN
+    return long_df[~np.isnan(values)]
+
+def reduce_to_fridays(long_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Сужаем ежедневные данные до одной даты в неделю, сразу для всех месяцев одной маской:
+    1) пятницы;
+    2) в месяцах без пятниц — последняя доступная дата месяца (fallback).
+    """
+    if long_df.empty:
+        return long_df
+    dates = long_df["date"]
+    months = dates.dt.to_period("M")
+    is_friday = dates.dt.dayofweek == 4
+    has_friday = is_friday.groupby(months).transform("any")
+    is_last = dates == dates.groupby(months).transform("max")
+    fallback = ~has_friday & is_last
+    for last_date in dates[fallback].unique():
+        last_date = pd.Timestamp(last_date)
+        print(f"⚠️ За {last_date.year}-{last_date.month:02d} пятниц нет, взята последняя дата: {last_date.date()}")
+    return long_df[is_friday | fallback].copy()
+
+def _iter_months(start_date: date, end: date):
+    """
+    Последовательность (год, месяц) от месяца start_date до месяца end включительно.
+    """
+    cur = start_date
+    while cur <= end:
+        yield cur.year, cur.month
+        # следующий месяц
+        if cur.month == 12:
+            cur = cur.replace(year=cur.year + 1, month=1, day=1)
+        else:
+            cur = cur.replace(month=cur.month + 1, day=1)
+
+def _fetch_month_html(rate_type: str, year: int, month: int) -> bytes | None:
+    """
+    Сетевая часть: загрузка HTML страницы TextView за один месяц.
+    Закрытые месяцы не меняются: копия из дискового кэша, скачанная после
+    закрытия месяца, отдаётся без сети. Текущий месяц всегда перепроверяется.
     """
     year_month_str = f"{year}{month:02d}"
     url = URL_TEMPLATE.format(rate_type=rate_type, year_month=year_month_str)
+    month_closed_at = datetime(year + month // 12, month % 12 + 1, 1)
+    closed_for = (datetime.now() - month_closed_at).total_seconds()
 
     try:
-        resp = requests.get(url, headers=HEADERS, timeout=30)
+        resp = http_get(url, headers=HEADERS, timeout=30, cache=True,
+                        cache_ttl=max(closed_for, 0))
         resp.raise_for_status()
+        return resp.content
+    except requests.RequestException as e:
+        print(f"⚠️ Ошибка запроса для {year}-{month:02d}: {e}")
+        return None
 
-        df = _read_table_html(resp.text)
-        if df is None or df.empty:
+def _parse_month(content: bytes, year: int, month: int) -> pd.DataFrame | None:
+    """
+    Парсинг HTML месяца в long-формат (все дневные значения).
+    """
+    try:
+        columns = _extract_table_columns(content)
+        if not columns:
             print(f"❌ Нет таблицы в ответе Treasury за {year}-{month:02d}")
             return None
-
-        df = _normalize_date_column(df, year, month)
-        if df is None or df.empty:
+        if "date" not in columns:
+            print(f"❌ Не найдена колонка даты за {year}-{month:02d}. Колонки: {list(columns)}")
             return None
 
-        # В long-формат: категория — любой столбец, кроме date.
-        id_vars = ["date"]
-        value_vars = [c for c in df.columns if c not in id_vars]
-        long_df = pd.melt(df, id_vars=id_vars, value_vars=value_vars,
-                          var_name="category", value_name="value")
-        long_df.dropna(subset=["value"], inplace=True)
+        long_df = _columns_to_long(columns)
+        return None if long_df.empty else long_df
+
+    except Exception as e:
+        print(f"❌ Неожиданная ошибка при обработке {year}-{month:02d}: {e}")
+        return None
+
+def _fetch_and_parse_month(rate_type: str, year: int, month: int) -> pd.DataFrame | None:
+    """
+    Загрузка и парсинг данных за один месяц.
+    rate_type:
+      - 'daily_treasury_yield_curve' (номинальная кривая)
+      - 'daily_treasury_real_yield_curve' (реальная кривая)
+    """
+    content = _fetch_month_html(rate_type, year, month)
+    if content is None:
+        return None
+    return _parse_month(content, year, month)
+
+def _fetch_months_concurrently(rate_type: str, months: list[tuple[int, int]],
+                               max_workers: int) -> list[pd.DataFrame | None]:
+    """
+    Месяцы качаются пулом потоков (лимиты хоста — в http_client),
+    а парсинг идёт в вызывающем потоке по мере готовности ответов.
+    Результат — список в порядке months.
+    """
+    parts: list[pd.DataFrame | None] = [None] * len(months)
 
-        # Числовые значения (бывает '—' или текст)
-        long_df["value"] = pd.to_numeric(long_df["value"], errors="coerce")
-        long_df.dropna(subset=["value"], inplace=True)
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {
+            pool.submit(_fetch_month_html, rate_type, year, month): idx
+            for idx, (year, month) in enumerate(months)
+        }
+        for future in as_completed(futures):
+            idx = futures[future]
+            year, month = months[idx]
+            content = future.result()
+            if content is None:
+                continue
+            print(f"Обработка {year}-{month:02d}...")
+            parts[idx] = _parse_month(content, year, month)
 
-        # Сужаем месяц до пятниц или последней доступной даты
-        return _reduce_month_rows(long_df, year, month)
+    return parts
+
+def _fetch_feed(rate_type: str, year: int | str, feed_format: str) -> bytes | None:
+    """
+    Загрузка годового файла (year='all' — вся история). Закрытые годы отдаются
+    из дискового кэша, текущий год и полная история всегда перепроверяются.
+    """
+    url = FEED_URL_TEMPLATES[feed_format].format(rate_type=rate_type, year=year)
+    closed_for = 0
+    if year != "all":
+        closed_for = (datetime.now() - datetime(int(year) + 1, 1, 1)).total_seconds()
 
+    try:
+        resp = http_get(url, headers=HEADERS, timeout=60, cache=True, cache_ttl=max(closed_for, 0))
+        resp.raise_for_status()
+        return resp.content
     except requests.RequestException as e:
-        print(f"⚠️ Ошибка запроса для {year}-{month:02d}: {e}")
+        print(f"⚠️ Ошибка запроса файла {feed_format.upper()} за {year}: {e}")
         return None
+
+def _parse_feed(content: bytes, feed_format: str, start_date: date) -> pd.DataFrame | None:
+    """
+    Годовой файл -> long-формат (все дневные значения), начиная с месяца start_date.
+    """
+    try:
+        extract = _extract_csv_columns if feed_format == "csv" else _extract_xml_columns
+        columns = extract(content)
+        if not columns or "date" not in columns:
+            print(f"❌ Нет данных в файле {feed_format.upper()} Treasury")
+            return None
+
+        long_df = _columns_to_long(columns)
+        long_df = long_df[long_df["date"] >= pd.Timestamp(start_date.year, start_date.month, 1)]
+        return None if long_df.empty else long_df
+
     except Exception as e:
-        print(f"❌ Неожиданная ошибка при обработке {year}-{month:02d}: {e}")
+        print(f"❌ Неожиданная ошибка при обработке файла {feed_format.upper()}: {e}")
         return None
 
-def get_treasury_history(rate_type: str, start_date: date) -> pd.DataFrame:
+def _fetch_feed_history(rate_type: str, start_date: date, end: date, feed_format: str,
+                        max_workers: int) -> tuple[list[pd.DataFrame | None], set[int]]:
     """
-    Возвращает конкатенацию по месяцам с сузившимися датами (см. _reduce_month_rows).
+    История из годовых файлов. Возвращает части и множество лет, которые
+    получить не удалось (их догружает помесячный HTML).
     """
-    all_parts: list[pd.DataFrame] = []
-    cur = start_date
+    years = list(range(start_date.year, end.year + 1))
+    if feed_format == "csv" and len(years) >= FULL_HISTORY_MIN_YEARS:
+        print("Загрузка полной истории одним файлом CSV...")
+        content = _fetch_feed(rate_type, "all", feed_format)
+        part = _parse_feed(content, feed_format, start_date) if content is not None else None
+        if part is not None:
+            return [part], set()
+
+    parts: list[pd.DataFrame | None] = [None] * len(years)
+    with ThreadPoolExecutor(max_workers=max(max_workers, 1)) as pool:
+        futures = {pool.submit(_fetch_feed, rate_type, year, feed_format): idx
+                   for idx, year in enumerate(years)}
+        for future in as_completed(futures):
+            idx = futures[future]
+            content = future.result()
+            if content is None:
+                continue
+            print(f"Обработка {years[idx]} ({feed_format.upper()})...")
+            parts[idx] = _parse_feed(content, feed_format, start_date)
+
+    failed = {year for year, part in zip(years, parts) if part is None}
+    return parts, failed
+
+def get_treasury_history(rate_type: str, start_date: date, max_workers: int = 1,
+                         requests_per_second: float | None = None, backend: str = "html",
+                         reduce: bool = True) -> pd.DataFrame:
+    """
+    Возвращает конкатенацию по месяцам с сузившимися датами (см. reduce_to_fridays);
+    reduce=False — все дневные значения без сужения.
+    max_workers > 1 включает параллельную загрузку месяцев; результат идентичен
+    последовательному режиму. requests_per_second переопределяет лимит хоста Treasury.
+    backend: 'html' — страницы TextView по месяцам; 'csv'/'xml' — годовые файлы
+    (длинная догрузка в CSV — одним файлом всей истории). Годы, для которых файл
+    получить не удалось, догружаются помесячно из HTML.
+    """
+    if requests_per_second is not None:
+        configure_host(TREASURY_HOST, max_concurrency=max(max_workers, 1),
+                       requests_per_second=requests_per_second)
+
     end = datetime.now().date()
+    months = list(_iter_months(start_date, end))
 
     print(f"Начинаем загрузку данных с {start_date} по {end}")
 
-    while cur <= end:
-        print(f"Обработка {cur.year}-{cur.month:02d}...")
-        part = _fetch_and_parse_month(rate_type, cur.year, cur.month)
-        if part is not None and not part.empty:
-            all_parts.append(part)
+    parts = []
+    if backend != "html":
+        feed_parts, failed_years = _fetch_feed_history(rate_type, start_date, end, backend, max_workers)
+        parts.extend(feed_parts)
+        months = [(year, month) for year, month in months if year in failed_years]
+        if months:
+            print(f"⚠️ Помесячная загрузка HTML за годы: {sorted(failed_years)}")
 
-        # следующий месяц
-        if cur.month == 12:
-            cur = cur.replace(year=cur.year + 1, month=1, day=1)
-        else:
-            cur = cur.replace(month=cur.month + 1, day=1)
+    if max_workers > 1:
+        parts.extend(_fetch_months_concurrently(rate_type, months, max_workers))
+    else:
+        for year, month in months:
+            print(f"Обработка {year}-{month:02d}...")
+            parts.append(_fetch_and_parse_month(rate_type, year, month))
 
+    all_parts = [part for part in parts if part is not None and not part.empty]
     if not all_parts:
         return pd.DataFrame()
 
     out = pd.concat(all_parts, ignore_index=True)
+    if reduce:
+        out = reduce_to_fridays(out)
     # страховка: сортировка
     out.sort_values(["date", "category"], inplace=True, ignore_index=True)
     return out
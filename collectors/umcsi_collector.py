@@ -6,10 +6,12 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from dao import IndicatorDAO
 from collectors.umcsi_parser import get_umcsi_data
 import json
+import pandas as pd
 
 def collect_umcsi():
     """
     Collect current UMCSI data from official website
+    Returns number of added value records, or None on failure
     """
     print("Starting UMCSI data collection...")
     
@@ -32,7 +34,7 @@ def collect_umcsi():
         
         if not umcsi_data:
             print("Failed to fetch UMCSI data")
-            return
+            return None
         
         date = umcsi_data['date']
         values = umcsi_data['values']
@@ -45,19 +47,21 @@ def collect_umcsi():
         suffix = '_p' if is_preliminary else ''
         
         # Add numerical values to database
-        records_added = 0
+        # Check which records already exist: one indexed query for all categories
+        category_names = {category: f"{category}{suffix}" for category in values}
+        existing = dao.existing_keys(indicator_id, [date], category_names.values())
+        new_rows = []
         for category, value in values.items():
-            category_name = f"{category}{suffix}"
-            
-            # Check if this exact record already exists
-            existing_records = dao.get_indicator_values_by_category(indicator_id, category_name)
-            if not existing_records.empty and date in existing_records.index.strftime('%Y-%m-%d'):
+            category_name = category_names[category]
+            if (date, category_name) in existing:
                 print(f"Data already exists for {category_name} on {date}, skipping...")
                 continue
             
-            dao.add_indicator_value(indicator_id, date, value, category_name)
+            new_rows.append({'date': date, 'category': category_name, 'value': value})
             print(f"Added {category_name}: {value}")
-            records_added += 1
+
+        stats = dao.add_indicator_values_bulk(indicator_id, pd.DataFrame(new_rows), category_col='category')
+        records_added = stats['inserted']
         
         # Add text releases to database with duplicate checking
         print(f"\nProcessing text releases:")
@@ -99,6 +103,7 @@ def collect_umcsi():
                 print(f"✗ Skipping {text_type} - no content")
         
         print(f"\nUMCSI collection complete. Added {records_added} value records and {releases_added} text releases.")
+        return records_added
         
     except Exception as e:
         print(f"Error in UMCSI collection: {e}")
@@ -5,6 +5,8 @@ import re
 from datetime import datetime
 import pandas as pd
 
+from collectors.http_client import http_get
+
 def get_umcsi_data():
     """
     Parse UMCSI data from official University of Michigan website
@@ -17,7 +19,7 @@ def get_umcsi_data():
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         }
         
-        response = requests.get(url, headers=headers, timeout=30)
+        response = http_get(url, headers=headers, timeout=30)
         response.raise_for_status()
         
         soup = BeautifulSoup(response.content, 'html.parser')
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+# collectors/update_all_indicators.py
+#
+# Оркестратор обновления всех индикаторов в одном процессе (замена последовательного
+# запуска коллекторов из bash_scripts/update_all_indicators.sh).
+# Использование: python collectors/update_all_indicators.py [--quick] [--workers N] [--json] [--verbose]
+
+import argparse
+import importlib
+import io
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+
+# Добавляем корневую папку в путь поиска модулей
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.append(parent_dir)
+
+import dao
+from collectors.http_client import get_host_stats
+
+# --- КОНФИГУРАЦИЯ ---
+# entry — функция коллектора: возвращает число записанных записей или None при ошибке
+COLLECTORS = [
+    {'name': 'yield_curve', 'module': 'collectors.yield_curve_collector', 'entry': 'main',
+     'description': '📈 Кривая доходности казначейства США', 'quick': False},
+    {'name': 'real_yield_curve', 'module': 'collectors.real_yield_curve_collector', 'entry': 'main',
+     'description': '📊 Реальная кривая доходности', 'quick': False},
+    {'name': 'real_m2', 'module': 'collectors.real_m2_collector', 'entry': 'main',
+     'description': '💵 Реальная денежная масса M2', 'quick': False},
+    {'name': 'building_permits', 'module': 'collectors.building_permits_collector', 'entry': 'main',
+     'description': '🏗️ Разрешения на строительство', 'quick': False},
+    {'name': 'umcsi', 'module': 'collectors.umcsi_collector', 'entry': 'collect_umcsi',
+     'description': '🛒 Потребительские настроения Michigan', 'quick': True},
+    {'name': 'ism_manufacturing', 'module': 'collectors.ism_manufacturing_collector',
+     'entry': 'collect_ism_manufacturing_pmi', 'description': '🏭 ISM Manufacturing PMI', 'quick': True},
+    {'name': 'ism_services', 'module': 'collectors.ism_services_collector',
+     'entry': 'collect_ism_services_pmi', 'description': '🏢 ISM Services PMI', 'quick': True},
+    {'name': 'gdp', 'module': 'collectors.gdp_collector', 'entry': 'main',
+     'description': '🏛️ Реальный ВВП США', 'quick': True},
+]
+DEFAULT_WORKERS = 4
+
+class _ThreadLocalStdout(io.TextIOBase):
+    """
+    Перенаправляет print() каждого коллектора в его собственный буфер,
+    чтобы вывод параллельных коллекторов не перемешивался.
+    """
+    def __init__(self, default):
+        self.default = default
+        self._local = threading.local()
+
+    def capture(self, buffer):
+        self._local.buffer = buffer
+
+    def release(self):
+        self._local.buffer = None
+
+    def write(self, text):
+        buffer = getattr(self._local, 'buffer', None)
+        return (buffer or self.default).write(text)
+
+    def flush(self):
+        self.default.flush()
+
+def run_collector(config: dict, stdout: _ThreadLocalStdout) -> dict:
+    """
+    Запуск одного коллектора с замером времени. Ошибки не пробрасываются,
+    а попадают в результат.
+    """
+    log = io.StringIO()
+    stdout.capture(log)
+    started = time.perf_counter()
+    result = {'name': config['name'], 'status': 'ok', 'records': None, 'error': None}
+    try:
+        module = importlib.import_module(config['module'])
+        records = getattr(module, config['entry'])()
+        if records is None:
+            result['status'] = 'failed'
+            result['error'] = 'коллектор завершился с ошибкой (см. лог)'
+        else:
+            result['records'] = int(records)
+    except Exception as e:
+        result['status'] = 'failed'
+        result['error'] = f"{type(e).__name__}: {e}"
+    finally:
+        stdout.release()
+    result['wall_time'] = round(time.perf_counter() - started, 2)
+    result['log'] = log.getvalue()
+    return result
+
+def run_all(collectors: list[dict], workers: int = DEFAULT_WORKERS, verbose: bool = False,
+            quiet: bool = False) -> list[dict]:
+    """
+    Параллельный запуск коллекторов (сетевые задачи) в пуле потоков.
+    Запись в БД идёт через общий поток-писатель IndicatorDAO (WAL, групповые коммиты).
+    """
+    dao.enable_concurrent_writes()
+    stdout = _ThreadLocalStdout(sys.stdout)
+    sys.stdout = stdout
+    results = {}
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            futures = {pool.submit(run_collector, cfg, stdout): cfg for cfg in collectors}
+            for future in as_completed(futures):
+                cfg = futures[future]
+                result = future.result()
+                results[cfg['name']] = result
+                if quiet:
+                    continue
+                mark = '✅' if result['status'] == 'ok' else '❌'
+                print(f"{mark} {cfg['description']} — {result['wall_time']}с")
+                if verbose or result['status'] != 'ok':
+                    print(result['log'])
+    finally:
+        sys.stdout = stdout.default
+    return [results[cfg['name']] for cfg in collectors]
+
+def print_summary(results: list[dict], total_time: float):
+    print("\n" + "=" * 70)
+    print(f"{'Коллектор':<20} | {'Статус':<7} | {'Записей':>8} | {'Время, с':>8}")
+    print("-" * 70)
+    for r in results:
+        records = '-' if r['records'] is None else r['records']
+        print(f"{r['name']:<20} | {r['status']:<7} | {records:>8} | {r['wall_time']:>8}")
+        if r['error']:
+            print(f"    ⚠️ {r['error']}")
+    ok_count = sum(r['status'] == 'ok' for r in results)
+    print("-" * 70)
+    print(f"Успешно: {ok_count}/{len(results)}, общее время {total_time:.1f}с")
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Обновление всех экономических индикаторов в одном процессе.")
+    parser.add_argument("--quick", action="store_true", help="Только ключевые индикаторы")
+    parser.add_argument("--only", nargs="+", metavar="NAME", help="Запустить только указанные коллекторы")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Число параллельных коллекторов")
+    parser.add_argument("--json", action="store_true", help="Итог в формате JSON")
+    parser.add_argument("--verbose", action="store_true", help="Показывать полный лог каждого коллектора")
+    parser.add_argument("--list", action="store_true", help="Показать список коллекторов")
+    args = parser.parse_args()
+
+    if args.list:
+        for cfg in COLLECTORS:
+            print(f"{cfg['name']:<20} {cfg['description']}{' (quick)' if cfg['quick'] else ''}")
+        return 0
+
+    collectors = [cfg for cfg in COLLECTORS if cfg['quick'] or not args.quick]
+    if args.only:
+        collectors = [cfg for cfg in collectors if cfg['name'] in args.only]
+
+    # Схема проверяется один раз до запуска потоков: на устаревшей БД — одна понятная ошибка
+    try:
+        dao.IndicatorDAO().close()
+    except RuntimeError as e:
+        print(f"❌ {e}")
+        return 1
+
+    started_at = datetime.now()
+    started = time.perf_counter()
+    results = run_all(collectors, workers=args.workers, verbose=args.verbose, quiet=args.json)
+    total_time = time.perf_counter() - started
+
+    if args.json:
+        report = {
+            'started_at': started_at.strftime("%Y-%m-%d %H:%M:%S"),
+            'wall_time': round(total_time, 2),
+            'collectors': [{k: v for k, v in r.items() if k != 'log'} for r in results],
+            'http': get_host_stats(),
+            'series_cache': dao.get_series_cache().snapshot(),
+        }
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    else:
+        print_summary(results, total_time)
+
+    return 0 if all(r['status'] == 'ok' for r in results) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -9,8 +9,9 @@ current_dir = os.path.dirname(os.path.abspath(__file__))
 parent_dir = os.path.dirname(current_dir)
 sys.path.append(parent_dir)
 
-from dao import IndicatorDAO
-from collectors.treasury_parser import get_treasury_history # <-- ИМПОРТИРУЕМ ГЛАВНУЮ ФУНКЦИЮ
+from dao import IndicatorDAO, WIDE_STORAGE
+from collectors.http_client import print_host_stats
+from collectors.treasury_parser import get_treasury_history, reduce_to_fridays # <-- ИМПОРТИРУЕМ ГЛАВНУЮ ФУНКЦИЮ
 
 # --- КОНФИГУРАЦИЯ ---
 INDICATOR_CONFIG = {
@@ -20,9 +21,18 @@ INDICATOR_CONFIG = {
     'description': 'Nominal yield curve rates for various maturities, Fridays only.'
 }
 RATE_TYPE = 'daily_treasury_yield_curve'
+# Параллельная загрузка месяцев: число потоков и лимит запросов в секунду к Treasury
+FETCH_WORKERS = 6
+REQUESTS_PER_SECOND = 4
+# Источник истории: 'csv'/'xml' — годовые файлы Treasury (один запрос на год),
+# 'html' — постраничный TextView по месяцам
+HISTORY_BACKEND = 'csv'
 DEFAULT_START_DATE = datetime(2000, 1, 1).date()
 
 def main():
+    """
+    Возвращает число добавленных записей или None при ошибке.
+    """
     dao = None
     try:
         print("--- Запуск сборщика НОМИНАЛЬНОЙ кривой доходности ---")
@@ -32,27 +42,36 @@ def main():
         if not indicator_id:
             print("Не удалось получить ID индикатора.")
             return
+        if WIDE_STORAGE:
+            dao.enable_wide_storage(indicator_id)
 
-        latest_date_str = dao.get_latest_indicator_date(indicator_id)
-        start_date = pd.to_datetime(latest_date_str).date() if latest_date_str else DEFAULT_START_DATE
+        # Пятницы — в indicator_values, все дневные точки — в широкой таблице кривых;
+        # догружаем от более ранней из двух последних дат (первый запуск — полная история)
+        latest_dates = [dao.get_latest_indicator_date(indicator_id), dao.get_latest_daily_curve_date(indicator_id)]
+        start_date = min(pd.to_datetime(d).date() if d else DEFAULT_START_DATE for d in latest_dates)
         
         # ОДИН ВЫЗОВ для получения всей истории
-        history_df = get_treasury_history(RATE_TYPE, start_date)
-        
-        if history_df.empty:
+        daily_df = get_treasury_history(RATE_TYPE, start_date, max_workers=FETCH_WORKERS,
+                                        requests_per_second=REQUESTS_PER_SECOND, backend=HISTORY_BACKEND,
+                                        reduce=False)
+        print_host_stats()
+
+        if daily_df.empty:
             print("Нет новых данных для сохранения.")
-            return
+            return 0
 
+        curves = daily_df.pivot(index='date', columns='category', values='value')
+        curves = curves[pd.unique(daily_df['category'])]
+        curve_stats = dao.add_daily_curve(indicator_id, curves)
+        print(f"Дневные кривые: добавлено {curve_stats['inserted']} дат, обновлено {curve_stats['updated']}.")
+
+        history_df = reduce_to_fridays(daily_df)
         print(f"Получено {len(history_df)} новых записей. Сохранение в БД (дубликаты будут проигнорированы)...")
-        for _, row in history_df.iterrows():
-            dao.add_indicator_value(
-                indicator_id=indicator_id,
-                date=row['date'].strftime('%Y-%m-%d'),
-                value=row['value'],
-                category=row['category']
-            )
-        
+        stats = dao.add_indicator_values_bulk(indicator_id, history_df, category_col='category')
+        print(f"Добавлено {stats['inserted']} записей, пропущено дубликатов: {stats['ignored']}.")
+
         print("\nСбор данных завершен.")
+        return stats['inserted']
 
     except Exception as e:
         print(f"Произошла ошибка в коллекторе номинальных ставок: {e}")
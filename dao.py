@@ -1,12 +1,23 @@
 # dao.py
 import sqlite3
 import json
+import atexit
+import numpy as np
+import queue
+import threading
 import pandas as pd
+from collections import OrderedDict
+from contextlib import contextmanager
 from pathlib import Path
 from datetime import datetime
+from concurrent.futures import Future
 from dotenv import load_dotenv
 import os
 
+from database_setup import (SCHEMA_VERSION, WIDE_TABLES_SQL, WATERMARK_TRIGGER_NAMES, WATERMARK_TRIGGERS_SQL,
+                            WATERMARK_RANGE_SUBTRACT_SQL, WATERMARK_RANGE_ADD_SQL, WATERMARK_LAST_DATE_SQL,
+                            get_schema_version)
+
 # --- Загрузка переменных окружения ---
 load_dotenv()
 home_dir = Path.home()
@@ -14,40 +25,995 @@ DB_SUBDIR = os.getenv("DB_SUBDIR", "Documents")
 DB_FILE = os.getenv("DB_FILE", "economic_indicators.db")
 DB_PATH = home_dir / DB_SUBDIR / DB_FILE
 
+# Размер пачки для executemany в массовой записи
+BULK_CHUNK_SIZE = 5000
+# Задание, пишущее не меньше стольких строк, ведёт водяные знаки запросами по диапазону дат
+# вместо построчных триггеров (см. WATERMARK_TRIGGERS_SQL); мелкие записи остаются на триггерах
+WATERMARK_BULK_ROWS = 1000
+
+INSERT_IGNORE_VALUE_SQL = """
+INSERT OR IGNORE INTO indicator_values (indicator_id, date, category, value, created_at)
+VALUES (?, ?, ?, ?, ?)
+"""
+UPSERT_VALUE_SQL = """
+INSERT INTO indicator_values (indicator_id, date, category, value, created_at)
+VALUES (?, ?, ?, ?, ?)
+ON CONFLICT(indicator_id, date, category)
+DO UPDATE SET value = excluded.value, created_at = excluded.created_at
+WHERE indicator_values.value <> excluded.value
+"""
+DELETE_VALUE_SQL = "DELETE FROM indicator_values WHERE indicator_id = ? AND date = ? AND category = ?"
+INSERT_RELEASE_SQL = """
+INSERT INTO indicator_releases (indicator_id, date, category, release_data, source_url, created_at)
+SELECT ?, ?, ?, ?, ?, ?
+WHERE NOT EXISTS (SELECT 1 FROM indicator_releases WHERE indicator_id = ? AND date = ? AND category IS ?)
+"""
+# Версии значений, записанных не через upsert_indicator_values: для индикатора с версиями
+# сохраняется каждое значение, отличающееся от его последней версии (или ещё без версий)
+RECORD_VINTAGES_SQL = """
+INSERT OR REPLACE INTO indicator_value_vintages (indicator_id, category, date, as_of, value)
+SELECT v.indicator_id, v.category, v.date, ?, v.value
+FROM indicator_values v
+WHERE v.indicator_id = ? AND v.date BETWEEN ? AND ?
+  AND v.value IS NOT (SELECT g.value FROM indicator_value_vintages g
+                      WHERE g.indicator_id = v.indicator_id AND g.category = v.category AND g.date = v.date
+                      ORDER BY g.as_of DESC LIMIT 1)
+"""
+# День записи значения (created_at — Unix-время) — его версия, если других версий нет
+CREATED_DAY_SQL = "COALESCE(CAST(julianday(created_at, 'unixepoch', 'localtime') - 2440587.5 AS INTEGER), date)"
+SEED_VINTAGES_SQL = f"""
+INSERT OR IGNORE INTO indicator_value_vintages (indicator_id, category, date, as_of, value)
+SELECT indicator_id, category, date, {CREATED_DAY_SQL}, value
+FROM indicator_values WHERE indicator_id = ?
+"""
+INSERT_VINTAGE_SQL = """
+INSERT OR REPLACE INTO indicator_value_vintages (indicator_id, category, date, as_of, value)
+VALUES (?, ?, ?, ?, ?)
+"""
+
+# Даты в indicator_values — номера дней от 1970-01-01 (миграция 5);
+# быстрое чтение рядов в NumPy: номер дня и значение
+SERIES_DTYPE = np.dtype([('day', 'i8'), ('value', 'f8')])
+# Границы диапазона дат по умолчанию (целые SQLite)
+MIN_DAY, MAX_DAY = -(2 ** 63), 2 ** 63 - 1
+
+# Частоты чтения дневных кривых (get_daily_curve)
+CURVE_FREQUENCIES = ('daily', 'friday', 'week', 'month')
+
+# Ожидание освобождения блокировки БД другим процессом (мс)
+BUSY_TIMEOUT_MS = 30000
+# Сколько заданий записи поток-писатель объединяет в одну транзакцию
+GROUP_COMMIT_MAX_JOBS = 500
+# Режим конкурентной записи по умолчанию (WAL + общий поток-писатель)
+CONCURRENT_WRITES = os.getenv("DB_CONCURRENT_WRITES", "0") == "1"
+# Широкая копия значений (enable_wide_storage) у коллекторов кривых и наборов (ISM, Treasury,
+# разрешения на строительство): строка на дату, столбец на категорию. Включается явно —
+# это лишняя таблица и триггеры на каждую запись
+WIDE_STORAGE = os.getenv("DB_WIDE_STORAGE", "0") == "1"
+# Предел памяти кэша чтения рядов на файл БД (0 — кэш выключен)
+SERIES_CACHE_MAX_BYTES = int(float(os.getenv("DB_SERIES_CACHE_MB", "64")) * 2 ** 20)
+# Parquet-снимок (parquet_store.py, нужен pyarrow) для чтения рядов в обход SQLite (пусто — выключено)
+# и его предельный возраст
+SNAPSHOT_DIR = os.getenv("DB_SNAPSHOT_DIR") or None
+SNAPSHOT_MAX_AGE = float(os.getenv("DB_SNAPSHOT_MAX_AGE_HOURS", "24")) * 3600
+
+# Один писатель на процесс: коллекторы, запущенные параллельно в одном процессе,
+# пишут в SQLite по очереди и не получают "database is locked"
+_write_lock = threading.RLock()
+_writers = {}
+_writers_lock = threading.Lock()
+_caches = {}
+_caches_lock = threading.Lock()
+_snapshot_warned = False
+
+def open_connection(db_path, wal=False, **kwargs):
+    """
+    SQLite connection with busy timeout; wal=True switches the database to WAL
+    (readers are not blocked by the writer, setting persists in the file).
+    """
+    conn = sqlite3.connect(db_path, timeout=BUSY_TIMEOUT_MS / 1000, **kwargs)
+    conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+    if wal:
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA synchronous = NORMAL")
+    return conn
+
+def enable_concurrent_writes(enabled=True):
+    """
+    Default mode for IndicatorDAO objects created afterwards (used by the orchestrator).
+    """
+    global CONCURRENT_WRITES
+    CONCURRENT_WRITES = enabled
+
+class SQLiteWriter:
+    """
+    Single writer thread for one database file. Write jobs job(conn) from any thread
+    are queued and applied on the writer's own connection, everything queued so far
+    in one transaction (group commit). Each job runs in a savepoint, so a failing job
+    is rolled back alone and its error is raised in the submitting thread.
+    If the writer thread itself fails (connection, commit), every queued job gets
+    that error and the writer is dead: later submits raise at once instead of waiting.
+    """
+    def __init__(self, db_path, max_batch=GROUP_COMMIT_MAX_JOBS):
+        self.db_path = db_path
+        self.max_batch = max_batch
+        self.stats = {'jobs': 0, 'commits': 0, 'max_batch': 0}
+        self.error = None
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="sqlite-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, job):
+        """
+        Queue job and wait until it is committed; returns job's result.
+        """
+        future = Future()
+        with self._lock:
+            if self.error is not None:
+                raise RuntimeError(f"Поток записи в {self.db_path} остановлен: {self.error}") from self.error
+            self._queue.put((job, future))
+        return future.result()
+
+    @property
+    def alive(self) -> bool:
+        return self.error is None
+
+    def stop(self):
+        self._queue.put(None)
+        self._thread.join()
+
+    def _run(self):
+        conn, batch = None, []
+        try:
+            # isolation_level=None: транзакциями управляем сами (BEGIN IMMEDIATE ... COMMIT)
+            conn = open_connection(self.db_path, wal=True, isolation_level=None)
+            running = True
+            while running:
+                item = self._queue.get()
+                if item is None:
+                    break
+                batch = [item]
+                while len(batch) < self.max_batch:
+                    try:
+                        item = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if item is None:
+                        running = False
+                        break
+                    batch.append(item)
+                self._commit_batch(conn, batch)
+                batch = []
+        except BaseException as e:
+            print(f"❌ Поток записи в {self.db_path} остановлен: {e}")
+            self._fail(e, batch)
+        finally:
+            if conn is not None:
+                conn.close()
+
+    def _fail(self, error, batch):
+        """
+        Marks the writer dead and fails the current batch and everything still queued.
+        """
+        with self._lock:
+            self.error = error
+        pending = [future for _, future in batch]
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not None:
+                pending.append(item[1])
+        for future in pending:
+            if not future.done():
+                future.set_exception(error)
+
+    def _commit_batch(self, conn, batch):
+        outcomes = []
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for job, future in batch:
+                conn.execute("SAVEPOINT job")
+                try:
+                    outcomes.append((future, job(conn), None))
+                    conn.execute("RELEASE job")
+                except Exception as e:
+                    conn.execute("ROLLBACK TO job")
+                    conn.execute("RELEASE job")
+                    outcomes.append((future, None, e))
+            conn.execute("COMMIT")
+        except sqlite3.Error as e:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            for _, future in batch:
+                future.set_exception(e)
+            return
+
+        self.stats['jobs'] += len(batch)
+        self.stats['commits'] += 1
+        self.stats['max_batch'] = max(self.stats['max_batch'], len(batch))
+        for future, result, error in outcomes:
+            if error is None:
+                future.set_result(result)
+            else:
+                future.set_exception(error)
+
+def get_writer(db_path=None):
+    """
+    Process-wide writer for db_path (default: DB_PATH), started on first use
+    and restarted for new DAOs if its thread has failed.
+    """
+    key = str(Path(db_path or DB_PATH).resolve())
+    with _writers_lock:
+        if key not in _writers or not _writers[key].alive:
+            _writers[key] = SQLiteWriter(key)
+        return _writers[key]
+
+@atexit.register
+def shutdown_writers():
+    with _writers_lock:
+        writers = list(_writers.values())
+        _writers.clear()
+    for writer in writers:
+        writer.stop()
+
+class SeriesCache:
+    """
+    LRU cache of series reads (get_series_arrays) for one database file, shared by all
+    IndicatorDAO objects of the process and bounded by the total size of cached arrays.
+    Keys start with indicator_id. A DAO write to an indicator drops its entries and bumps
+    its generation, so a read that raced the write is not stored. Writes made outside
+    the DAO (other processes, raw SQL) are not tracked: call clear() after them.
+    """
+    def __init__(self, max_bytes=SERIES_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'invalidations': 0}
+        self._entries = OrderedDict()
+        self._generations = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def generation(self, indicator_id):
+        """
+        Take before reading from the database and pass to put().
+        """
+        with self._lock:
+            return self._generations.get(indicator_id, 0)
+
+    def get(self, key):
+        with self._lock:
+            arrays = self._entries.get(key)
+            if arrays is None:
+                self.stats['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats['hits'] += 1
+            return arrays
+
+    def put(self, key, arrays, generation):
+        """
+        Stores arrays (made read-only) unless the indicator was written since generation.
+        """
+        size = sum(a.nbytes for a in arrays)
+        with self._lock:
+            if size > self.max_bytes or self._generations.get(key[0], 0) != generation:
+                return
+            for a in arrays:
+                a.flags.writeable = False
+            self._drop(key)
+            self._entries[key] = arrays
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+                self.stats['evictions'] += 1
+
+    def invalidate(self, indicator_id):
+        with self._lock:
+            self._generations[indicator_id] = self._generations.get(indicator_id, 0) + 1
+            for key in [k for k in self._entries if k[0] == indicator_id]:
+                self._drop(key)
+            self.stats['invalidations'] += 1
+
+    def clear(self):
+        with self._lock:
+            for indicator_id in {k[0] for k in self._entries}:
+                self._generations[indicator_id] = self._generations.get(indicator_id, 0) + 1
+            self._entries.clear()
+            self._bytes = 0
+
+    def snapshot(self) -> dict:
+        """
+        Counters plus current entries and bytes; hit_rate over all lookups.
+        """
+        with self._lock:
+            snapshot = dict(self.stats, entries=len(self._entries), bytes=self._bytes)
+        lookups = snapshot['hits'] + snapshot['misses']
+        snapshot['hit_rate'] = snapshot['hits'] / lookups if lookups else 0.0
+        return snapshot
+
+    def _drop(self, key):
+        arrays = self._entries.pop(key, None)
+        if arrays is not None:
+            self._bytes -= sum(a.nbytes for a in arrays)
+
+def get_series_cache(db_path=None):
+    """
+    Process-wide series cache for db_path (default: DB_PATH).
+    """
+    key = str(Path(db_path or DB_PATH).resolve())
+    with _caches_lock:
+        if key not in _caches:
+            _caches[key] = SeriesCache()
+        return _caches[key]
+
+def _warn_no_snapshot(snapshot_dir, error):
+    global _snapshot_warned
+    if not _snapshot_warned:
+        _snapshot_warned = True
+        print(f"⚠️ Parquet-снимок {snapshot_dir} не используется, ряды читаются из SQLite. {error}")
+
 class IndicatorDAO:
-    def __init__(self):
+    def __init__(self, concurrent=None, cache=True, snapshot_dir=None, snapshot_max_age=SNAPSHOT_MAX_AGE):
+        """
+        concurrent=True (default: CONCURRENT_WRITES): WAL mode, and all writes go through
+        the process-wide SQLiteWriter with group commits; reads use this connection.
+        cache=False reads series past the process-wide SeriesCache (writes still invalidate it).
+        snapshot_dir (default: SNAPSHOT_DIR): Parquet snapshot written by parquet_store.export_parquet;
+        reads of all categories of an indicator are served from it (memory-mapped, needs pyarrow)
+        while its export is younger than snapshot_max_age seconds and nothing was written to it since.
+        Without pyarrow the snapshot is skipped with a warning and all reads go to SQLite.
+        """
+        snapshot_dir = snapshot_dir or SNAPSHOT_DIR
+        self._snapshot = None
+        if snapshot_dir:
+            try:
+                from parquet_store import ParquetSnapshot
+                self._snapshot = ParquetSnapshot(snapshot_dir, snapshot_max_age)
+            except ImportError as e:
+                # pyarrow — необязательная зависимость (requirements-parquet.txt): без него читаем из SQLite
+                _warn_no_snapshot(snapshot_dir, e)
+        if concurrent is None:
+            concurrent = CONCURRENT_WRITES
         try:
-            self.conn = sqlite3.connect(DB_PATH)
+            self.conn = open_connection(DB_PATH, wal=concurrent)
+            version = get_schema_version(self.conn)
+            if version < SCHEMA_VERSION:
+                # Миграции перестраивают таблицы — только явным запуском database_setup.py,
+                # а не из коллектора или потока оркестратора при открытых соединениях
+                self.conn.close()
+                self.conn = None
+                raise RuntimeError(f"Схема БД {DB_PATH} устарела (версия {version}, нужна {SCHEMA_VERSION}): "
+                                   f"выполните python database_setup.py")
             self.conn.row_factory = sqlite3.Row
             self.cursor = self.conn.cursor()
+            self._writer = get_writer(DB_PATH) if concurrent else None
+            self._cache = get_series_cache(DB_PATH)
+            self._cache_reads = cache
         except sqlite3.Error as e:
             print(f"Ошибка подключения к БД: {e}")
             self.conn = None
 
+    def _write(self, job, indicator_id=None):
+        """
+        Runs job(conn) in a write transaction: through the shared writer in concurrent
+        mode, otherwise on this connection under the process-wide lock.
+        indicator_id: cached series of this indicator are invalidated after the write.
+        """
+        try:
+            if self._writer is not None:
+                return self._writer.submit(job)
+            with _write_lock:
+                try:
+                    result = job(self.conn)
+                    self.conn.commit()
+                    return result
+                except Exception:
+                    self.conn.rollback()
+                    raise
+        finally:
+            if indicator_id is not None:
+                self._cache.invalidate(indicator_id)
+
+    def cache_stats(self) -> dict:
+        """
+        Hit/miss counters of the series cache (see SeriesCache.snapshot).
+        """
+        return self._cache.snapshot()
+
+    def clear_cache(self):
+        """
+        Drops cached series, e.g. after writes made outside the DAO.
+        """
+        self._cache.clear()
+
     def add_indicator(self, name, full_name, source, description):
         sql = "INSERT INTO indicators (name, full_name, source, description) VALUES (?, ?, ?, ?)"
+
+        def job(conn):
+            cursor = conn.cursor()
+            try:
+                cursor.execute(sql, (name, full_name, source, description))
+                return cursor.lastrowid
+            except sqlite3.IntegrityError:
+                id_sql = "SELECT id FROM indicators WHERE name = ?"
+                cursor.execute(id_sql, (name,))
+                result = cursor.fetchone()
+                return result[0] if result else None
+
         try:
-            self.cursor.execute(sql, (name, full_name, source, description))
-            self.conn.commit()
-            return self.cursor.lastrowid
-        except sqlite3.IntegrityError:
-            id_sql = "SELECT id FROM indicators WHERE name = ?"
-            self.cursor.execute(id_sql, (name,))
-            result = self.cursor.fetchone()
-            return result[0] if result else None
+            return self._write(job)
         except sqlite3.Error as e:
             print(f"Ошибка при добавлении индикатора: {e}")
             return None
 
+    def get_write_signature(self, indicator_id) -> int:
+        """
+        Write counter of the indicator from its watermarks: grows with every insert,
+        update or delete of its values; fetches without new data (mark_fetched) keep it.
+        """
+        return self.conn.execute("SELECT COALESCE(SUM(write_count), 0) FROM indicator_watermarks "
+                                 "WHERE indicator_id = ?", (indicator_id,)).fetchone()[0]
+
+    def get_indicator_id(self, name) -> int | None:
+        """
+        Id of a registered indicator without registering it.
+        """
+        row = self.conn.execute("SELECT id FROM indicators WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else None
+
     def add_indicator_value(self, indicator_id, date, value, category=''):
-        created_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        created_time = int(datetime.now().timestamp())
+        day = self._day(date)
         sql = "INSERT OR IGNORE INTO indicator_values (indicator_id, date, category, value, created_at) VALUES (?, ?, ?, ?, ?)"
+
+        def job(conn):
+            self._sync_wide_values(conn, indicator_id, [category])
+            conn.execute(sql, (indicator_id, day, category, value, created_time))
+            self._record_vintages(conn, indicator_id, day, day)
+
         try:
-            self.cursor.execute(sql, (indicator_id, date, category, value, created_time))
-            self.conn.commit()
+            self._write(job, indicator_id)
         except sqlite3.Error as e:
             print(f"Ошибка при добавлении значения в БД: {e}")
 
+    def add_indicator_values_bulk(self, indicator_id, df, category_col=None, date_col='date',
+                                  value_col='value', update=False, chunk_size=BULK_CHUNK_SIZE):
+        """
+        Bulk write of a DataFrame in one transaction (executemany, chunked).
+        Dates may be datetime64 or 'YYYY-MM-DD' strings; without category_col category is ''.
+        update=True overwrites existing values that differ instead of ignoring them.
+        Returns dict with 'inserted', 'ignored' and 'updated' counts.
+        """
+        stats = {'inserted': 0, 'ignored': 0, 'updated': 0}
+        frame = self._normalize_values_frame(df, category_col, date_col, value_col)
+        if frame.empty:
+            return stats
+        total = len(frame)
+
+        # Счётчики — из rowcount executemany, без COUNT(*) по всем строкам индикатора:
+        # INSERT OR IGNORE считает вставленные строки, следующий upsert (все ключи уже есть) —
+        # изменённые значения
+        start_day, end_day = int(frame['date'].min()), int(frame['date'].max())
+
+        def job(conn):
+            self._sync_wide_values(conn, indicator_id, frame['category'].unique())
+            with self._range_watermarks(conn, indicator_id, total, start_day, end_day):
+                inserted = self._executemany_values(conn, indicator_id, frame, INSERT_IGNORE_VALUE_SQL, chunk_size)
+                updated = self._executemany_values(conn, indicator_id, frame, UPSERT_VALUE_SQL, chunk_size) \
+                    if update and inserted < total else 0
+            self._record_vintages(conn, indicator_id, start_day, end_day)
+            return inserted, updated
+
+        try:
+            stats['inserted'], stats['updated'] = self._write(job, indicator_id)
+        except sqlite3.Error as e:
+            print(f"Ошибка при массовой записи значений в БД: {e}")
+            raise
+
+        stats['ignored'] = total - stats['inserted'] - stats['updated']
+        return stats
+
+    def replace_indicator_values(self, indicator_id, df, category_col=None, date_col='date',
+                                 value_col='value', chunk_size=BULK_CHUNK_SIZE):
+        """
+        Overwrite: deletes every stored value of the indicator and writes df
+        in the same transaction. Returns dict with 'deleted' and 'inserted' counts.
+        """
+        frame = self._normalize_values_frame(df, category_col, date_col, value_col)
+
+        def job(conn):
+            self._sync_wide_values(conn, indicator_id, frame['category'].unique())
+            # Перезапись затрагивает весь ряд — водяные знаки всегда по диапазону
+            with self._range_watermarks(conn, indicator_id):
+                deleted = conn.execute("DELETE FROM indicator_values WHERE indicator_id = ?",
+                                       (indicator_id,)).rowcount
+                inserted = self._executemany_values(conn, indicator_id, frame, INSERT_IGNORE_VALUE_SQL, chunk_size)
+            self._record_vintages(conn, indicator_id)
+            return {'deleted': deleted, 'inserted': inserted}
+
+        try:
+            return self._write(job, indicator_id)
+        except sqlite3.Error as e:
+            print(f"Ошибка при перезаписи значений в БД: {e}")
+            raise
+
+    def sync_indicator_values(self, indicator_id, df, category_col=None, date_col='date', value_col='value',
+                              tolerance=0.0, dry_run=False, chunk_size=BULK_CHUNK_SIZE):
+        """
+        Makes the stored series equal to df with the minimal write set: stored rows are read once
+        and outer-merged with df in pandas; only new rows, changed values (|new - old| > tolerance)
+        and rows missing from df are written, in one transaction. dry_run=True only computes the diff.
+        Returns {'inserted', 'updated', 'deleted', 'unchanged', 'diff'}, where 'diff' is a DataFrame
+        [date ('YYYY-MM-DD'), category, old_value, new_value, action ('insert', 'update' or 'delete')].
+        """
+        frame = self._normalize_values_frame(df, category_col, date_col, value_col)
+        frame = frame.drop_duplicates(subset=['date', 'category'], keep='last').rename(columns={'value': 'new_value'})
+        existing = pd.read_sql_query(
+            "SELECT date, category, value AS old_value FROM indicator_values WHERE indicator_id = ?",
+            self.conn, params=(indicator_id,), dtype={'date': 'int64', 'old_value': 'float64'}
+        )
+        merged = frame.merge(existing, on=['date', 'category'], how='outer', indicator=True)
+        is_new = (merged['_merge'] == 'left_only').to_numpy()
+        is_gone = (merged['_merge'] == 'right_only').to_numpy()
+        is_changed = (merged['_merge'] == 'both').to_numpy() & \
+            ((merged['new_value'] - merged['old_value']).abs() > tolerance).to_numpy()
+
+        to_write = merged.loc[is_new | is_changed, ['date', 'category', 'new_value']].rename(
+            columns={'new_value': 'value'})
+        to_delete = merged.loc[is_gone, ['date', 'category']]
+        if not dry_run and (len(to_write) or len(to_delete)):
+            delete_rows = list(zip([indicator_id] * len(to_delete), to_delete['date'].tolist(),
+                                   to_delete['category'].tolist()))
+
+            touched = pd.concat([to_write['date'], to_delete['date']])
+
+            def job(conn):
+                self._sync_wide_values(conn, indicator_id, to_write['category'].unique())
+                with self._range_watermarks(conn, indicator_id, len(touched),
+                                            int(touched.min()), int(touched.max())):
+                    self._executemany_values(conn, indicator_id, to_write, UPSERT_VALUE_SQL, chunk_size)
+                    conn.executemany(DELETE_VALUE_SQL, delete_rows)
+                self._record_vintages(conn, indicator_id)
+
+            try:
+                self._write(job, indicator_id)
+            except sqlite3.Error as e:
+                print(f"Ошибка при синхронизации значений с БД: {e}")
+                raise
+
+        changed = is_new | is_changed | is_gone
+        diff = merged.loc[changed, ['date', 'category', 'old_value', 'new_value']].copy()
+        diff['action'] = np.select([is_new[changed], is_changed[changed]], ['insert', 'update'], 'delete')
+        diff = diff.sort_values(['date', 'category'], ignore_index=True)
+        diff['date'] = self._days_to_str(diff['date'])
+        return {
+            'inserted': int(is_new.sum()),
+            'updated': int(is_changed.sum()),
+            'deleted': int(is_gone.sum()),
+            'unchanged': len(merged) - int(changed.sum()),
+            'diff': diff,
+        }
+
+    def upsert_indicator_values(self, indicator_id, df, category_col=None, date_col='date',
+                                value_col='value', tolerance=0.0, as_of=None, chunk_size=BULK_CHUNK_SIZE):
+        """
+        Revision-aware write: existing values for the incoming date range are read once,
+        diffed against df in pandas, and only new rows and real revisions
+        (|new - old| > tolerance) are written in one transaction.
+        Written values are also stored as vintages known on as_of (default: today).
+        Returns {'inserted', 'updated', 'unchanged', 'revisions'}, where 'revisions'
+        is a DataFrame [date ('YYYY-MM-DD'), category, old_value, new_value, change].
+        """
+        report = {'inserted': 0, 'updated': 0, 'unchanged': 0,
+                  'revisions': pd.DataFrame(columns=['date', 'category', 'old_value', 'new_value', 'change'])}
+        frame = self._normalize_values_frame(df, category_col, date_col, value_col)
+        frame = frame.drop_duplicates(subset=['date', 'category'], keep='last')
+        if frame.empty:
+            return report
+
+        existing = pd.read_sql_query(
+            "SELECT date, category, value AS old_value FROM indicator_values "
+            "WHERE indicator_id = ? AND date BETWEEN ? AND ?",
+            self.conn, params=(indicator_id, int(frame['date'].min()), int(frame['date'].max())),
+            dtype={'date': 'int64', 'old_value': 'float64'}
+        )
+        merged = frame.merge(existing, on=['date', 'category'], how='left')
+        is_new = merged['old_value'].isna()
+        is_revised = ~is_new & ((merged['value'] - merged['old_value']).abs() > tolerance)
+
+        to_write = merged.loc[is_new | is_revised, ['date', 'category', 'value']]
+        if not to_write.empty:
+            as_of = self._as_of_day(as_of)
+            vintage_rows = list(zip([indicator_id] * len(to_write), to_write['category'].tolist(),
+                                    to_write['date'].tolist(), [as_of] * len(to_write),
+                                    to_write['value'].tolist()))
+
+            def job(conn):
+                self._seed_vintages(conn, indicator_id)
+                self._sync_wide_values(conn, indicator_id, to_write['category'].unique())
+                with self._range_watermarks(conn, indicator_id, len(to_write),
+                                            int(to_write['date'].min()), int(to_write['date'].max())):
+                    self._executemany_values(conn, indicator_id, to_write, UPSERT_VALUE_SQL, chunk_size)
+                conn.executemany(INSERT_VINTAGE_SQL, vintage_rows)
+
+            try:
+                self._write(job, indicator_id)
+            except sqlite3.Error as e:
+                print(f"Ошибка при записи ревизий в БД: {e}")
+                raise
+
+        revisions = merged.loc[is_revised, ['date', 'category', 'old_value', 'value']]
+        revisions = revisions.rename(columns={'value': 'new_value'}).reset_index(drop=True)
+        revisions['date'] = self._days_to_str(revisions['date'])
+        revisions['change'] = revisions['new_value'] - revisions['old_value']
+
+        report['inserted'] = int(is_new.sum())
+        report['updated'] = int(is_revised.sum())
+        report['unchanged'] = len(merged) - report['inserted'] - report['updated']
+        report['revisions'] = revisions
+        return report
+
+    def get_values_as_of(self, indicator_id, as_of, category=None):
+        """
+        Point-in-time series: for every (date, category) the latest vintage known on as_of.
+        Walks the vintages primary key, no full-history scan in pandas. Read-only: an indicator
+        without vintages yet is read from indicator_values, each value known from the day
+        it was written (the same vintages its first upsert will seed).
+        Returns DataFrame [date, category, value, as_of].
+        """
+        params = [indicator_id, self._as_of_day(as_of)]
+        tracked = self.conn.execute("SELECT 1 FROM indicator_value_vintages WHERE indicator_id = ? LIMIT 1",
+                                    (indicator_id,)).fetchone()
+        if tracked:
+            query = """
+            SELECT date, category, value, MAX(as_of) AS as_of
+            FROM indicator_value_vintages
+            WHERE indicator_id = ? AND as_of <= ?
+            """
+        else:
+            query = f"""
+            SELECT date, category, value, {CREATED_DAY_SQL} AS as_of
+            FROM indicator_values
+            WHERE indicator_id = ? AND {CREATED_DAY_SQL} <= ?
+            """
+        if category is not None:
+            query += " AND category = ?"
+            params.append(category)
+        query += " GROUP BY category, date ORDER BY date, category" if tracked else " ORDER BY date, category"
+
+        df = pd.read_sql_query(query, self.conn, params=params)
+        df['date'] = pd.to_datetime(df['date'], unit='D')
+        df['as_of'] = self._days_to_str(df['as_of'])
+        return df
+
+    @staticmethod
+    @contextmanager
+    def _range_watermarks(conn, indicator_id, rows=None, start_day=MIN_DAY, end_day=MAX_DAY):
+        """
+        Inside a write job, around writes of `rows` values of the indicator dated within
+        [start_day, end_day] (rows=None: always). Below WATERMARK_BULK_ROWS the per-row triggers
+        keep the watermarks; otherwise the triggers are dropped inside the job's transaction
+        (other connections keep them) and the watermarks get one range update before and one
+        aggregate upsert after the writes, then the triggers are recreated.
+        """
+        if rows is not None and rows < WATERMARK_BULK_ROWS:
+            yield
+            return
+        if not conn.in_transaction:
+            conn.execute("BEGIN IMMEDIATE")
+        for name in WATERMARK_TRIGGER_NAMES:
+            conn.execute(f"DROP TRIGGER IF EXISTS {name}")
+        conn.execute(WATERMARK_RANGE_SUBTRACT_SQL, (start_day, end_day, indicator_id))
+        changes = conn.total_changes
+        yield
+        written = conn.total_changes != changes
+        conn.execute(WATERMARK_RANGE_ADD_SQL, (written, indicator_id, start_day, end_day))
+        conn.execute(WATERMARK_LAST_DATE_SQL, (written, indicator_id))
+        for sql in WATERMARK_TRIGGERS_SQL:
+            conn.execute(sql)
+
+    @staticmethod
+    def _seed_vintages(conn, indicator_id):
+        """
+        Inside a write job, before the values change: an indicator without vintages yet
+        gets them seeded from indicator_values (as_of = day the row was written).
+        """
+        seeded = conn.execute("SELECT 1 FROM indicator_value_vintages WHERE indicator_id = ? LIMIT 1",
+                              (indicator_id,)).fetchone()
+        if seeded is None:
+            conn.execute(SEED_VINTAGES_SQL, (indicator_id,))
+
+    @classmethod
+    def _record_vintages(cls, conn, indicator_id, start_day=None, end_day=None):
+        """
+        Inside a write job: if the indicator already has vintages, stores every value in
+        [start_day, end_day] that differs from its latest vintage as a vintage known today,
+        so bulk/replace/sync writes stay visible to get_values_as_of. Deleted rows keep their
+        vintages (they were known then). Indicators without vintages are seeded by their first upsert.
+        """
+        tracked = conn.execute("SELECT 1 FROM indicator_value_vintages WHERE indicator_id = ? LIMIT 1",
+                               (indicator_id,)).fetchone()
+        if tracked is None:
+            return
+        conn.execute(RECORD_VINTAGES_SQL, (cls._as_of_day(None), indicator_id,
+                                           MIN_DAY if start_day is None else start_day,
+                                           MAX_DAY if end_day is None else end_day))
+
+    @classmethod
+    def _as_of_day(cls, as_of):
+        return cls._day(datetime.now() if as_of is None else as_of)
+
+    @staticmethod
+    def _to_days(dates):
+        """
+        datetime64 values or 'YYYY-MM-DD' strings -> int64 array of days since 1970-01-01.
+        """
+        return pd.to_datetime(pd.Index(dates)).to_numpy().astype('datetime64[D]').astype(np.int64)
+
+    @classmethod
+    def _day(cls, value, default=None):
+        """
+        Single date -> day number (int for SQLite parameters); None -> default.
+        """
+        return default if value is None else int(cls._to_days([value])[0])
+
+    @staticmethod
+    def _days_to_str(days):
+        """
+        Day numbers -> 'YYYY-MM-DD' strings (array).
+        """
+        return np.asarray(days, dtype=np.int64).astype('datetime64[D]').astype(str)
+
+    @classmethod
+    def _normalize_values_frame(cls, df, category_col, date_col, value_col):
+        """
+        DataFrame [date (int64 day number), category, value (float)] without NaN values.
+        """
+        if df is None or df.empty:
+            return pd.DataFrame(columns=['date', 'category', 'value'])
+        frame = df.dropna(subset=[value_col])
+        return pd.DataFrame({
+            'date': cls._to_days(frame[date_col]),
+            'category': frame[category_col].astype(str).to_numpy() if category_col else '',
+            'value': frame[value_col].astype(float).to_numpy(),
+        })
+
+    @staticmethod
+    def _executemany_values(conn, indicator_id, frame, sql, chunk_size):
+        """
+        Chunked executemany of frame rows on conn without commit; returns total rowcount.
+        """
+        created_time = int(datetime.now().timestamp())
+        dates = frame['date'].to_numpy()
+        categories = frame['category'].to_numpy()
+        values = frame['value'].to_numpy()
+        changed = 0
+        for start in range(0, len(frame), chunk_size):
+            stop = min(start + chunk_size, len(frame))
+            rows = zip(
+                [indicator_id] * (stop - start),
+                dates[start:stop].tolist(),
+                categories[start:stop].tolist(),
+                values[start:stop].tolist(),
+                [created_time] * (stop - start),
+            )
+            changed += conn.executemany(sql, rows).rowcount
+        return changed
+
+    def add_daily_curve(self, indicator_id, wide_df):
+        """
+        Stores full daily curves: wide_df is indexed by date with one column per maturity.
+        One row per date in the indicator's wide table; new maturities become new columns.
+        Existing dates are updated, NaN never overwrites a stored value.
+        Returns {'inserted', 'updated'}.
+        """
+        stats = {'inserted': 0, 'updated': 0}
+        frame = wide_df.dropna(how='all')
+        if frame.empty:
+            return stats
+        columns = [str(c) for c in frame.columns]
+        dates = self._to_days(frame.index).tolist()
+        values = frame.to_numpy(dtype=float)
+        rows = [[date] + [None if np.isnan(v) else v for v in row] for date, row in zip(dates, values.tolist())]
+
+        def job(conn):
+            table = self._ensure_wide_table(conn, indicator_id, 'daily_curve', columns)
+            quoted = [self._quote(c) for c in columns]
+            sql = (f"INSERT INTO {table} (date, {', '.join(quoted)}) VALUES ({', '.join('?' * (len(columns) + 1))}) "
+                   f"ON CONFLICT(date) DO UPDATE SET "
+                   + ", ".join(f"{q} = COALESCE(excluded.{q}, {table}.{q})" for q in quoted))
+            # Новые даты считает INSERT OR IGNORE ключей, затем upsert заполняет столбцы
+            inserted = conn.executemany(f"INSERT OR IGNORE INTO {table} (date) VALUES (?)",
+                                        [(date,) for date in dates]).rowcount
+            conn.executemany(sql, rows)
+            return inserted
+
+        try:
+            stats['inserted'] = self._write(job)
+        except sqlite3.Error as e:
+            print(f"Ошибка при записи дневных кривых в БД: {e}")
+            raise
+        stats['updated'] = len(rows) - stats['inserted']
+        return stats
+
+    def get_daily_curve(self, indicator_id, start=None, end=None, freq='daily'):
+        """
+        Daily curves as a DataFrame indexed by date, one column per maturity.
+        freq: 'daily' — every stored date; 'friday' — Fridays (months without
+        a Friday: last date, as in treasury_parser); 'week' — last observation of
+        each week ending Friday; 'month' — last observation of each month.
+        """
+        if freq not in CURVE_FREQUENCIES:
+            raise ValueError(f"freq must be one of {CURVE_FREQUENCIES}, got {freq!r}")
+        table = self._wide_table_name(indicator_id, 'daily_curve')
+        if table is None:
+            return pd.DataFrame()
+        query = f"SELECT * FROM {table} WHERE date BETWEEN ? AND ? ORDER BY date"
+        params = (self._day(start, MIN_DAY), self._day(end, MAX_DAY))
+        df = pd.read_sql_query(query, self.conn, params=params)
+        df['date'] = pd.to_datetime(df['date'], unit='D')
+        df = df.set_index('date')
+        if df.empty or freq == 'daily':
+            return df
+        return df[self._resample_mask(df.index.to_numpy(), freq)]
+
+    def enable_wide_storage(self, indicator_id):
+        """
+        Optional wide copy of the indicator's values (table values_<id>): one row per date,
+        one REAL column per category. Backfilled from indicator_values and then kept in sync
+        by triggers, so raw SQL importers and deletions are reflected too. Idempotent.
+        """
+        def job(conn):
+            categories = [row[0] for row in conn.execute(
+                "SELECT DISTINCT category FROM indicator_values WHERE indicator_id = ?", (indicator_id,))]
+            self._sync_wide_values(conn, indicator_id, categories, create=True)
+
+        self._write(job)
+
+    def get_indicator_values_wide(self, indicator_id, start=None, end=None):
+        """
+        Values pivoted to one row per date and one column per category (indexed by date).
+        Read straight from the wide table when enabled, otherwise pivoted from long rows.
+        """
+        params = (self._day(start, MIN_DAY), self._day(end, MAX_DAY))
+        table = self._wide_table_name(indicator_id, 'values')
+        if table is not None:
+            df = pd.read_sql_query(f"SELECT * FROM {table} WHERE date BETWEEN ? AND ? ORDER BY date",
+                                   self.conn, params=params).set_index('date')
+        else:
+            long_df = pd.read_sql_query(
+                "SELECT date, category, value FROM indicator_values "
+                "WHERE indicator_id = ? AND date BETWEEN ? AND ?",
+                self.conn, params=(indicator_id,) + params)
+            df = long_df.pivot(index='date', columns='category', values='value')
+            df.columns.name = None
+        df.index = pd.to_datetime(df.index, unit='D')
+        return df
+
+    def get_latest_daily_curve_date(self, indicator_id) -> str | None:
+        table = self._wide_table_name(indicator_id, 'daily_curve')
+        if table is None:
+            return None
+        day = self.conn.execute(f"SELECT MAX(date) FROM {table}").fetchone()[0]
+        return None if day is None else str(np.datetime64(day, 'D'))
+
+    @staticmethod
+    def _resample_mask(dates, freq):
+        """
+        Boolean mask over sorted dates selecting rows for freq (see get_daily_curve).
+        """
+        days = dates.astype('datetime64[D]').astype(np.int64)
+        months = dates.astype('datetime64[M]').astype(np.int64)
+        last_in_month = np.r_[months[1:] != months[:-1], True]
+        if freq == 'month':
+            return last_in_month
+        if freq == 'week':
+            # 1970-01-01 — четверг: (day - 2) // 7 меняется по субботам, неделя кончается пятницей
+            weeks = (days - 2) // 7
+            return np.r_[weeks[1:] != weeks[:-1], True]
+        is_friday = (days + 3) % 7 == 4
+        month_has_friday = pd.Series(is_friday).groupby(months).transform('any').to_numpy()
+        return is_friday | (~month_has_friday & last_in_month)
+
+    def _wide_table_name(self, indicator_id, kind):
+        try:
+            row = self.conn.execute("SELECT table_name FROM wide_tables WHERE indicator_id = ? AND kind = ?",
+                                    (indicator_id, kind)).fetchone()
+        except sqlite3.OperationalError:
+            return None
+        return self._quote(row[0]) if row else None
+
+    @classmethod
+    def _ensure_wide_table(cls, conn, indicator_id, kind, columns):
+        """
+        Creates (and registers in wide_tables) the indicator's wide table and adds
+        missing REAL columns. Returns the quoted table name. Runs inside a write job.
+        """
+        table_name = f"{kind}_{indicator_id}"
+        table = cls._quote(table_name)
+        conn.execute(WIDE_TABLES_SQL)
+        conn.execute(f"CREATE TABLE IF NOT EXISTS {table} (date INTEGER PRIMARY KEY) WITHOUT ROWID")
+        conn.execute("INSERT OR IGNORE INTO wide_tables (table_name, indicator_id, kind) VALUES (?, ?, ?)",
+                     (table_name, indicator_id, kind))
+        existing = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+        for column in columns:
+            if column not in existing:
+                conn.execute(f"ALTER TABLE {table} ADD COLUMN {cls._quote(column)} REAL")
+        return table
+
+    @classmethod
+    def _sync_wide_values(cls, conn, indicator_id, categories, create=False):
+        """
+        Adds columns for new categories to the indicator's wide values table, backfills
+        them from indicator_values and (re)creates the sync triggers. Without create=True
+        does nothing for indicators that have no wide table. Runs inside a write job.
+        """
+        if not create:
+            try:
+                registered = conn.execute("SELECT 1 FROM wide_tables WHERE indicator_id = ? AND kind = 'values'",
+                                          (indicator_id,)).fetchone()
+            except sqlite3.OperationalError:
+                return
+            if registered is None:
+                return
+        table_name = f"values_{indicator_id}"
+        table = cls._quote(table_name)
+        existing = [row[1] for row in conn.execute(f"PRAGMA table_info({table})") if row[1] != 'date']
+        categories = [str(c) for c in dict.fromkeys(categories)]
+        new = [c for c in categories if c not in existing]
+        cls._ensure_wide_table(conn, indicator_id, 'values', categories)
+        triggers = conn.execute("SELECT COUNT(*) FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'indicator_values' "
+                                "AND name IN (?, ?, ?)",
+                                [f"{table_name}_{suffix}" for suffix in ('ai', 'au', 'ad')]).fetchone()[0]
+        if not new and triggers == 3:
+            return
+
+        if new:
+            marks = ', '.join('?' * len(new))
+            conn.execute(f"INSERT INTO {table} (date) SELECT DISTINCT date FROM indicator_values "
+                         f"WHERE indicator_id = ? AND category IN ({marks}) ON CONFLICT(date) DO NOTHING",
+                         [indicator_id] + new)
+            for category in new:
+                conn.execute(f"UPDATE {table} SET {cls._quote(category)} = (SELECT value FROM indicator_values v "
+                             f"WHERE v.indicator_id = ? AND v.category = ? AND v.date = {table}.date)",
+                             (indicator_id, category))
+        columns = existing + new
+        if columns:
+            cls._create_wide_triggers(conn, indicator_id, table_name, columns)
+
+    @classmethod
+    def _create_wide_triggers(cls, conn, indicator_id, table_name, columns):
+        """
+        AFTER INSERT/UPDATE/DELETE triggers on indicator_values for one indicator that
+        mirror each change into its wide table (an emptied date row is removed).
+        """
+        table = cls._quote(table_name)
+        quoted = [cls._quote(c) for c in columns]
+        literals = ["'" + c.replace("'", "''") + "'" for c in columns]
+
+        def set_clause(row, value):
+            return ", ".join(f"{q} = CASE {row}.category WHEN {lit} THEN {value} ELSE {q} END"
+                             for q, lit in zip(quoted, literals))
+
+        all_null = " AND ".join(f"{q} IS NULL" for q in quoted)
+        clear_old = (f"UPDATE {table} SET {set_clause('OLD', 'NULL')} WHERE date = OLD.date; "
+                     f"DELETE FROM {table} WHERE date = OLD.date AND {all_null}; ")
+        put_new = (f"INSERT INTO {table} (date) VALUES (NEW.date) ON CONFLICT(date) DO NOTHING; "
+                   f"UPDATE {table} SET {set_clause('NEW', 'NEW.value')} WHERE date = NEW.date; ")
+        for suffix, event, row, body in (('ai', 'INSERT', 'NEW', put_new),
+                                         ('au', 'UPDATE OF date, category, value', 'NEW', clear_old + put_new),
+                                         ('ad', 'DELETE', 'OLD', clear_old)):
+            name = cls._quote(f"{table_name}_{suffix}")
+            conn.execute(f"DROP TRIGGER IF EXISTS {name}")
+            conn.execute(f"CREATE TRIGGER {name} AFTER {event} ON indicator_values "
+                         f"WHEN {row}.indicator_id = {int(indicator_id)} BEGIN {body}END")
+
+    @staticmethod
+    def _quote(identifier):
+        return '"' + str(identifier).replace('"', '""') + '"'
+
     def add_indicator_release(self, indicator_id, date, release_data, source_url, category=None):
         """
         Add indicator release with duplicate protection
@@ -57,53 +1023,176 @@ class IndicatorDAO:
 
         sql = "INSERT OR IGNORE INTO indicator_releases (indicator_id, date, category, release_data, source_url, created_at) VALUES (?, ?, ?, ?, ?, ?)"
 
+        def job(conn):
+            return conn.execute(sql, (indicator_id, date, category, release_data_json, source_url, created_time)).rowcount > 0
+
         try:
-            self.cursor.execute(sql, (indicator_id, date, category, release_data_json, source_url, created_time))
-            if self.cursor.rowcount > 0:
-                self.conn.commit()
-                return True
-            else:
-                return False
+            return self._write(job)
         except sqlite3.Error as e:
             print(f"Error inserting release: {e}")
             raise
 
+    def add_indicator_releases_bulk(self, indicator_id, df, replace=False):
+        """
+        Writes release rows [date, category, release_data (JSON text), source_url, created_at]
+        as they are, in one transaction; a (date, category) already stored is skipped.
+        replace=True deletes the indicator's releases first. Returns the number of rows written.
+        """
+        rows = [(indicator_id, date, category, release_data, source_url, created_at, indicator_id, date, category)
+                for date, category, release_data, source_url, created_at in
+                df[['date', 'category', 'release_data', 'source_url', 'created_at']].itertuples(index=False)]
+
+        def job(conn):
+            if replace:
+                conn.execute("DELETE FROM indicator_releases WHERE indicator_id = ?", (indicator_id,))
+            return conn.executemany(INSERT_RELEASE_SQL, rows).rowcount
+
+        try:
+            return self._write(job)
+        except sqlite3.Error as e:
+            print(f"Error inserting releases: {e}")
+            raise
+
     def get_latest_indicator_date(self, indicator_id: int) -> str | None:
-        query = "SELECT MAX(date) FROM indicator_values WHERE indicator_id = ?"
+        query = "SELECT MAX(last_date) FROM indicator_watermarks WHERE indicator_id = ?"
         self.cursor.execute(query, (indicator_id,))
         result = self.cursor.fetchone()
-        return result[0] if result and result[0] else None
+        return str(np.datetime64(result[0], 'D')) if result and result[0] is not None else None
 
-    def get_indicator_values_by_category(self, indicator_id, category=''):
+    def existing_keys(self, indicator_id, dates, categories) -> set:
         """
-        Get indicator values filtered by category
-        Returns pandas DataFrame
+        Which (date, category) pairs of dates x categories are already stored, answered
+        for the whole batch by one query on the (indicator_id, category, date) index.
+        Returns a set of ('YYYY-MM-DD', category).
         """
-        query = """
-        SELECT date, value, category 
-        FROM indicator_values 
-        WHERE indicator_id = ? AND category = ?
-        ORDER BY date DESC
+        days = np.unique(self._to_days(list(dates)))
+        categories = [str(c) for c in dict.fromkeys(categories)]
+        if not len(days) or not categories:
+            return set()
+        rows = self.conn.execute(
+            "SELECT date, category FROM indicator_values WHERE indicator_id = ? "
+            "AND category IN (SELECT value FROM json_each(?)) AND date IN (SELECT value FROM json_each(?))",
+            (indicator_id, json.dumps(categories), json.dumps(days.tolist()))).fetchall()
+        return {(str(np.datetime64(day, 'D')), category) for day, category in rows}
+
+    def get_watermarks(self, indicator_id) -> dict:
+        """
+        Per-category watermarks from indicator_watermarks (kept by triggers on write):
+        {category: {'last_date': 'YYYY-MM-DD' or None, 'last_fetch': datetime or None, 'row_count': int}}.
         """
+        rows = self.conn.execute("SELECT category, last_date, last_fetch, row_count FROM indicator_watermarks "
+                                 "WHERE indicator_id = ?", (indicator_id,)).fetchall()
+        return {row[0]: self._watermark(row) for row in rows}
 
-        df = pd.read_sql_query(query, self.conn, params=(indicator_id, category))
-        if not df.empty:
-            df['date'] = pd.to_datetime(df['date'])
-            df.set_index('date', inplace=True)
+    def get_watermark(self, indicator_id, category='') -> dict | None:
+        """
+        One series' watermark (primary-key lookup), None if the series was never written.
+        """
+        row = self.conn.execute("SELECT category, last_date, last_fetch, row_count FROM indicator_watermarks "
+                                "WHERE indicator_id = ? AND category = ?", (indicator_id, category)).fetchone()
+        return self._watermark(row) if row else None
 
-        return df
+    def mark_fetched(self, indicator_id, categories=('',)):
+        """
+        Records a fetch of the given series even if it brought no new rows.
+        """
+        fetched_at = int(datetime.now().timestamp())
+        sql = ("INSERT INTO indicator_watermarks (indicator_id, category, last_fetch) VALUES (?, ?, ?) "
+               "ON CONFLICT(indicator_id, category) DO UPDATE SET last_fetch = excluded.last_fetch")
+        rows = [(indicator_id, str(category), fetched_at) for category in categories]
+        self._write(lambda conn: conn.executemany(sql, rows))
+
+    @staticmethod
+    def _watermark(row):
+        _, last_date, last_fetch, row_count = row
+        return {
+            'last_date': None if last_date is None else str(np.datetime64(last_date, 'D')),
+            'last_fetch': None if last_fetch is None else datetime.fromtimestamp(last_fetch),
+            'row_count': row_count,
+        }
+
+    def get_indicator_values_by_category(self, indicator_id, category='', start=None, end=None):
+        """
+        Get indicator values filtered by category (optionally within [start, end])
+        Returns pandas DataFrame indexed by date (newest first)
+        """
+        dates, values = self.get_series_arrays(indicator_id, category, descending=True, start=start, end=end)
+        index = pd.DatetimeIndex(dates.astype('datetime64[ns]'), name='date')
+        return pd.DataFrame({'value': values, 'category': category}, index=index)
+
+    def get_series_arrays(self, indicator_id, category=None, descending=False, start=None, end=None):
+        """
+        Fast read path: (dates datetime64[D], values float64) fetched from the cursor
+        straight into preallocated arrays; stored day numbers are viewed as dates, no parsing.
+        category=None reads all categories; start/end bound the dates (inclusive).
+        Results are memoized in the process-wide SeriesCache; arrays are read-only.
+        With a fresh Parquet snapshot (see __init__), category=None reads come from it instead of SQLite.
+        """
+        key = (indicator_id, category, self._day(start), self._day(end))
+        cached = self._cache.get(key) if self._cache_reads else None
+        if cached is None:
+            generation = self._cache.generation(indicator_id)
+            # Одна категория быстрее из покрывающего индекса SQLite, чем из файлов всех лет снимка
+            cached = self._read_snapshot(*key) if self._snapshot is not None and category is None else None
+            if cached is None:
+                cached = self._read_series(*key)
+            if self._cache_reads:
+                self._cache.put(key, cached, generation)
+        dates, values = cached
+        if descending:
+            return dates[::-1], values[::-1]
+        return dates, values
+
+    def _read_series(self, indicator_id, category, start_day, end_day):
+        where = "indicator_id = ?"
+        params = [indicator_id]
+        if category is not None:
+            where += " AND category = ?"
+            params.append(category)
+        if start_day is not None or end_day is not None:
+            where += " AND date BETWEEN ? AND ?"
+            params += [MIN_DAY if start_day is None else start_day, MAX_DAY if end_day is None else end_day]
+        # Без ORDER BY SQLite читает покрывающий индекс (indicator_id, category, date, value)
+        # без обращений к таблице; порядок по дате наводим устойчивой сортировкой в NumPy
+        records = self._fetch_records(
+            f"SELECT date, value FROM indicator_values WHERE {where}",
+            f"SELECT COUNT(*) FROM indicator_values WHERE {where}", params)
+        records = records[np.argsort(records['day'], kind='stable')]
+        return records['day'].view('datetime64[D]'), records['value']
+
+    def _read_snapshot(self, indicator_id, category, start_day, end_day):
+        """
+        Series from the Parquet snapshot, None if it has no fresh export of the indicator.
+        """
+        row = self.conn.execute("SELECT name FROM indicators WHERE id = ?", (indicator_id,)).fetchone()
+        if row is None or not self._snapshot.is_fresh(row[0], self.get_write_signature(indicator_id)):
+            return None
+        return self._snapshot.read_series(row[0], category, start_day, end_day)
+
+    def _fetch_records(self, sql, count_sql, params):
+        """
+        Rows of sql as a SERIES_DTYPE array of exactly COUNT(*) rows (one read snapshot).
+        """
+        cursor = self.conn.cursor()
+        cursor.row_factory = None
+        own_snapshot = not self.conn.in_transaction
+        if own_snapshot:
+            cursor.execute("BEGIN")
+        try:
+            count = cursor.execute(count_sql, params).fetchone()[0]
+            return np.fromiter(cursor.execute(sql, params), dtype=SERIES_DTYPE, count=count)
+        finally:
+            if own_snapshot:
+                self.conn.commit()
 
     def add_comment(self, indicator_id, date, comment_text):
         created_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         sql = "INSERT INTO comments (indicator_id, date, comment_text, created_at) VALUES (?, ?, ?, ?)"
-        self.cursor.execute(sql, (indicator_id, date, comment_text, created_time))
-        self.conn.commit()
+        self._write(lambda conn: conn.execute(sql, (indicator_id, date, comment_text, created_time)))
 
-    def get_indicator_values(self, indicator_id):
-        sql = "SELECT date, value FROM indicator_values WHERE indicator_id = ? ORDER BY date"
-        df = pd.read_sql_query(sql, self.conn, params=(indicator_id,))
-        df['date'] = pd.to_datetime(df['date'])
-        return df
+    def get_indicator_values(self, indicator_id, start=None, end=None):
+        dates, values = self.get_series_arrays(indicator_id, start=start, end=end)
+        return pd.DataFrame({'date': dates.astype('datetime64[ns]'), 'value': values})
 
     def close(self):
         if self.conn:
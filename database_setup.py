@@ -1,4 +1,5 @@
 # database_setup.py
+import argparse
 import sqlite3
 from pathlib import Path
 from dotenv import load_dotenv
@@ -12,76 +13,423 @@ DB_FILE = os.getenv("DB_FILE", "economic_indicators.db")
 DB_PATH = home_dir / DB_SUBDIR / DB_FILE
 DB_PATH.parent.mkdir(parents=True, exist_ok=True)
 
-def setup_database():
+# --- Схема ---
+INDICATORS_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS indicators (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL UNIQUE,
+    full_name TEXT,
+    source TEXT,
+    description TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+"""
+# Исходный формат indicator_values (текстовые даты); миграция 5 переводит таблицу
+# на целочисленные даты (VALUES_EPOCH_TABLE_SQL)
+VALUES_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS indicator_values (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    indicator_id INTEGER NOT NULL,
+    date TEXT NOT NULL,
+    category TEXT NOT NULL DEFAULT '',
+    value REAL NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (indicator_id) REFERENCES indicators (id),
+    UNIQUE(indicator_id, date, category)
+);
+"""
+# Даты — номер дня от 1970-01-01 (INTEGER), created_at — Unix-время в секундах:
+# ключи и индексы короче, сравнение дат — сравнение целых чисел
+VALUES_EPOCH_TABLE_SQL = """
+CREATE TABLE indicator_values (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    indicator_id INTEGER NOT NULL,
+    date INTEGER NOT NULL,
+    category TEXT NOT NULL DEFAULT '',
+    value REAL NOT NULL,
+    created_at INTEGER DEFAULT (CAST(strftime('%s', 'now') AS INTEGER)),
+    FOREIGN KEY (indicator_id) REFERENCES indicators (id),
+    UNIQUE(indicator_id, date, category)
+);
+"""
+# Вариант без rowid: строки хранятся прямо в B-дереве первичного ключа,
+# выборки по (indicator_id, date) не делают второго поиска. Столбца id нет.
+VALUES_WITHOUT_ROWID_SQL = """
+CREATE TABLE indicator_values_without_rowid (
+    indicator_id INTEGER NOT NULL,
+    date INTEGER NOT NULL,
+    category TEXT NOT NULL DEFAULT '',
+    value REAL NOT NULL,
+    created_at INTEGER DEFAULT (CAST(strftime('%s', 'now') AS INTEGER)),
+    PRIMARY KEY (indicator_id, date, category),
+    FOREIGN KEY (indicator_id) REFERENCES indicators (id)
+) WITHOUT ROWID;
+"""
+RELEASES_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS indicator_releases (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    indicator_id INTEGER NOT NULL,
+    date TEXT NOT NULL,
+    category TEXT,
+    release_data TEXT,
+    source_url TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (indicator_id) REFERENCES indicators (id)
+);
+"""
+COMMENTS_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS comments (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    indicator_id INTEGER NOT NULL,
+    date TEXT NOT NULL,
+    comment_text TEXT NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (indicator_id) REFERENCES indicators (id)
+);
+"""
+# Версии значений (vintages): что было известно о значении на дату as_of.
+# Первичный ключ покрывает выборку "последняя версия на as_of" по индексу.
+# date и as_of — номера дней от 1970-01-01, как в indicator_values.
+VINTAGES_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS indicator_value_vintages (
+    indicator_id INTEGER NOT NULL,
+    category TEXT NOT NULL DEFAULT '',
+    date INTEGER NOT NULL,
+    as_of INTEGER NOT NULL,
+    value REAL NOT NULL,
+    PRIMARY KEY (indicator_id, category, date, as_of),
+    FOREIGN KEY (indicator_id) REFERENCES indicators (id)
+) WITHOUT ROWID;
+"""
+# Каталог широких таблиц (одна строка на дату, один столбец на категорию),
+# которые DAO создаёт по требованию: kind 'daily_curve' — полные дневные кривые
+WIDE_TABLES_SQL = """
+CREATE TABLE IF NOT EXISTS wide_tables (
+    table_name TEXT PRIMARY KEY,
+    indicator_id INTEGER NOT NULL,
+    kind TEXT NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE (indicator_id, kind),
+    FOREIGN KEY (indicator_id) REFERENCES indicators (id)
+);
+"""
+# Покрывающий индекс для чтения по категории (get_indicator_values_by_category,
+# umcsi/ism): поиск и значение берутся из индекса без обращения к таблице
+VALUES_CATEGORY_INDEX_SQL = """
+CREATE INDEX IF NOT EXISTS idx_values_indicator_category_date
+ON indicator_values (indicator_id, category, date, value);
+"""
+# Водяные знаки рядов: последняя дата, время последней загрузки (Unix), число строк
+# и счётчик записей (миграция 7) по (индикатор, категория). Ведутся в той же транзакции, что и запись: триггерами
+# indicator_values (прямые SQL-импортёры, удаления) или запросами по диапазону в массовых заданиях DAO.
+WATERMARKS_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS indicator_watermarks (
+    indicator_id INTEGER NOT NULL,
+    category TEXT NOT NULL DEFAULT '',
+    last_date INTEGER,
+    last_fetch INTEGER,
+    row_count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (indicator_id, category),
+    FOREIGN KEY (indicator_id) REFERENCES indicators (id)
+) WITHOUT ROWID;
+"""
+# Триггеры миграции 6 (без счётчика записей) — не меняются, на них мигрируют старые БД
+_WATERMARK_ADD_V6_SQL = """
+INSERT INTO indicator_watermarks (indicator_id, category, last_date, last_fetch, row_count)
+VALUES (NEW.indicator_id, NEW.category, NEW.date, CAST(strftime('%s', 'now') AS INTEGER), 1)
+ON CONFLICT(indicator_id, category) DO UPDATE SET
+    last_date = MAX(COALESCE(last_date, excluded.last_date), excluded.last_date),
+    last_fetch = excluded.last_fetch, row_count = row_count + 1;
+"""
+# Удалили последнюю дату — новая берётся из покрывающего индекса (indicator_id, category, date)
+_WATERMARK_REMOVE_V6_SQL = """
+UPDATE indicator_watermarks SET row_count = row_count - 1,
+    last_date = CASE WHEN last_date = OLD.date THEN (
+        SELECT MAX(date) FROM indicator_values WHERE indicator_id = OLD.indicator_id AND category = OLD.category
+    ) ELSE last_date END
+WHERE indicator_id = OLD.indicator_id AND category = OLD.category;
+"""
+# Миграция 7: каждая вставка, изменение и удаление строки увеличивает write_count —
+# по нему снимки (parquet_store) узнают о любой записи, даже без изменения числа строк
+_WATERMARK_ADD_SQL = """
+INSERT INTO indicator_watermarks (indicator_id, category, last_date, last_fetch, row_count, write_count)
+VALUES (NEW.indicator_id, NEW.category, NEW.date, CAST(strftime('%s', 'now') AS INTEGER), 1, 1)
+ON CONFLICT(indicator_id, category) DO UPDATE SET
+    last_date = MAX(COALESCE(last_date, excluded.last_date), excluded.last_date),
+    last_fetch = excluded.last_fetch, row_count = row_count + 1, write_count = write_count + 1;
+"""
+_WATERMARK_REMOVE_SQL = """
+UPDATE indicator_watermarks SET row_count = row_count - 1, write_count = write_count + 1,
+    last_date = CASE WHEN last_date = OLD.date THEN (
+        SELECT MAX(date) FROM indicator_values WHERE indicator_id = OLD.indicator_id AND category = OLD.category
+    ) ELSE last_date END
+WHERE indicator_id = OLD.indicator_id AND category = OLD.category;
+"""
+
+def _watermark_triggers_sql(add_sql, remove_sql):
+    return [
+        f"CREATE TRIGGER IF NOT EXISTS indicator_watermarks_ai AFTER INSERT ON indicator_values BEGIN {add_sql} END;",
+        f"CREATE TRIGGER IF NOT EXISTS indicator_watermarks_ad AFTER DELETE ON indicator_values BEGIN {remove_sql} END;",
+        f"CREATE TRIGGER IF NOT EXISTS indicator_watermarks_au AFTER UPDATE ON indicator_values "
+        f"BEGIN {remove_sql} {add_sql} END;",
+    ]
+
+# Построчные триггеры примерно удваивают цену массовой вставки (1 млн строк: ~6 с без них,
+# ~12 с с ними, tests/bench_epoch_dates.py). Поэтому массовые задания DAO снимают их на время
+# своей транзакции и обновляют водяные знаки запросами по диапазону дат (WATERMARK_RANGE_*_SQL);
+# триггеры остаются для мелких записей и прямых SQL-импортёров.
+WATERMARK_TRIGGER_NAMES = ["indicator_watermarks_ai", "indicator_watermarks_ad", "indicator_watermarks_au"]
+WATERMARK_TRIGGERS_SQL = _watermark_triggers_sql(_WATERMARK_ADD_SQL, _WATERMARK_REMOVE_SQL)
+# Массовое задание: до записи из row_count вычитаются строки индикатора в диапазоне дат
+# (счёт по покрывающему индексу по каждой категории), после записи прибавляются одним
+# агрегатом, последняя дата берётся как MAX(date) категории по индексу; если задание что-то
+# записало, write_count всех категорий индикатора увеличивается.
+# Параметры: (начало, конец, индикатор); (записано ли что-то, индикатор, начало, конец);
+# (записано ли что-то, индикатор)
+WATERMARK_RANGE_SUBTRACT_SQL = """
+UPDATE indicator_watermarks SET row_count = row_count - (
+    SELECT COUNT(*) FROM indicator_values v
+    WHERE v.indicator_id = indicator_watermarks.indicator_id AND v.category = indicator_watermarks.category
+      AND v.date BETWEEN ? AND ?)
+WHERE indicator_id = ?;
+"""
+WATERMARK_RANGE_ADD_SQL = """
+INSERT INTO indicator_watermarks (indicator_id, category, last_fetch, row_count)
+SELECT indicator_id, category, CASE WHEN ? THEN CAST(strftime('%s', 'now') AS INTEGER) END, COUNT(*)
+FROM indicator_values WHERE indicator_id = ? AND date BETWEEN ? AND ?
+GROUP BY category
+ON CONFLICT(indicator_id, category) DO UPDATE SET
+    last_fetch = COALESCE(excluded.last_fetch, last_fetch), row_count = row_count + excluded.row_count;
+"""
+WATERMARK_LAST_DATE_SQL = """
+UPDATE indicator_watermarks SET write_count = write_count + ?, last_date = (
+    SELECT MAX(date) FROM indicator_values v
+    WHERE v.indicator_id = indicator_watermarks.indicator_id AND v.category = indicator_watermarks.category)
+WHERE indicator_id = ?;
+"""
+WATERMARKS_BACKFILL_SQL = """
+INSERT OR REPLACE INTO indicator_watermarks (indicator_id, category, last_date, last_fetch, row_count)
+SELECT indicator_id, category, MAX(date), MAX(created_at), COUNT(*)
+FROM indicator_values GROUP BY indicator_id, category;
+"""
+# Совместимость: indicator_values с датами и created_at в прежнем текстовом виде
+# для ручных запросов и скриптов, читающих таблицу напрямую (только чтение)
+VALUES_TEXT_VIEW_SQL = """
+CREATE VIEW indicator_values_text AS
+SELECT {id_column}indicator_id, date(date * 86400, 'unixepoch') AS date, category, value,
+       datetime(created_at, 'unixepoch', 'localtime') AS created_at
+FROM indicator_values;
+"""
+
+def _days_sql(column):
+    """
+    SQL: текстовая дата 'YYYY-MM-DD' -> номер дня от 1970-01-01 (числа не меняются).
+    """
+    return (f"CASE WHEN typeof({column}) = 'text' "
+            f"THEN CAST(julianday({column}) - 2440587.5 AS INTEGER) ELSE {column} END")
+
+def _epoch_seconds_sql(column):
+    """
+    SQL: текстовый created_at (локальное время, как писал DAO) -> Unix-время в секундах.
+    """
+    return (f"CASE WHEN typeof({column}) = 'text' "
+            f"THEN CAST(strftime('%s', {column}, 'utc') AS INTEGER) ELSE {column} END")
+
+def create_values_text_view(conn):
+    """
+    (Пере)создаёт представление indicator_values_text под текущую indicator_values.
+    """
+    has_id = any(row[1] == 'id' for row in conn.execute("PRAGMA table_info(indicator_values)"))
+    conn.execute("DROP VIEW IF EXISTS indicator_values_text")
+    conn.execute(VALUES_TEXT_VIEW_SQL.format(id_column="id, " if has_id else ""))
+
+def migrate_to_epoch_days(conn):
+    """
+    Миграция 5: даты indicator_values, версий значений и широких таблиц — в номера
+    дней от 1970-01-01, created_at — в Unix-время. Таблицы пересоздаются с переносом
+    данных; индексы, триггеры широких таблиц и представление создаются заново.
+    """
+    triggers = [row[0] for row in conn.execute(
+        "SELECT sql FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'indicator_values'")]
+    without_rowid = values_without_rowid(conn)
+    id_column = "" if without_rowid else "id, "
+    conn.execute("DROP VIEW IF EXISTS indicator_values_text")
+    conn.execute("ALTER TABLE indicator_values RENAME TO indicator_values_old")
+    if without_rowid:
+        conn.execute(VALUES_WITHOUT_ROWID_SQL.replace("indicator_values_without_rowid", "indicator_values"))
+    else:
+        conn.execute(VALUES_EPOCH_TABLE_SQL)
+    conn.execute(f"""
+    INSERT INTO indicator_values ({id_column}indicator_id, date, category, value, created_at)
+    SELECT {id_column}indicator_id, {_days_sql('date')}, category, value, {_epoch_seconds_sql('created_at')}
+    FROM indicator_values_old
+    """)
+    conn.execute("DROP TABLE indicator_values_old")
+    conn.execute(VALUES_CATEGORY_INDEX_SQL)
+
+    conn.execute("ALTER TABLE indicator_value_vintages RENAME TO indicator_value_vintages_old")
+    conn.execute(VINTAGES_TABLE_SQL)
+    conn.execute(f"""
+    INSERT INTO indicator_value_vintages (indicator_id, category, date, as_of, value)
+    SELECT indicator_id, category, {_days_sql('date')}, {_days_sql('as_of')}, value
+    FROM indicator_value_vintages_old
+    """)
+    conn.execute("DROP TABLE indicator_value_vintages_old")
+
+    for (table_name,) in conn.execute("SELECT table_name FROM wide_tables").fetchall():
+        table = '"' + table_name.replace('"', '""') + '"'
+        old = '"' + (table_name + '_old').replace('"', '""') + '"'
+        columns = ['"' + row[1].replace('"', '""') + '"'
+                   for row in conn.execute(f"PRAGMA table_info({table})") if row[1] != 'date']
+        conn.execute(f"ALTER TABLE {table} RENAME TO {old}")
+        conn.execute(f"CREATE TABLE {table} (date INTEGER PRIMARY KEY"
+                     + "".join(f", {c} REAL" for c in columns) + ") WITHOUT ROWID")
+        conn.execute(f"INSERT INTO {table} (date{''.join(', ' + c for c in columns)}) "
+                     f"SELECT {_days_sql('date')}{''.join(', ' + c for c in columns)} FROM {old}")
+        conn.execute(f"DROP TABLE {old}")
+
+    for sql in triggers:
+        conn.execute(sql)
+    create_values_text_view(conn)
+
+# --- Миграции ---
+# Версия схемы хранится в PRAGMA user_version. Миграции применяются по порядку,
+# каждая в своей транзакции вместе с новой версией, и не удаляют данные:
+# для рабочей БД, созданной до появления миграций (версия 0), шаги 1-2 ничего не меняют.
+# Шаг задаётся списком 'sql' и/или функцией 'apply'(conn) для перестройки таблиц.
+MIGRATIONS = [
+    {'version': 1, 'description': 'базовые таблицы',
+     'sql': [INDICATORS_TABLE_SQL, VALUES_TABLE_SQL, RELEASES_TABLE_SQL, COMMENTS_TABLE_SQL]},
+    {'version': 2, 'description': 'таблица версий значений', 'sql': [VINTAGES_TABLE_SQL]},
+    {'version': 3, 'description': 'индексы для выборок по индикатору и дате', 'sql': [
+        "CREATE INDEX IF NOT EXISTS idx_releases_indicator_date ON indicator_releases (indicator_id, date, category);",
+        "CREATE INDEX IF NOT EXISTS idx_comments_indicator_date ON comments (indicator_id, date);",
+        VALUES_CATEGORY_INDEX_SQL,
+    ]},
+    {'version': 4, 'description': 'каталог широких таблиц', 'sql': [WIDE_TABLES_SQL]},
+    {'version': 5, 'description': 'даты — номера дней от 1970-01-01, created_at — Unix-время',
+     'apply': migrate_to_epoch_days},
+    {'version': 6, 'description': 'водяные знаки рядов (последняя дата по категориям)',
+     'sql': [WATERMARKS_TABLE_SQL, WATERMARKS_BACKFILL_SQL]
+            + _watermark_triggers_sql(_WATERMARK_ADD_V6_SQL, _WATERMARK_REMOVE_V6_SQL)},
+    {'version': 7, 'description': 'счётчик записей в водяных знаках',
+     'sql': ["ALTER TABLE indicator_watermarks ADD COLUMN write_count INTEGER NOT NULL DEFAULT 0;"]
+            + [f"DROP TRIGGER IF EXISTS {name};" for name in WATERMARK_TRIGGER_NAMES] + WATERMARK_TRIGGERS_SQL},
+]
+SCHEMA_VERSION = MIGRATIONS[-1]['version']
+
+def get_schema_version(conn) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+def migrate(conn, target=SCHEMA_VERSION) -> list[int]:
     """
-    Инициализирует базу данных, удаляя старые таблицы и создавая новые.
+    Применяет недостающие миграции до версии target. Возвращает список применённых версий.
     """
+    applied = []
+    current = get_schema_version(conn)
+    for migration in MIGRATIONS:
+        version = migration['version']
+        if version <= current or version > target:
+            continue
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            if get_schema_version(conn) >= version:
+                # Уже применена другим процессом, пока ждали блокировку
+                conn.rollback()
+                continue
+            for sql in migration.get('sql', []):
+                conn.execute(sql)
+            if 'apply' in migration:
+                migration['apply'](conn)
+            conn.execute(f"PRAGMA user_version = {version}")
+            conn.commit()
+        except sqlite3.Error:
+            conn.rollback()
+            raise
+        print(f"Миграция {version} применена: {migration['description']}")
+        applied.append(version)
+    return applied
+
+def values_without_rowid(conn) -> bool:
+    row = conn.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'indicator_values'").fetchone()
+    return bool(row) and 'WITHOUT ROWID' in row[0].upper()
+
+def rebuild_values_without_rowid(conn) -> bool:
+    """
+    Перестраивает indicator_values в таблицу WITHOUT ROWID с сохранением данных
+    (одна транзакция). Столбец id при этом исчезает. False — если уже перестроена.
+    """
+    if values_without_rowid(conn):
+        return False
+    # Триггеры широких таблиц удаляются вместе со старой таблицей — пересоздаём их
+    triggers = [row[0] for row in conn.execute(
+        "SELECT sql FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'indicator_values'")]
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        # Представление ссылается на таблицу и мешает переименованию — пересоздаём его
+        conn.execute("DROP VIEW IF EXISTS indicator_values_text")
+        conn.execute(VALUES_WITHOUT_ROWID_SQL)
+        conn.execute("""
+        INSERT INTO indicator_values_without_rowid (indicator_id, date, category, value, created_at)
+        SELECT indicator_id, date, category, value, created_at FROM indicator_values
+        ORDER BY indicator_id, date, category
+        """)
+        conn.execute("DROP TABLE indicator_values")
+        conn.execute("ALTER TABLE indicator_values_without_rowid RENAME TO indicator_values")
+        if get_schema_version(conn) >= 3:
+            conn.execute(VALUES_CATEGORY_INDEX_SQL)
+        for sql in triggers:
+            conn.execute(sql)
+        if get_schema_version(conn) >= 5:
+            create_values_text_view(conn)
+        conn.commit()
+    except sqlite3.Error:
+        conn.rollback()
+        raise
+    print("Таблица 'indicator_values' перестроена в WITHOUT ROWID.")
+    return True
+
+def ensure_vintage_table(conn):
+    """
+    Создаёт таблицу версий значений, если её нет (без удаления данных).
+    """
+    conn.execute(VINTAGES_TABLE_SQL)
+    conn.commit()
+
+def setup_database(reset=False, without_rowid=False):
+    """
+    Приводит схему БД к текущей версии миграциями, без удаления данных.
+    reset=True — чистая установка: старые таблицы удаляются.
+    without_rowid=True — дополнительно перестраивает indicator_values в WITHOUT ROWID.
+    """
+    conn = None
     try:
         conn = sqlite3.connect(DB_PATH)
         cursor = conn.cursor()
         print(f"Подключено к базе данных SQLite: {DB_PATH}")
 
-        # --- Удаление старых таблиц для чистой установки ---
-        cursor.execute("DROP TABLE IF EXISTS comments;")
-        cursor.execute("DROP TABLE IF EXISTS indicator_releases;")
-        cursor.execute("DROP TABLE IF EXISTS indicator_values;")
-        cursor.execute("DROP TABLE IF EXISTS indicators;")
-        print("Старые таблицы удалены.")
-
-        # --- Создание таблицы indicators (Справочник индикаторов) ---
-        cursor.execute("""
-        CREATE TABLE indicators (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL UNIQUE,
-            full_name TEXT,
-            source TEXT,
-            description TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        );
-        """)
-        print("Таблица 'indicators' создана.")
-
-        # --- Создание таблицы indicator_values (Числовые значения) ---
-        cursor.execute("""
-        CREATE TABLE indicator_values (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            indicator_id INTEGER NOT NULL,
-            date TEXT NOT NULL,
-            category TEXT NOT NULL DEFAULT '',
-            value REAL NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (indicator_id) REFERENCES indicators (id),
-            UNIQUE(indicator_id, date, category)
-        );
-        """)
-        print("Таблица 'indicator_values' создана с UNIQUE ограничением.")
-
-        # --- Создание остальных таблиц ---
-        cursor.execute("""
-        CREATE TABLE indicator_releases (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            indicator_id INTEGER NOT NULL,
-            date TEXT NOT NULL,
-            category TEXT,
-            release_data TEXT,
-            source_url TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (indicator_id) REFERENCES indicators (id)
-        );
-        """)
-        cursor.execute("""
-        CREATE TABLE comments (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            indicator_id INTEGER NOT NULL,
-            date TEXT NOT NULL,
-            comment_text TEXT NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (indicator_id) REFERENCES indicators (id)
-        );
-        """)
-        print("Таблицы 'indicator_releases' и 'comments' созданы.")
+        if reset:
+            # --- Удаление старых таблиц для чистой установки ---
+            if cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'wide_tables'").fetchone():
+                for (table_name,) in cursor.execute("SELECT table_name FROM wide_tables").fetchall():
+                    cursor.execute(f'DROP TABLE IF EXISTS "{table_name}";')
+                cursor.execute("DROP TABLE wide_tables;")
+            cursor.execute("DROP VIEW IF EXISTS indicator_values_text;")
+            cursor.execute("DROP TABLE IF EXISTS indicator_watermarks;")
+            cursor.execute("DROP TABLE IF EXISTS indicator_value_vintages;")
+            cursor.execute("DROP TABLE IF EXISTS comments;")
+            cursor.execute("DROP TABLE IF EXISTS indicator_releases;")
+            cursor.execute("DROP TABLE IF EXISTS indicator_values;")
+            cursor.execute("DROP TABLE IF EXISTS indicators;")
+            cursor.execute("PRAGMA user_version = 0;")
+            conn.commit()
+            print("Старые таблицы удалены.")
+
+        print(f"Версия схемы: {get_schema_version(conn)}, текущая: {SCHEMA_VERSION}")
+        migrate(conn)
+        if without_rowid:
+            rebuild_values_without_rowid(conn)
 
-        conn.commit()
         print("Структура базы данных успешно создана/обновлена.")
 
     except sqlite3.Error as e:
@@ -91,4 +439,9 @@ def setup_database():
             conn.close()
 
 if __name__ == '__main__':
-    setup_database()
+    parser = argparse.ArgumentParser(description="Создание/обновление схемы БД экономических индикаторов.")
+    parser.add_argument("--reset", action="store_true", help="Удалить все таблицы и создать заново (данные теряются)")
+    parser.add_argument("--without-rowid", action="store_true",
+                        help="Перестроить indicator_values в WITHOUT ROWID (без столбца id)")
+    args = parser.parse_args()
+    setup_database(reset=args.reset, without_rowid=args.without_rowid)
@@ -0,0 +1,359 @@
+# history_importers/csv_history_importer.py
+# Общий импорт исторических CSV (строка на дату, столбец на категорию) в indicator_values:
+# melt за один шаг, декларативное соответствие столбцов категориям, векторная проверка
+# диапазона и одна транзакция (один executemany) на файл.
+# Для очень больших файлов — потоковый режим: чтение кусками по chunk_rows строк,
+# транзакция на кусок и контрольная точка для продолжения после сбоя.
+import csv
+import io
+import json
+import os
+import resource
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# --- ДОБАВЛЕНИЕ КОРНЕВОЙ ПАПКИ В ПУТЬ ПОИСКА МОДУЛЕЙ ---
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dao import IndicatorDAO
+
+# --- КОНФИГУРАЦИЯ ---
+# Описание файла для import_history_csv:
+#   'indicator'   — параметры IndicatorDAO.add_indicator (name, full_name, source, description)
+#   'date_column' — столбец даты, 'date_format' — формат для pd.to_datetime
+#   'columns'     — столбец CSV -> категория (без учёта регистра и пробелов по краям);
+#                   столбцы вне словаря пропускаются
+#   'value_range' — (min, max) допустимых значений, None — без границы
+#   'read_csv'    — дополнительные параметры pd.read_csv (необязательно)
+REQUIRED_KEYS = ('indicator', 'date_column', 'date_format', 'columns')
+# Разделитель определяется по заголовку (C-движок pandas сам его не угадывает)
+SNIFF_BYTES = 64 * 1024
+SNIFF_DELIMITERS = ",;\t|"
+# Пропуски в архивах: FRED пишет '.', Treasury — 'N/A'
+NA_VALUES = ['', '.', 'N/A', 'NA', 'n/a', '#N/A', 'ND']
+# Строк CSV в куске потокового импорта
+CHUNK_ROWS = 100_000
+CHECKPOINT_SUFFIX = '.checkpoint.json'
+# Сколько изменений показывать в сводке разностного импорта
+DIFF_PREVIEW_ROWS = 10
+
+def _sniff_delimiter(csv_path) -> str:
+    with open(csv_path, newline='', encoding='utf-8-sig') as f:
+        header = f.read(SNIFF_BYTES).split('\n', 1)[0]
+    try:
+        return csv.Sniffer().sniff(header, delimiters=SNIFF_DELIMITERS).delimiter
+    except csv.Error:
+        return ','
+
+def _read_options(csv_path, config: dict) -> tuple[dict, str, dict]:
+    """
+    Параметры pd.read_csv (C-движок, только нужные столбцы, явные типы: дата — строка,
+    значения — float64), исходное имя столбца даты и соответствие исходных имён категориям.
+    """
+    missing = [key for key in REQUIRED_KEYS if key not in config]
+    if missing:
+        raise ValueError(f"В конфигурации импорта нет ключей: {missing}")
+
+    options = {'sep': _sniff_delimiter(csv_path), 'encoding': 'utf-8-sig'}
+    options.update(config.get('read_csv', {}))
+    header = pd.read_csv(csv_path, nrows=0, **options).columns
+    normalized = {str(col).strip().lower(): col for col in header}
+
+    date_column = normalized.get(config['date_column'].strip().lower())
+    if date_column is None:
+        raise ValueError(f"CSV должен содержать колонку '{config['date_column']}'")
+    wanted = {col.strip().lower(): category for col, category in config['columns'].items()}
+    mapping = {original: wanted[name] for name, original in normalized.items() if name in wanted}
+    if not mapping:
+        raise ValueError(f"В CSV нет ни одной колонки из {list(config['columns'])}. Колонки: {list(header)}")
+
+    options.update({
+        'usecols': [date_column, *mapping],
+        'dtype': {date_column: str, **{col: np.float64 for col in mapping}},
+        'na_values': NA_VALUES,
+        'keep_default_na': False,
+    })
+    return options, date_column, mapping
+
+def _to_long(df: pd.DataFrame, config: dict, date_column: str, mapping: dict) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Широкий кусок CSV -> (long, rejected), см. read_history_csv.
+    """
+    long_df = df.melt(id_vars=[date_column], value_vars=list(mapping), var_name='category', value_name='value')
+    long_df = pd.DataFrame({
+        'date': pd.to_datetime(long_df[date_column], format=config['date_format'], errors='coerce'),
+        'category': long_df['category'].map(mapping),
+        'value': long_df['value'],
+    }).dropna(subset=['value'])
+
+    low, high = config.get('value_range') or (None, None)
+    valid = long_df['date'].notna().to_numpy()
+    if low is not None:
+        valid &= long_df['value'].to_numpy() >= low
+    if high is not None:
+        valid &= long_df['value'].to_numpy() <= high
+    return long_df[valid].reset_index(drop=True), long_df[~valid].reset_index(drop=True)
+
+def read_history_csv(csv_path, config: dict) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    CSV -> (long, rejected): long — [date (datetime64), category, value] без пустых значений,
+    rejected — строки с нераспознанной датой или значением вне config['value_range'].
+    """
+    options, date_column, mapping = _read_options(csv_path, config)
+    return _to_long(pd.read_csv(csv_path, **options), config, date_column, mapping)
+
+def print_summary(long_df: pd.DataFrame):
+    """
+    Сводка по категориям: число значений, среднее и диапазон.
+    """
+    summary = long_df.groupby('category', sort=False)['value'].agg(['count', 'mean', 'min', 'max'])
+    for category, row in summary.iterrows():
+        print(f"  {category:22} | {int(row['count']):5d} записей | Среднее: {row['mean']:8.1f} | "
+              f"Диапазон: {row['min']:.1f}-{row['max']:.1f}")
+
+def peak_rss_mb() -> float:
+    """
+    Пиковый размер резидентной памяти процесса, МБ (ru_maxrss: КБ в Linux, байты в macOS).
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2 ** 20 if sys.platform == 'darwin' else peak / 1024
+
+def print_diff_summary(report: dict):
+    """
+    Сводка разностного импорта: число вставок/изменений/удалений по категориям и первые изменения.
+    """
+    print(f"  Δ вставить {report['inserted']}, изменить {report['updated']}, удалить {report['deleted']}, "
+          f"без изменений {report['unchanged']}")
+    diff = report['diff']
+    if diff.empty:
+        return
+    by_category = pd.crosstab(diff['category'], diff['action'])
+    for category, counts in by_category.iterrows():
+        print(f"  {category:22} | " + ", ".join(f"{action}: {count}" for action, count in counts.items() if count))
+    changes = diff[diff['action'] != 'insert']
+    if not changes.empty:
+        print(changes.head(DIFF_PREVIEW_ROWS).to_string(index=False))
+        if len(changes) > DIFF_PREVIEW_ROWS:
+            print(f"  ... ещё {len(changes) - DIFF_PREVIEW_ROWS} изменений/удалений")
+
+def import_history_csv(csv_path, config: dict, overwrite: bool = False, dry_run: bool = False,
+                       dao: IndicatorDAO | None = None, chunk_rows: int | None = None,
+                       resume: bool = True, diff: bool = False) -> dict:
+    """
+    Импорт CSV по конфигурации одной транзакцией.
+    overwrite=True — старые значения индикатора удаляются в той же транзакции,
+    иначе существующие (date, category) не трогаются (INSERT OR IGNORE).
+    diff=True — разностный режим: в БД остаётся ровно содержимое файла, но записывается
+    только разница (IndicatorDAO.sync_indicator_values); с dry_run — только сводка разницы.
+    dry_run=True — только разбор, проверка и сводка, без записи в БД (без diff — и без чтения).
+    chunk_rows — потоковый режим (см. import_history_csv_chunked), с diff не совместим.
+    Returns: {'rows', 'rejected', 'inserted', 'updated', 'ignored', 'deleted', 'seconds'}
+    """
+    if chunk_rows and diff:
+        raise ValueError("Разностный импорт сравнивает весь файл с БД и не работает кусками")
+    if chunk_rows:
+        return import_history_csv_chunked(csv_path, config, chunk_rows, overwrite=overwrite, dry_run=dry_run,
+                                          dao=dao, resume=resume)
+
+    started = time.perf_counter()
+    long_df, rejected = read_history_csv(csv_path, config)
+    name = config['indicator']['name']
+    result = {'rows': len(long_df), 'rejected': len(rejected), 'inserted': 0, 'updated': 0, 'ignored': 0,
+              'deleted': 0, 'seconds': 0.0}
+    if long_df.empty:
+        print(f"❌ {Path(csv_path).name}: нет значений для импорта ({name}), отброшено {len(rejected)}")
+        return result
+    print(f"📄 {Path(csv_path).name}: {len(long_df)} значений, {long_df['category'].nunique()} категорий, "
+          f"период {long_df['date'].min():%Y-%m-%d} — {long_df['date'].max():%Y-%m-%d}")
+    if not rejected.empty:
+        print(f"⚠️ Отброшено {len(rejected)} значений (дата не распознана или вне диапазона "
+              f"{config.get('value_range')}): {rejected['category'].value_counts().to_dict()}")
+    print_summary(long_df)
+
+    if dry_run and not diff:
+        print(f"🔎 Dry run: в БД ничего не записано ({name})")
+        return result
+
+    own_dao = dao is None
+    dao = dao or IndicatorDAO()
+    try:
+        # В dry run индикатор не регистрируется: если его нет, вся история — вставки
+        indicator_id = dao.get_indicator_id(name) if dry_run else dao.add_indicator(**config['indicator'])
+        if not indicator_id and not dry_run:
+            raise RuntimeError(f"Не удалось зарегистрировать индикатор {name}")
+        # Одна транзакция и один executemany на файл
+        chunk_size = max(len(long_df), 1)
+        if diff:
+            report = dao.sync_indicator_values(indicator_id or 0, long_df, category_col='category',
+                                               dry_run=dry_run, chunk_size=chunk_size)
+            print_diff_summary(report)
+            result.update({key: report[key] for key in ('inserted', 'updated', 'deleted')})
+            if dry_run:
+                print(f"🔎 Dry run: в БД ничего не записано ({name})")
+                return result
+        elif overwrite:
+            stats = dao.replace_indicator_values(indicator_id, long_df, category_col='category', chunk_size=chunk_size)
+            result['deleted'] = stats['deleted']
+            print(f"🗑 Удалено {stats['deleted']} старых записей для {name}")
+            result['inserted'] = stats['inserted']
+        else:
+            stats = dao.add_indicator_values_bulk(indicator_id, long_df, category_col='category',
+                                                  chunk_size=chunk_size)
+            result['ignored'] = stats['ignored']
+            result['inserted'] = stats['inserted']
+    finally:
+        if own_dao:
+            dao.close()
+
+    result['seconds'] = time.perf_counter() - started
+    print(f"✅ {name}: вставлено {result['inserted']}, изменено {result['updated']}, удалено {result['deleted']}, "
+          f"уже было {result['ignored']} "
+          f"за {result['seconds']:.2f}с ({len(long_df) / max(result['seconds'], 1e-9):,.0f} строк/с)")
+    return result
+
+def checkpoint_path(csv_path) -> Path:
+    return Path(str(csv_path) + CHECKPOINT_SUFFIX)
+
+def _file_signature(csv_path) -> dict:
+    stat = os.stat(csv_path)
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+def _load_checkpoint(csv_path, name: str, overwrite: bool) -> dict | None:
+    """
+    Контрольная точка прерванного импорта того же файла (размер и mtime не менялись)
+    в тот же индикатор и в том же режиме, с байтовым смещением; иначе None.
+    """
+    path = checkpoint_path(csv_path)
+    if not path.exists():
+        return None
+    try:
+        state = json.loads(path.read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return None
+    if (state.get('indicator') != name or state.get('overwrite') != overwrite
+            or state.get('file') != _file_signature(csv_path) or 'offset' not in state):
+        print(f"⚠️ Контрольная точка {path.name} от другого файла, режима или без смещения — импорт с начала")
+        return None
+    return state
+
+def _save_checkpoint(csv_path, state: dict):
+    # Запись через временный файл: контрольная точка не бывает недописанной
+    path = checkpoint_path(csv_path)
+    tmp_path = path.with_name(path.name + '.tmp')
+    tmp_path.write_text(json.dumps(state), encoding='utf-8')
+    os.replace(tmp_path, path)
+
+def _read_record(f, quote: bytes) -> bytes:
+    """
+    Одна запись CSV из двоичного файла: строки до перевода строки вне кавычек
+    (поле в кавычках может содержать переводы строк). b'' — конец файла.
+    """
+    record = f.readline()
+    while record.count(quote) % 2 and record.endswith(b'\n'):
+        line = f.readline()
+        if not line:
+            break
+        record += line
+    return record
+
+def _iter_record_blocks(csv_path, chunk_rows: int, offset: int, quote: bytes):
+    """
+    Блоки по chunk_rows непустых записей CSV начиная с байтового смещения offset
+    (0 — первая запись после заголовка). Каждый блок — (заголовок + записи в байтах,
+    число записей, смещение конца блока): продолжение с этого смещения не перечитывает
+    уже обработанную часть файла, память ограничена размером блока.
+    """
+    with open(csv_path, 'rb') as f:
+        header = _read_record(f, quote)
+        if offset:
+            f.seek(offset)
+        while True:
+            records, rows = [], 0
+            while rows < chunk_rows:
+                record = _read_record(f, quote)
+                if not record:
+                    break
+                records.append(record)
+                rows += bool(record.strip())
+            if not rows:
+                return
+            yield header + b''.join(records), rows, f.tell()
+
+def import_history_csv_chunked(csv_path, config: dict, chunk_rows: int = CHUNK_ROWS, overwrite: bool = False,
+                               dry_run: bool = False, dao: IndicatorDAO | None = None,
+                               resume: bool = True) -> dict:
+    """
+    Потоковый импорт: CSV читается кусками по chunk_rows строк (C-движок, явные типы),
+    каждый кусок нормализуется и пишется в своей транзакции — память ограничена
+    размером куска, а не файла. После каждого куска в <csv>.checkpoint.json
+    сохраняются байтовое смещение конца куска и число строк; resume=True продолжает
+    прерванный импорт с этого смещения (заголовок берётся из начала файла).
+    overwrite=True удаляет старые значения в транзакции первого куска.
+    Контрольная точка удаляется после успешного завершения.
+    Returns: {'rows', 'rejected', 'inserted', 'ignored', 'deleted', 'seconds', 'chunks', 'resumed_from'}
+    """
+    started = time.perf_counter()
+    name = config['indicator']['name']
+    options, date_column, mapping = _read_options(csv_path, config)
+    state = _load_checkpoint(csv_path, name, overwrite) if resume and not dry_run else None
+    if state is None:
+        state = {'indicator': name, 'overwrite': overwrite, 'file': _file_signature(csv_path),
+                 'offset': 0, 'rows_done': 0,
+                 'result': {'rows': 0, 'rejected': 0, 'inserted': 0, 'ignored': 0, 'deleted': 0}}
+    else:
+        print(f"↪️ Продолжаем импорт {Path(csv_path).name} со строки {state['rows_done'] + 1}")
+    result = dict(state['result'], chunks=0, resumed_from=state['rows_done'])
+    quote = options.get('quotechar', '"').encode()
+
+    own_dao = dao is None and not dry_run
+    dao = None if dry_run else (dao or IndicatorDAO())
+    try:
+        indicator_id = None
+        if dao is not None:
+            indicator_id = dao.add_indicator(**config['indicator'])
+            if not indicator_id:
+                raise RuntimeError(f"Не удалось зарегистрировать индикатор {name}")
+
+        for block, rows, offset in _iter_record_blocks(csv_path, chunk_rows, state['offset'], quote):
+            chunk = pd.read_csv(io.BytesIO(block), **options)
+            long_df, rejected = _to_long(chunk, config, date_column, mapping)
+            if dao is not None:
+                if overwrite and state['rows_done'] == 0:
+                    stats = dao.replace_indicator_values(indicator_id, long_df, category_col='category',
+                                                         chunk_size=max(len(long_df), 1))
+                    result['deleted'] += stats['deleted']
+                    print(f"🗑 Удалено {stats['deleted']} старых записей для {name}")
+                else:
+                    stats = dao.add_indicator_values_bulk(indicator_id, long_df, category_col='category',
+                                                          chunk_size=max(len(long_df), 1))
+                    result['ignored'] += stats['ignored']
+                result['inserted'] += stats['inserted']
+            result['rows'] += len(long_df)
+            result['rejected'] += len(rejected)
+            result['chunks'] += 1
+            state['rows_done'] += rows
+            state['offset'] = offset
+            if dao is not None:
+                state['result'] = {key: result[key] for key in state['result']}
+                _save_checkpoint(csv_path, state)
+            print(f"  кусок {result['chunks']}: строк CSV {state['rows_done']}, значений {result['rows']}, "
+                  f"пик памяти {peak_rss_mb():.0f} МБ")
+    finally:
+        if own_dao:
+            dao.close()
+
+    if not dry_run:
+        checkpoint_path(csv_path).unlink(missing_ok=True)
+    result['seconds'] = time.perf_counter() - started
+    if result['rejected']:
+        print(f"⚠️ Отброшено {result['rejected']} значений (дата не распознана или вне диапазона "
+              f"{config.get('value_range')})")
+    action = "🔎 Dry run, в БД ничего не записано" if dry_run else \
+        f"✅ {name}: вставлено {result['inserted']}, уже было {result['ignored']}"
+    print(f"{action}: {result['rows']} значений из {state['rows_done']} строк CSV за {result['seconds']:.2f}с "
+          f"({result['rows'] / max(result['seconds'], 1e-9):,.0f} строк/с), пик памяти {peak_rss_mb():.0f} МБ")
+    return result
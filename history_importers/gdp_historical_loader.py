@@ -67,17 +67,9 @@ def main():
         
         # Сохраняем данные в БД
         print("Сохраняем данные в БД (дубликаты будут проигнорированы)...")
-        saved_count = 0
-        for _, row in gdp_df.iterrows():
-            success = dao.add_indicator_value(
-                indicator_id=indicator_id,
-                date=row['date'].strftime('%Y-%m-%d'),
-                value=row['value']
-            )
-            if success:
-                saved_count += 1
-        
-        print(f"Сохранено {saved_count} новых записей из {len(gdp_df)} обработанных.")
+        stats = dao.add_indicator_values_bulk(indicator_id, gdp_df)
+
+        print(f"Сохранено {stats['inserted']} новых записей из {len(gdp_df)} обработанных.")
         
         # Итоговая статистика
         final_data = dao.get_indicator_values(indicator_id)
@@ -2,18 +2,14 @@
 # history_importers/import_building_permits_history.py
 
 import argparse
-import pandas as pd
-import sqlite3
 import os
+import sys
 from pathlib import Path
-from dotenv import load_dotenv
 
-# --- Настройки окружения ---
-load_dotenv()
-home_dir = Path.home()
-DB_SUBDIR = os.getenv("DB_SUBDIR", "Documents")
-DB_FILE = os.getenv("DB_FILE", "economic_indicators.db")
-DB_PATH = home_dir / DB_SUBDIR / DB_FILE
+# --- ДОБАВЛЕНИЕ КОРНЕВОЙ ПАПКИ В ПУТЬ ПОИСКА МОДУЛЕЙ ---
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from history_importers.csv_history_importer import import_history_csv
 
 INDICATOR_META = {
     "name": "building_permits_us",
@@ -31,81 +27,37 @@ CATEGORY_MAP = {
     "5 units or more": "5+ units",
 }
 
-def ensure_indicator(conn) -> int:
-    cur = conn.cursor()
-    cur.execute("SELECT id FROM indicators WHERE name = ?", (INDICATOR_META["name"],))
-    row = cur.fetchone()
-    if row:
-        return row[0]
-    cur.execute(
-        "INSERT INTO indicators (name, full_name, source, description) VALUES (?, ?, ?, ?)",
-        (
-            INDICATOR_META["name"],
-            INDICATOR_META["full_name"],
-            INDICATOR_META["source"],
-            INDICATOR_META["description"],
-        ),
-    )
-    conn.commit()
-    return cur.lastrowid
-
-def import_csv(csv_path: Path, dry_run: bool = False):
-    df = pd.read_csv(csv_path, sep=None, engine="python")
-
-    if "Date" not in df.columns:
-        raise ValueError("CSV должен содержать колонку 'Date'")
-
-    # Приводим даты к YYYY-MM-01
-    df["Date"] = pd.to_datetime(df["Date"], format="%b %Y").dt.strftime("%Y-%m-01")
-
-    conn = sqlite3.connect(DB_PATH)
-    try:
-        indicator_id = ensure_indicator(conn)
-        cur = conn.cursor()
-
-        if not dry_run:
-            cur.execute("DELETE FROM indicator_values WHERE indicator_id = ?", (indicator_id,))
-            print(f"🗑 Удалено {cur.rowcount} старых записей для building_permits_us")
-
-        inserted = 0
-        for _, row in df.iterrows():
-            date_str = row["Date"]
-            for col in df.columns:
-                if col == "Date":
-                    continue
-                col_norm = col.strip().lower()
-                if col_norm in CATEGORY_MAP:
-                    category = CATEGORY_MAP[col_norm]
-                else:
-                    continue
-                value = row[col]
-                if pd.isna(value):
-                    continue
-
-                if not dry_run:
-                    cur.execute(
-                        """
-                        INSERT INTO indicator_values (indicator_id, date, category, value, created_at)
-                        VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
-                        """,
-                        (indicator_id, date_str, category, float(value)),
-                    )
-                inserted += 1
-
-        if not dry_run:
-            conn.commit()
-
-        print(f"✅ Импорт завершён. Вставлено {inserted} записей")
+IMPORT_CONFIG = {
+    "indicator": INDICATOR_META,
+    "date_column": "Date",
+    "date_format": "%b %Y",  # Jan 1996 -> первое число месяца
+    "columns": CATEGORY_MAP,
+    "value_range": (0, None),
+}
 
-    finally:
-        conn.close()
+def import_csv(csv_path: Path, dry_run: bool = False, chunk_rows: int | None = None, resume: bool = True,
+               diff: bool = False):
+    """
+    Перезапись истории: старые значения удаляются и история вставляется в одной транзакции.
+    chunk_rows — потоковый режим для больших файлов: кусок на транзакцию, продолжение
+    прерванного импорта с контрольной точки (resume=False — начать заново).
+    diff=True — тот же результат, но записываются только вставки/изменения/удаления
+    (с dry_run — только сводка разницы с БД).
+    """
+    return import_history_csv(csv_path, IMPORT_CONFIG, overwrite=not diff, dry_run=dry_run,
+                              chunk_rows=chunk_rows, resume=resume, diff=diff)
 
 def main():
     parser = argparse.ArgumentParser(description="Import Building Permits history (overwrite mode).")
     parser.add_argument("--csv", required=True, help="Path to CSV file")
     parser.add_argument("--dry-run", action="store_true", help="Parse and report without DB writes")
+    parser.add_argument("--chunk-rows", type=int, help="Stream the file in chunks of N rows (one transaction each)")
+    parser.add_argument("--restart", action="store_true", help="Ignore the checkpoint of an interrupted chunked import")
+    parser.add_argument("--diff", action="store_true",
+                        help="Write only the insert/update/delete delta (with --dry-run: print the diff)")
     args = parser.parse_args()
-    import_csv(Path(args.csv), dry_run=args.dry_run)
+    import_csv(Path(args.csv), dry_run=args.dry_run, chunk_rows=args.chunk_rows, resume=not args.restart,
+               diff=args.diff)
 
 if __name__ == "__main__":
     main()
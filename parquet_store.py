@@ -0,0 +1,322 @@
+# parquet_store.py
+# Снимок хранилища индикаторов в Parquet для аналитики: значения и релизы выбранных
+# индикаторов, разбитые по индикатору и году (hive: values/indicator=<name>/year=<YYYY>/),
+# сжатие zstd; импорт снимка обратно в SQLite; чтение рядов из снимка через
+# memory-mapped Arrow (IndicatorDAO(snapshot_dir=...)).
+# pyarrow — необязательная зависимость (requirements-parquet.txt): импортируется только при работе со снимком.
+import argparse
+import json
+import os
+import shutil
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from dao import DB_PATH, IndicatorDAO
+
+# --- КОНФИГУРАЦИЯ ---
+PARQUET_DIR = Path(os.getenv("DB_PARQUET_DIR") or DB_PATH.parent / "parquet")
+COMPRESSION = 'zstd'
+# Строк в группе: группы идут по (category, date), выборка одной категории
+# по статистикам групп читает несколько групп, а не весь год
+ROW_GROUP_ROWS = 4096
+MANIFEST_FILE = 'snapshot.json'
+VALUES_DIR = 'values'
+RELEASES_DIR = 'releases'
+
+VALUES_SQL = "SELECT date, category, value, created_at FROM indicator_values WHERE indicator_id = ?"
+RELEASES_SQL = ("SELECT date, COALESCE(category, '') AS category, release_data, source_url, created_at "
+                "FROM indicator_releases WHERE indicator_id = ?")
+RELEASE_COLUMNS = ['date', 'category', 'release_data', 'source_url', 'created_at']
+INDICATORS_SQL = "SELECT id, name, full_name, source, description FROM indicators"
+
+def _require_pyarrow():
+    """
+    Ленивая загрузка pyarrow с понятной ошибкой, если он не установлен.
+    """
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ImportError("Для Parquet-снимков нужен pyarrow: pip install -r requirements-parquet.txt") from e
+    return pyarrow, pyarrow.parquet
+
+def _years(days: np.ndarray) -> np.ndarray:
+    return days.astype('datetime64[D]').astype('datetime64[Y]').astype(np.int64) + 1970
+
+def _load_manifest(root: Path) -> dict:
+    path = root / MANIFEST_FILE
+    return json.loads(path.read_text()) if path.exists() else {}
+
+def _save_manifest(root: Path, manifest: dict):
+    tmp = root / f".{MANIFEST_FILE}.tmp"
+    tmp.write_text(json.dumps(manifest, indent=2, ensure_ascii=False))
+    os.replace(tmp, root / MANIFEST_FILE)
+
+def _write_partitioned(table, target: Path):
+    """
+    Таблица -> target/year=<YYYY>/part-0.parquet. Пишется во временный каталог (с точкой —
+    его не видят чтения) и подменяет прежний, так что года, пропавшие из БД, не остаются.
+    Пустая таблица удаляет target.
+    """
+    _, pq = _require_pyarrow()
+    if table.num_rows == 0:
+        shutil.rmtree(target, ignore_errors=True)
+        return
+    tmp = target.with_name(f".{target.name}.tmp")
+    old = target.with_name(f".{target.name}.old")
+    for path in (tmp, old):
+        shutil.rmtree(path, ignore_errors=True)
+    pq.write_to_dataset(table, tmp, partition_cols=['year'], compression=COMPRESSION,
+                        basename_template='part-{i}.parquet', max_rows_per_group=ROW_GROUP_ROWS,
+                        min_rows_per_group=ROW_GROUP_ROWS)
+    if target.exists():
+        target.rename(old)
+    tmp.rename(target)
+    shutil.rmtree(old, ignore_errors=True)
+
+def export_parquet(names=None, root=PARQUET_DIR, dao: IndicatorDAO | None = None) -> dict:
+    """
+    Выгрузка индикаторов (names=None — всех) в Parquet-снимок root.
+    Значения и релизы каждого индикатора читаются в одной транзакции вместе с сигнатурой
+    записи (счётчик IndicatorDAO.get_write_signature), по которой чтение из снимка проверяет актуальность.
+    Returns: {name: {'rows', 'releases', 'years'}}
+    """
+    pa, _ = _require_pyarrow()
+    root = Path(root)
+    root.mkdir(parents=True, exist_ok=True)
+    own_dao = dao is None
+    dao = dao or IndicatorDAO()
+    manifest = _load_manifest(root)
+    result = {}
+    try:
+        indicators = pd.read_sql_query(INDICATORS_SQL, dao.conn)
+        if names:
+            missing = set(names) - set(indicators['name'])
+            if missing:
+                raise ValueError(f"Индикаторы не найдены: {sorted(missing)}")
+            indicators = indicators[indicators['name'].isin(names)]
+
+        for indicator in indicators.itertuples(index=False):
+            started = time.perf_counter()
+            own_snapshot = not dao.conn.in_transaction
+            if own_snapshot:
+                dao.conn.execute("BEGIN")
+            try:
+                write_count = dao.get_write_signature(indicator.id)
+                values = pd.read_sql_query(VALUES_SQL, dao.conn, params=(indicator.id,),
+                                           dtype={'date': 'int64', 'value': 'float64', 'created_at': 'int64'})
+                releases = pd.read_sql_query(RELEASES_SQL, dao.conn, params=(indicator.id,))
+            finally:
+                if own_snapshot:
+                    dao.conn.commit()
+
+            # Внутри года — по (category, date), как в покрывающем индексе SQLite
+            values = values.sort_values(['category', 'date'], kind='stable', ignore_index=True)
+            days = values['date'].to_numpy()
+            table = pa.table({
+                'date': pa.array(days.astype(np.int32), type=pa.int32()).cast(pa.date32()),
+                'category': pa.array(values['category'].to_numpy(), type=pa.string()),
+                'value': pa.array(values['value'].to_numpy(), type=pa.float64()),
+                'created_at': pa.array(values['created_at'].to_numpy(), type=pa.int64()).cast(pa.timestamp('s')),
+                'year': pa.array(_years(days), type=pa.int16()),
+            })
+            _write_partitioned(table, root / VALUES_DIR / f"indicator={indicator.name}")
+
+            releases['year'] = pd.to_numeric(releases['date'].astype(str).str[:4], errors='coerce') \
+                .fillna(0).astype(np.int16)
+            schema = pa.schema([(col, pa.string()) for col in RELEASE_COLUMNS] + [('year', pa.int16())])
+            _write_partitioned(pa.Table.from_pandas(releases, schema=schema, preserve_index=False),
+                               root / RELEASES_DIR / f"indicator={indicator.name}")
+
+            years = sorted(set(_years(days).tolist()))
+            manifest[indicator.name] = {
+                'full_name': indicator.full_name,
+                'source': indicator.source,
+                'description': indicator.description,
+                'exported_at': time.time(),
+                'rows': len(values),
+                'write_count': int(write_count),
+                'releases': len(releases),
+                'years': [years[0], years[-1]] if years else None,
+            }
+            _save_manifest(root, manifest)
+            result[indicator.name] = {'rows': len(values), 'releases': len(releases), 'years': len(years)}
+            print(f"📦 {indicator.name}: {len(values)} значений, {len(releases)} релизов, {len(years)} лет "
+                  f"за {time.perf_counter() - started:.2f}с")
+    finally:
+        if own_dao:
+            dao.close()
+    return result
+
+def read_values(name: str, root=PARQUET_DIR, columns=None, filters=None):
+    """
+    Значения индикатора из снимка как pyarrow.Table (файлы читаются через memory map).
+    filters — фильтры pyarrow.parquet.read_table, в том числе по партиции 'year'.
+    """
+    _, pq = _require_pyarrow()
+    return pq.read_table(Path(root) / VALUES_DIR / f"indicator={name}", columns=columns, filters=filters,
+                         memory_map=True, partitioning='hive')
+
+def import_parquet(names=None, root=PARQUET_DIR, overwrite: bool = True,
+                   dao: IndicatorDAO | None = None) -> dict:
+    """
+    Загрузка снимка обратно в SQLite. overwrite=True — значения и релизы индикатора
+    заменяются содержимым снимка (одна транзакция на таблицу), иначе добавляются только
+    отсутствующие (date, category). created_at значений — время импорта.
+    Returns: {name: {'inserted', 'deleted', 'releases'}}
+    """
+    pa, pq = _require_pyarrow()
+    root = Path(root)
+    manifest = _load_manifest(root)
+    if not manifest:
+        raise FileNotFoundError(f"Нет снимка в {root} ({MANIFEST_FILE})")
+    names = list(names or manifest)
+    missing = [name for name in names if name not in manifest]
+    if missing:
+        raise ValueError(f"В снимке нет индикаторов: {missing}")
+
+    own_dao = dao is None
+    dao = dao or IndicatorDAO()
+    result = {}
+    try:
+        for name in names:
+            meta = manifest[name]
+            indicator_id = dao.add_indicator(name, meta['full_name'], meta['source'], meta['description'])
+            if not indicator_id:
+                raise RuntimeError(f"Не удалось зарегистрировать индикатор {name}")
+            if not (root / VALUES_DIR / f"indicator={name}").exists():
+                table = pa.table({'date': pa.array([], pa.date32()), 'category': pa.array([], pa.string()),
+                                  'value': pa.array([], pa.float64())})
+            else:
+                table = read_values(name, root, columns=['date', 'category', 'value'])
+            values = pd.DataFrame({
+                'date': table['date'].cast(pa.int32()).to_numpy().astype(np.int64).view('datetime64[D]'),
+                'category': table['category'].to_numpy(zero_copy_only=False),
+                'value': table['value'].to_numpy(),
+            })
+            chunk_size = max(len(values), 1)
+            if overwrite:
+                stats = dao.replace_indicator_values(indicator_id, values, category_col='category',
+                                                     chunk_size=chunk_size)
+            else:
+                stats = dao.add_indicator_values_bulk(indicator_id, values, category_col='category',
+                                                      chunk_size=chunk_size)
+
+            releases = pd.DataFrame(columns=RELEASE_COLUMNS)
+            releases_dir = root / RELEASES_DIR / f"indicator={name}"
+            if releases_dir.exists():
+                releases = pq.read_table(releases_dir, columns=RELEASE_COLUMNS, memory_map=True,
+                                         partitioning='hive').to_pandas()
+                # Пустая категория в снимке — NULL в indicator_releases, как пишет add_indicator_release
+                releases['category'] = releases['category'].replace('', None)
+            written = dao.add_indicator_releases_bulk(indicator_id, releases, replace=overwrite)
+
+            result[name] = {'inserted': stats['inserted'], 'deleted': stats.get('deleted', 0), 'releases': written}
+            print(f"📥 {name}: вставлено {stats['inserted']} значений, удалено {stats.get('deleted', 0)}, "
+                  f"релизов {written}")
+    finally:
+        if own_dao:
+            dao.close()
+    return result
+
+class ParquetSnapshot:
+    """
+    Чтение рядов из снимка для IndicatorDAO. Экспорт индикатора считается свежим, пока он
+    моложе max_age секунд и сигнатура записи в БД совпадает с сохранённой при экспорте
+    (после любой записи в индикатор ряды снова читаются из SQLite).
+    """
+    def __init__(self, root, max_age: float):
+        _require_pyarrow()
+        self.root = Path(root)
+        self.max_age = max_age
+        self.stats = {'hits': 0, 'stale': 0}
+        self._manifest = {}
+        self._manifest_mtime = None
+        self._datasets = {}
+
+    def entry(self, name: str) -> dict | None:
+        """
+        Запись манифеста об индикаторе (манифест перечитывается при изменении файла).
+        """
+        path = self.root / MANIFEST_FILE
+        try:
+            mtime = path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return None
+        if mtime != self._manifest_mtime:
+            self._manifest = _load_manifest(self.root)
+            self._manifest_mtime = mtime
+        return self._manifest.get(name)
+
+    def is_fresh(self, name: str, signature: int) -> bool:
+        entry = self.entry(name)
+        # Манифесты до счётчика записей (без 'write_count') считаются устаревшими
+        fresh = (entry is not None and time.time() - entry['exported_at'] <= self.max_age
+                 and entry.get('write_count') == signature)
+        if entry is not None and not fresh:
+            self.stats['stale'] += 1
+        return fresh
+
+    def _dataset(self, name: str):
+        """
+        Набор файлов индикатора через memory map; список файлов и их метаданные (статистики
+        групп строк) читаются один раз на экспорт, а не при каждом чтении ряда.
+        """
+        import pyarrow.dataset as ds
+        from pyarrow import fs
+        exported_at = self._manifest[name]['exported_at']
+        cached = self._datasets.get(name)
+        if cached is None or cached[0] != exported_at:
+            dataset = ds.dataset(str((self.root / VALUES_DIR / f"indicator={name}").resolve()), format='parquet',
+                                 partitioning='hive', filesystem=fs.LocalFileSystem(use_mmap=True))
+            for fragment in dataset.get_fragments():
+                fragment.ensure_complete_metadata()
+            cached = self._datasets[name] = (exported_at, dataset)
+        return cached[1]
+
+    def read_series(self, name, category=None, start_day=None, end_day=None):
+        """
+        (dates datetime64[D], values float64) по возрастанию дат, как IndicatorDAO._read_series;
+        None, если файлы снимка не читаются (например, идёт повторный экспорт).
+        """
+        pa, pq = _require_pyarrow()
+        filters = []
+        if category is not None:
+            filters.append(('category', '=', category))
+        for day, op in ((start_day, '>='), (end_day, '<=')):
+            if day is not None:
+                date = np.datetime64(day, 'D')
+                filters += [('year', op, int(_years(np.array([day]))[0])), ('date', op, date.item())]
+        try:
+            table = self._dataset(name).to_table(
+                columns=['date', 'value'], filter=pq.filters_to_expression(filters) if filters else None)
+        except (OSError, pa.ArrowException):
+            self._datasets.pop(name, None)
+            return None
+        days = table['date'].cast(pa.int32()).to_numpy().astype(np.int64)
+        order = np.argsort(days, kind='stable')
+        self.stats['hits'] += 1
+        return days[order].view('datetime64[D]'), table['value'].to_numpy()[order]
+
+def main():
+    parser = argparse.ArgumentParser(description="Parquet snapshot of the indicator store (needs pyarrow).")
+    parser.add_argument("command", choices=["export", "import"], help="export: SQLite -> Parquet, import: Parquet -> SQLite")
+    parser.add_argument("--names", nargs="+", help="Indicator names (default: all)")
+    parser.add_argument("--dir", default=str(PARQUET_DIR), help=f"Snapshot directory (default: {PARQUET_DIR})")
+    parser.add_argument("--append", action="store_true", help="import: keep stored values, add only missing ones")
+    args = parser.parse_args()
+    try:
+        if args.command == "export":
+            export_parquet(args.names, args.dir)
+        else:
+            import_parquet(args.names, args.dir, overwrite=not args.append)
+    except ImportError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+# tests/bench_chunked_import.py
+# Бенчмарк импорта большого исторического CSV: весь файл в памяти (прежний sep=None/engine="python"
+# и текущий C-движок одним куском) против потокового импорта кусками с контрольной точкой.
+# Каждый режим — в отдельном процессе, чтобы пик RSS (ru_maxrss) не смешивался.
+# Использование: python tests/bench_chunked_import.py [--rows N] [--columns N] [--chunk-rows N]
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def bench_config(columns: int) -> dict:
+    """
+    Дневная региональная история: столбец на регион.
+    """
+    return {
+        "indicator": {"name": "bench_regional_permits", "full_name": "Bench", "source": "bench", "description": ""},
+        "date_column": "Date",
+        "date_format": "%Y-%m-%d",
+        "columns": {f"Region {i:03d}": f"region_{i:03d}" for i in range(columns)},
+        "value_range": (0, None),
+    }
+
+def make_csv(csv_path: Path, rows: int, columns: int, block: int = 50_000):
+    """
+    Синтетический CSV (строка на день, столбец на регион), пишется блоками.
+    """
+    rng = np.random.default_rng(0)
+    names = list(bench_config(columns)["columns"])
+    dates = pd.date_range("1700-01-01", periods=rows, freq="D").strftime("%Y-%m-%d")
+    with open(csv_path, "w", encoding="utf-8") as f:
+        f.write("Date," + ",".join(names) + "\n")
+        for start in range(0, rows, block):
+            stop = min(start + block, rows)
+            frame = pd.DataFrame(rng.integers(10, 2000, (stop - start, columns)), columns=names)
+            frame.insert(0, "Date", dates[start:stop])
+            frame.to_csv(f, header=False, index=False)
+
+def run_mode(mode: str, csv_path: str, db_dir: str, chunk_rows: int, columns: int) -> dict:
+    """
+    Один режим в текущем процессе (вызывается из дочернего процесса).
+    """
+    import dao as dao_module
+    import database_setup
+    from history_importers import csv_history_importer
+    config = bench_config(columns)
+
+    db_path = Path(db_dir) / f"{mode}.db"
+    database_setup.DB_PATH = db_path
+    dao_module.DB_PATH = db_path
+    database_setup.setup_database()
+    started = time.perf_counter()
+    if mode == "legacy_read":
+        # Только чтение прежним способом: сниффинг разделителя Python-движком по всему файлу
+        pd.read_csv(csv_path, sep=None, engine="python")
+        stats = {}
+    elif mode == "single":
+        stats = csv_history_importer.import_history_csv(csv_path, config, overwrite=True)
+    else:
+        stats = csv_history_importer.import_history_csv(csv_path, config, overwrite=True,
+                                                        chunk_rows=chunk_rows, resume=False)
+    return {"seconds": time.perf_counter() - started, "rows": stats.get("rows"),
+            "peak_mb": csv_history_importer.peak_rss_mb()}
+
+def run_benchmark(rows: int = 100_000, columns: int = 50, chunk_rows: int = 10_000):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        csv_path = Path(tmp_dir) / "permits_regional.csv"
+        make_csv(csv_path, rows, columns)
+        print(f"\nCSV: {rows} строк x {columns} столбцов, {csv_path.stat().st_size / 2 ** 20:.0f} МБ")
+        print(f"{'Режим':<36} | {'время, с':>8} | {'значений':>10} | {'строк/с':>10} | {'пик RSS, МБ':>11}")
+        print("-" * 90)
+        for mode, title in (("legacy_read", "прежнее чтение (engine=python)"),
+                            ("single", "C-движок, файл целиком"),
+                            ("chunked", f"потоково по {chunk_rows} строк")):
+            out = subprocess.run([sys.executable, __file__, "--mode", mode, "--csv", str(csv_path),
+                                  "--db-dir", tmp_dir, "--chunk-rows", str(chunk_rows),
+                                  "--columns", str(columns)],
+                                 capture_output=True, text=True, check=True).stdout
+            result = json.loads(out.strip().splitlines()[-1])
+            values = result["rows"] or 0
+            speed = f"{values / result['seconds']:,.0f}" if values else "-"
+            print(f"{title:<36} | {result['seconds']:>8.1f} | {values or '-':>10} | {speed:>10} | "
+                  f"{result['peak_mb']:>11.0f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Бенчмарк потокового импорта исторических CSV")
+    parser.add_argument("--rows", type=int, default=100_000, help="Строк (дней) в синтетическом CSV")
+    parser.add_argument("--columns", type=int, default=50, help="Столбцов-регионов в синтетическом CSV")
+    parser.add_argument("--chunk-rows", type=int, default=10_000, help="Строк в куске потокового импорта")
+    parser.add_argument("--mode", help=argparse.SUPPRESS)
+    parser.add_argument("--csv", help=argparse.SUPPRESS)
+    parser.add_argument("--db-dir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.mode:
+        result = run_mode(args.mode, args.csv, args.db_dir, args.chunk_rows, args.columns)
+        print(json.dumps(result))
+    else:
+        run_benchmark(args.rows, args.columns, args.chunk_rows)
@@ -0,0 +1,196 @@
+# tests/bench_epoch_dates.py
+# Бенчмарк формата дат в indicator_values: текстовые 'YYYY-MM-DD' (схема версии 4)
+# против номеров дней от 1970-01-01 (миграция 5) — размер таблицы и индексов,
+# задержка выборок по диапазону дат и MAX(date), скорость массовой записи
+# (отдельно — цена построчных триггеров водяных знаков, миграция 6: прямой SQL на текущей
+# схеме против записи DAO, которая на массовых заданиях ведёт их запросами по диапазону).
+# Использование: python tests/bench_epoch_dates.py [--rows N] [--repeat N]
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import dao as dao_module
+import database_setup
+
+CATEGORIES = 100
+RANGE_QUERIES = 200
+VALUES_OBJECTS = ["indicator_values", "sqlite_autoindex_indicator_values_1", "idx_values_indicator_category_date"]
+
+def make_frame(rows: int) -> pd.DataFrame:
+    dates = pd.date_range("1970-01-01", periods=rows // CATEGORIES, freq="D")
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({
+        "date": np.tile(dates, CATEGORIES),
+        "category": np.repeat([f"c{i:03d}" for i in range(CATEGORIES)], len(dates)),
+        "value": rng.normal(100, 10, len(dates) * CATEGORIES),
+    })
+
+def legacy_bulk_insert(conn, indicator_id, df):
+    """
+    Прежняя запись: даты строками через strftime, created_at — отформатированная строка.
+    """
+    created_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    dates = df["date"].dt.strftime("%Y-%m-%d").to_numpy()
+    rows = zip([indicator_id] * len(df), dates.tolist(), df["category"].tolist(), df["value"].tolist(),
+               [created_time] * len(df))
+    conn.executemany(dao_module.INSERT_IGNORE_VALUE_SQL, rows)
+    conn.commit()
+
+def epoch_bulk_insert(conn, indicator_id, df):
+    """
+    Запись DAO (векторный перевод дат в номера дней) прямым executemany: на схеме версии 5 —
+    без триггеров, на текущей — через построчные триггеры водяных знаков.
+    """
+    frame = dao_module.IndicatorDAO._normalize_values_frame(df, "category", "date", "value")
+    dao_module.IndicatorDAO._executemany_values(conn, indicator_id, frame, dao_module.INSERT_IGNORE_VALUE_SQL,
+                                                dao_module.BULK_CHUNK_SIZE)
+    conn.commit()
+
+def object_bytes(conn) -> dict:
+    marks = ", ".join("?" * len(VALUES_OBJECTS))
+    rows = conn.execute(f"SELECT name, SUM(pgsize) FROM dbstat WHERE name IN ({marks}) GROUP BY name",
+                        VALUES_OBJECTS).fetchall()
+    return dict(rows)
+
+def range_params(df, indicator_id, as_days: bool) -> list[tuple]:
+    """
+    Случайные годовые окна по случайным категориям (одинаковые для обеих схем).
+    """
+    rng = np.random.default_rng(1)
+    days = df["date"].to_numpy().astype("datetime64[D]")
+    starts = rng.choice(days[: len(days) // CATEGORIES - 365], RANGE_QUERIES)
+    categories = rng.choice(df["category"].unique(), RANGE_QUERIES)
+    params = []
+    for start, category in zip(starts, categories):
+        end = start + 364
+        if as_days:
+            params.append((indicator_id, category, int(start.astype(np.int64)), int(end.astype(np.int64))))
+        else:
+            params.append((indicator_id, category, str(start), str(end)))
+    return params
+
+RANGE_SQL = ("SELECT date, value FROM indicator_values "
+             "WHERE indicator_id = ? AND category = ? AND date BETWEEN ? AND ?")
+
+def run_range_queries(conn, params):
+    for p in params:
+        conn.execute(RANGE_SQL, p).fetchall()
+
+def run_range_frames(conn, params, as_days: bool):
+    """
+    Выборка, как её читает DAO: DataFrame с датами datetime64.
+    """
+    for p in params:
+        df = pd.read_sql_query(RANGE_SQL, conn, params=p)
+        df["date"] = pd.to_datetime(df["date"], unit="D") if as_days else pd.to_datetime(df["date"])
+
+def _best_time(func, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+def run_benchmark(rows: int = 1_000_000, repeat: int = 3):
+    df = make_frame(rows)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # Схема версии 4: текстовые даты
+        text_conn = sqlite3.connect(Path(tmp_dir) / "text.db")
+        database_setup.migrate(text_conn, target=4)
+        text_conn.execute("INSERT INTO indicators (name) VALUES ('bench_dates')")
+        text_conn.commit()
+        started = time.perf_counter()
+        legacy_bulk_insert(text_conn, 1, df)
+        text_write = time.perf_counter() - started
+
+        # Схема версии 5: номера дней
+        epoch_conn = sqlite3.connect(Path(tmp_dir) / "epoch.db")
+        database_setup.migrate(epoch_conn, target=5)
+        epoch_conn.execute("INSERT INTO indicators (name) VALUES ('bench_dates')")
+        epoch_conn.commit()
+        indicator_id = 1
+        started = time.perf_counter()
+        epoch_bulk_insert(epoch_conn, indicator_id, df)
+        epoch_write = time.perf_counter() - started
+
+        # Текущая схема, прямой SQL: каждая строка проходит триггеры водяных знаков
+        trigger_conn = sqlite3.connect(Path(tmp_dir) / "triggers.db")
+        database_setup.migrate(trigger_conn)
+        trigger_conn.execute("INSERT INTO indicators (name) VALUES ('bench_dates')")
+        trigger_conn.commit()
+        started = time.perf_counter()
+        epoch_bulk_insert(trigger_conn, 1, df)
+        trigger_write = time.perf_counter() - started
+        trigger_conn.close()
+
+        # Текущая схема через DAO: водяные знаки — запросами по диапазону дат
+        db_path = Path(tmp_dir) / "current.db"
+        database_setup.DB_PATH = db_path
+        dao_module.DB_PATH = db_path
+        database_setup.setup_database()
+        dao = dao_module.IndicatorDAO()
+        started = time.perf_counter()
+        dao_indicator = dao.add_indicator("bench_dates", "Bench", "bench", "")
+        dao.add_indicator_values_bulk(dao_indicator, df, category_col="category")
+        current_write = time.perf_counter() - started
+        assert sum(mark["row_count"] for mark in dao.get_watermarks(dao_indicator).values()) == len(df)
+
+        text_sizes = object_bytes(text_conn)
+        epoch_sizes = object_bytes(epoch_conn)
+        print(f"\n{'Объект':<38} | {'текст, КБ':>10} | {'дни, КБ':>10} | {'меньше':>7}")
+        print("-" * 75)
+        for name in VALUES_OBJECTS:
+            text_kb, epoch_kb = text_sizes.get(name, 0) / 1024, epoch_sizes.get(name, 0) / 1024
+            print(f"{name:<38} | {text_kb:>10.0f} | {epoch_kb:>10.0f} | {text_kb / max(epoch_kb, 1):>6.2f}x")
+
+        text_params = range_params(df, 1, as_days=False)
+        epoch_params = range_params(df, indicator_id, as_days=True)
+        assert text_conn.execute("SELECT COUNT(*) FROM indicator_values WHERE indicator_id = 1 AND category = ? "
+                                 "AND date BETWEEN ? AND ?", text_params[0][1:]).fetchone()[0] == \
+            epoch_conn.execute("SELECT COUNT(*) FROM indicator_values WHERE indicator_id = ? AND category = ? "
+                               "AND date BETWEEN ? AND ?", epoch_params[0]).fetchone()[0]
+        max_sql = "SELECT MAX(date) FROM indicator_values WHERE indicator_id = ?"
+        cases = [
+            (f"запись {len(df)} строк, с", text_write, epoch_write, 1),
+            (f"{RANGE_QUERIES} выборок за год, мс",
+             _best_time(lambda: run_range_queries(text_conn, text_params), repeat),
+             _best_time(lambda: run_range_queries(epoch_conn, epoch_params), repeat), 1000),
+            (f"{RANGE_QUERIES} выборок за год в DataFrame, мс",
+             _best_time(lambda: run_range_frames(text_conn, text_params, as_days=False), repeat),
+             _best_time(lambda: run_range_frames(epoch_conn, epoch_params, as_days=True), repeat), 1000),
+            ("MAX(date) x 1000, мс",
+             _best_time(lambda: [text_conn.execute(max_sql, (1,)).fetchone() for _ in range(1000)], repeat),
+             _best_time(lambda: [epoch_conn.execute(max_sql, (indicator_id,)).fetchone() for _ in range(1000)],
+                        repeat), 1000),
+        ]
+        print(f"\n{'Операция':<38} | {'текст':>10} | {'дни':>10} | {'быстрее':>7}")
+        print("-" * 75)
+        for name, text_time, epoch_time, scale in cases:
+            print(f"{name:<38} | {text_time * scale:>10.2f} | {epoch_time * scale:>10.2f} | "
+                  f"{text_time / epoch_time:>6.2f}x")
+        print(f"Скорость записи: текст {len(df) / text_write:,.0f} строк/с, дни {len(df) / epoch_write:,.0f} строк/с, "
+              f"текущая схема (дни + водяные знаки) {len(df) / current_write:,.0f} строк/с")
+        print(f"Водяные знаки на {len(df)} строк: прямой SQL через триггеры {trigger_write:.2f} с "
+              f"({(trigger_write / epoch_write - 1) * 100:+.0f}% к записи без триггеров), "
+              f"DAO по диапазону {current_write:.2f} с ({(current_write / epoch_write - 1) * 100:+.0f}%)")
+        text_conn.close()
+        epoch_conn.close()
+        dao.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Бенчмарк целочисленных дат в indicator_values")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Размер синтетической БД")
+    parser.add_argument("--repeat", type=int, default=3, help="Повторов (берётся лучшее время)")
+    args = parser.parse_args()
+    run_benchmark(args.rows, args.repeat)
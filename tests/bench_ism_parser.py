@@ -0,0 +1,97 @@
+# tests/bench_ism_parser.py
+# Микробенчмарк разбора страниц отчёта ISM: прежний путь (BeautifulSoup.get_text + до ~30
+# некомпилированных re.search с ведущим '.*?' по всему тексту) против табличного извлечения
+# (шаблоны скомпилированы при импорте, один потоковый проход lxml до таблицы индексов).
+# Страницы в tests/fixtures/ism синтетические (собраны вручную по образцу ismworld.org, не сохранены
+# с сайта): времена показывают только относительную цену двух путей на такой разметке и не
+# переносятся на реальные страницы; точность извлечения проверяет tests/test_ism_parser.py.
+# Использование: python tests/bench_ism_parser.py [--repeat N]
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from pathlib import Path
+
+from bs4 import BeautifulSoup
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from collectors.ism_manufacturing_parser import parse_ism_report
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures" / "ism"
+
+def load_fixtures() -> list[tuple[str, bytes, dict]]:
+    """
+    Синтетические страницы отчёта ISM и ожидаемый результат: (имя, байты, {'report', 'date', 'values'}),
+    report — 'manufacturing' или 'services'.
+    """
+    expected = json.loads((FIXTURES_DIR / "expected.json").read_text(encoding="utf-8"))
+    return [(path.name, path.read_bytes(), expected[path.name]) for path in sorted(FIXTURES_DIR.glob("*.html"))]
+
+LEGACY_DATE_PATTERNS = [
+    r'(JANUARY|FEBRUARY|MARCH|APRIL|MAY|JUNE|JULY|AUGUST|SEPTEMBER|OCTOBER|NOVEMBER|DECEMBER)\s+(\d{4})',
+    r'(January|February|March|April|May|June|July|August|September|October|November|December)\s+(\d{4})',
+]
+LEGACY_DATA_PATTERNS = {
+    'headline': [r'Manufacturing\s+PMI.*?(\d+\.?\d*)%?', r'PMI.*?registered\s+(\d+\.?\d*)%?',
+                 r'PMI.*?(\d+\.?\d*)%?\s+percent', r'PMI\s*[:\-]?\s*(\d+\.?\d*)'],
+    'new_orders': [r'New\s+Orders.*?(\d+\.?\d*)%?', r'New\s+Orders\s+Index.*?(\d+\.?\d*)%?'],
+    'production': [r'Production.*?(\d+\.?\d*)%?', r'Production\s+Index.*?(\d+\.?\d*)%?'],
+    'employment': [r'Employment.*?(\d+\.?\d*)%?', r'Employment\s+Index.*?(\d+\.?\d*)%?'],
+    'supplier_deliveries': [r'Supplier\s+Deliveries.*?(\d+\.?\d*)%?', r'Deliveries.*?(\d+\.?\d*)%?'],
+    'inventories': [r'Inventories.*?(\d+\.?\d*)%?', r'Inventories\s+Index.*?(\d+\.?\d*)%?'],
+    'customers_inventories': [r'Customers.*?Inventories.*?(\d+\.?\d*)%?', r'Customer.*?Inventories.*?(\d+\.?\d*)%?'],
+    'prices_paid': [r'Prices.*?(\d+\.?\d*)%?', r'Prices\s+Paid.*?(\d+\.?\d*)%?'],
+    'order_backlog': [r'Backlog\s+of\s+Orders.*?(\d+\.\d+)', r'Order\s+Backlog.*?(\d+\.\d+)', r'Backlog.*?(\d+\.\d+)'],
+    'exports': [r'Exports.*?(\d+\.?\d*)%?', r'New\s+Export\s+Orders.*?(\d+\.?\d*)%?'],
+    'imports': [r'Imports.*?(\d+\.?\d*)%?'],
+}
+LEGACY_MONTHS = {'January': 1, 'February': 2, 'March': 3, 'April': 4, 'May': 5, 'June': 6, 'July': 7,
+                 'August': 8, 'September': 9, 'October': 10, 'November': 11, 'December': 12}
+
+def legacy_parse_report(content: bytes) -> dict | None:
+    """
+    Прежний путь get_ism_manufacturing_data: поиск по всему тексту страницы.
+    """
+    all_text = BeautifulSoup(content, 'html.parser').get_text()
+    report_date = None
+    for pattern in LEGACY_DATE_PATTERNS:
+        match = re.search(pattern, all_text)
+        if match:
+            report_date = f"{int(match.group(2))}-{LEGACY_MONTHS[match.group(1).capitalize()]:02d}-01"
+            break
+    if report_date is None:
+        return None
+    values = {}
+    for category, patterns in LEGACY_DATA_PATTERNS.items():
+        for pattern in patterns:
+            match = re.search(pattern, all_text, re.IGNORECASE)
+            if match and 0 <= float(match.group(1)) <= 100:
+                values[category] = float(match.group(1))
+                break
+    return {'date': report_date, 'values': values} if values else None
+
+def _best_time(func, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+def run_benchmark(repeat: int = 20):
+    print("Синтетические страницы: времена не переносятся на реальные страницы ismworld.org")
+    print(f"{'Страница':<20} | {'прежний, мс':>11} | {'таблица, мс':>11} | {'отношение':>9}")
+    print("-" * 62)
+    # Прежний путь знал только Manufacturing
+    for name, content, _ in [f for f in load_fixtures() if f[2]["report"] == "manufacturing"]:
+        legacy = _best_time(lambda: legacy_parse_report(content), repeat)
+        table = _best_time(lambda: parse_ism_report(content), repeat)
+        print(f"{name:<20} | {legacy * 1000:>11.2f} | {table * 1000:>11.2f} | {legacy / table:>8.1f}x")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Бенчмарк разбора страниц отчёта ISM")
+    parser.add_argument("--repeat", type=int, default=20, help="Повторов (берётся лучшее время)")
+    run_benchmark(parser.parse_args().repeat)
@@ -0,0 +1,78 @@
+# tests/bench_parquet_snapshot.py
+# Бенчмарк Parquet-снимка на синтетической БД (1 млн строк): экспорт и импорт,
+# размер снимка (zstd) против SQLite, чтение рядов DAO из SQLite (без кэша) против
+# memory-mapped чтения из снимка. Нужен pyarrow.
+# Использование: python tests/bench_parquet_snapshot.py [--rows N] [--repeat N]
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import dao as dao_module
+import database_setup
+from bench_read_path import CATEGORIES, _best_time, build_database
+from parquet_store import export_parquet, import_parquet
+
+def dir_size(path: Path) -> int:
+    return sum(p.stat().st_size for p in path.rglob("*") if p.is_file())
+
+def run_benchmark(rows: int = 1_000_000, repeat: int = 3):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = Path(tmp_dir) / "bench.db"
+        database_setup.DB_PATH = db_path
+        dao_module.DB_PATH = db_path
+        database_setup.setup_database()
+        dao = dao_module.IndicatorDAO(cache=False)
+        indicator_id = build_database(dao, rows)
+
+        root = Path(tmp_dir) / "parquet"
+        started = time.perf_counter()
+        export_parquet(["bench_read"], root, dao=dao)
+        export_time = time.perf_counter() - started
+        started = time.perf_counter()
+        import_parquet(["bench_read"], root, dao=dao)
+        import_time = time.perf_counter() - started
+        export_parquet(["bench_read"], root, dao=dao)
+        dao.conn.execute("VACUUM")
+        print(f"\nЭкспорт {rows} строк: {export_time:.2f}с ({rows / export_time:,.0f} строк/с), "
+              f"импорт: {import_time:.2f}с ({rows / import_time:,.0f} строк/с)")
+        print(f"Размер: SQLite {db_path.stat().st_size / 2 ** 20:.1f} МБ, "
+              f"снимок {dir_size(root) / 2 ** 20:.1f} МБ")
+
+        snapshot = dao_module.IndicatorDAO(cache=False, snapshot_dir=root)
+        cases = [
+            (f"get_indicator_values ({rows} строк)",
+             lambda: dao.get_indicator_values(indicator_id),
+             lambda: snapshot.get_indicator_values(indicator_id)),
+            (f"get_indicator_values_by_category ({rows // CATEGORIES} строк)",
+             lambda: dao.get_indicator_values_by_category(indicator_id, "c042"),
+             lambda: snapshot.get_indicator_values_by_category(indicator_id, "c042")),
+            ("get_indicator_values за год (все категории)",
+             lambda: dao.get_indicator_values(indicator_id, start="1990-01-01", end="1990-12-31"),
+             lambda: snapshot.get_indicator_values(indicator_id, start="1990-01-01", end="1990-12-31")),
+            ("get_series_arrays одной категории за год",
+             lambda: dao.get_series_arrays(indicator_id, "c042", start="1990-01-01", end="1990-12-31"),
+             lambda: snapshot.get_series_arrays(indicator_id, "c042", start="1990-01-01", end="1990-12-31")),
+        ]
+        print(f"{'Чтение':<50} | {'SQLite, мс':>10} | {'Parquet, мс':>11} | {'ускорение':>9}")
+        print("-" * 90)
+        for name, sqlite_read, snapshot_read in cases:
+            sqlite_time = _best_time(sqlite_read, repeat)
+            snapshot_time = _best_time(snapshot_read, repeat)
+            print(f"{name:<50} | {sqlite_time * 1000:>10.1f} | {snapshot_time * 1000:>11.1f} | "
+                  f"{sqlite_time / snapshot_time:>8.1f}x")
+        assert snapshot._snapshot.stats["stale"] == 0
+        snapshot.close()
+        dao.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Бенчмарк Parquet-снимка хранилища")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Размер синтетической БД")
+    parser.add_argument("--repeat", type=int, default=3, help="Повторов (берётся лучшее время)")
+    args = parser.parse_args()
+    run_benchmark(args.rows, args.repeat)
@@ -0,0 +1,100 @@
+# tests/bench_read_path.py
+# Бенчмарк чтения рядов на синтетической БД (1 млн строк): прежний путь
+# (pd.read_sql_query + pd.to_datetime по текстовым датам из indicator_values_text) против чтения в NumPy (get_series_arrays).
+# Использование: python tests/bench_read_path.py [--rows N] [--repeat N]
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import dao as dao_module
+import database_setup
+
+CATEGORIES = 100
+
+def legacy_get_indicator_values(dao, indicator_id):
+    sql = "SELECT date, value FROM indicator_values_text WHERE indicator_id = ? ORDER BY date"
+    df = pd.read_sql_query(sql, dao.conn, params=(indicator_id,))
+    df['date'] = pd.to_datetime(df['date'])
+    return df
+
+def legacy_get_indicator_values_by_category(dao, indicator_id, category):
+    query = "SELECT date, value, category FROM indicator_values_text WHERE indicator_id = ? AND category = ? ORDER BY date DESC"
+    df = pd.read_sql_query(query, dao.conn, params=(indicator_id, category))
+    df['date'] = pd.to_datetime(df['date'])
+    return df.set_index('date')
+
+def build_database(dao, rows: int) -> int:
+    """
+    Один индикатор: CATEGORIES категорий по rows // CATEGORIES дневных дат.
+    """
+    indicator_id = dao.add_indicator("bench_read", "Bench", "bench", "")
+    dates = pd.date_range("1970-01-01", periods=rows // CATEGORIES, freq="D")
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        "date": np.tile(dates, CATEGORIES),
+        "category": np.repeat([f"c{i:03d}" for i in range(CATEGORIES)], len(dates)),
+        "value": rng.normal(100, 10, len(dates) * CATEGORIES),
+    })
+    dao.add_indicator_values_bulk(indicator_id, df, category_col="category")
+    return indicator_id
+
+def _best_time(func, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+def run_benchmark(rows: int = 1_000_000, repeat: int = 3):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = Path(tmp_dir) / "bench.db"
+        database_setup.DB_PATH = db_path
+        dao_module.DB_PATH = db_path
+        database_setup.setup_database()
+        dao = dao_module.IndicatorDAO()
+
+        started = time.perf_counter()
+        indicator_id = build_database(dao, rows)
+        print(f"\nБД на {rows} строк построена за {time.perf_counter() - started:.1f}с")
+
+        # Одинаковый результат у обоих путей
+        pd.testing.assert_frame_equal(dao.get_indicator_values(indicator_id).sort_values(["date", "value"],
+                                                                                          ignore_index=True),
+                                      legacy_get_indicator_values(dao, indicator_id).sort_values(["date", "value"],
+                                                                                                 ignore_index=True))
+
+        cases = [
+            (f"get_indicator_values ({rows} строк)",
+             lambda: legacy_get_indicator_values(dao, indicator_id),
+             lambda: dao.get_indicator_values(indicator_id)),
+            (f"get_indicator_values_by_category ({rows // CATEGORIES} строк)",
+             lambda: legacy_get_indicator_values_by_category(dao, indicator_id, "c042"),
+             lambda: dao.get_indicator_values_by_category(indicator_id, "c042")),
+            ("get_series_arrays (без DataFrame)",
+             lambda: legacy_get_indicator_values(dao, indicator_id),
+             lambda: dao.get_series_arrays(indicator_id)),
+        ]
+        print(f"{'Чтение':<50} | {'прежний, мс':>11} | {'NumPy, мс':>9} | {'ускорение':>9}")
+        print("-" * 90)
+        for name, legacy, fast in cases:
+            legacy_time = _best_time(legacy, repeat)
+            fast_time = _best_time(fast, repeat)
+            print(f"{name:<50} | {legacy_time * 1000:>11.1f} | {fast_time * 1000:>9.1f} | "
+                  f"{legacy_time / fast_time:>8.1f}x")
+        dao.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Бенчмарк чтения рядов из БД")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Размер синтетической БД")
+    parser.add_argument("--repeat", type=int, default=3, help="Повторов (берётся лучшее время)")
+    args = parser.parse_args()
+    run_benchmark(args.rows, args.repeat)
@@ -0,0 +1,87 @@
+# tests/bench_treasury_parser.py
+# Микробенчмарк парсинга страниц Treasury: прежний путь (BeautifulSoup -> str(table) -> pd.read_html)
+# против потокового извлечения таблицы lxml в NumPy-столбцы.
+# Использование: python tests/bench_treasury_parser.py [--repeat N]
+import argparse
+import os
+import sys
+import time
+from datetime import date
+from io import StringIO
+from pathlib import Path
+
+import pandas as pd
+from bs4 import BeautifulSoup
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from collectors.treasury_parser import _extract_table_columns, _parse_feed, _parse_month, reduce_to_fridays
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures" / "treasury"
+
+def load_fixtures() -> list[tuple[str, int, int, bytes]]:
+    """
+    Страницы-образцы в разметке TextView: (имя, год, месяц, байты).
+    """
+    pages = []
+    for path in sorted(FIXTURES_DIR.glob("*.html")):
+        year_month = path.stem.rsplit("_", 1)[1]
+        pages.append((path.name, int(year_month[:4]), int(year_month[4:]), path.read_bytes()))
+    return pages
+
+def legacy_parse_month(content: bytes, year: int, month: int) -> pd.DataFrame | None:
+    """
+    Прежний путь: два полных разбора страницы, melt и to_numeric в pandas.
+    """
+    soup = BeautifulSoup(content.decode("utf-8"), "lxml")
+    table = soup.find("table")
+    if table is None:
+        return None
+    df = pd.read_html(StringIO(str(table)))[0]
+    date_col = next((c for c in df.columns if str(c).strip().lower() == "date"), None)
+    df = df.rename(columns={date_col: "date"}).copy()
+    df["date"] = pd.to_datetime(df["date"], format="%m/%d/%Y", errors="coerce")
+    df = df.dropna(subset=["date"])
+    long_df = pd.melt(df, id_vars=["date"], value_vars=[c for c in df.columns if c != "date"],
+                      var_name="category", value_name="value")
+    long_df.dropna(subset=["value"], inplace=True)
+    long_df["value"] = pd.to_numeric(long_df["value"], errors="coerce")
+    long_df.dropna(subset=["value"], inplace=True)
+    return reduce_to_fridays(long_df)
+
+def _best_time(func, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+def run_benchmark(repeat: int = 20):
+    pages = load_fixtures()
+    print(f"{'Страница':<45} | {'прежний, мс':>11} | {'lxml, мс':>9} | {'извлечение, мс':>14} | {'ускорение':>9}")
+    print("-" * 100)
+    for name, year, month, content in pages:
+        legacy = _best_time(lambda: legacy_parse_month(content, year, month), repeat)
+        streaming = _best_time(lambda: reduce_to_fridays(_parse_month(content, year, month)), repeat)
+        extract = _best_time(lambda: _extract_table_columns(content), repeat)
+        print(f"{name:<45} | {legacy * 1000:>11.2f} | {streaming * 1000:>9.2f} | {extract * 1000:>14.2f} | "
+              f"{legacy / streaming:>8.1f}x")
+
+    # Годовой файл против страниц TextView за те же месяцы
+    print()
+    pages = {(year, month): content for _, year, month, content in pages}
+    for feed_name, feed_format, months in (
+            ("daily_treasury_yield_curve_2024.csv", "csv", [(2024, 1), (2024, 7)]),
+            ("daily_treasury_real_yield_curve_2023.xml", "xml", [(2023, 12)])):
+        content = (FIXTURES_DIR / feed_name).read_bytes()
+        start_date = date(months[0][0], months[0][1], 1)
+        feed = _best_time(lambda: reduce_to_fridays(_parse_feed(content, feed_format, start_date)), repeat)
+        html = _best_time(lambda: [reduce_to_fridays(_parse_month(pages[m], *m)) for m in months], repeat)
+        print(f"{feed_name:<45} | {len(months)} стр. HTML: {html * 1000:.2f} мс, "
+              f"файл: {feed * 1000:.2f} мс, запросов: 1 вместо {len(months)}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Бенчмарк парсинга страниц Treasury")
+    parser.add_argument("--repeat", type=int, default=20, help="Повторов на страницу (берётся лучшее время)")
+    run_benchmark(parser.parse_args().repeat)
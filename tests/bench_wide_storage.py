@@ -0,0 +1,90 @@
+# tests/bench_wide_storage.py
+# Бенчмарк широкого хранения (values_<id>) против long-таблицы indicator_values:
+# задержка чтения готовой сводной таблицы, размер в БД и цена записи с триггерами.
+# Использование: python tests/bench_wide_storage.py [--repeat N]
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import dao as dao_module
+import database_setup
+
+# Синтетические ряды размером с реальные: (имя, категории, даты)
+DATASETS = [
+    ("yield_curve", ["1 Mo", "2 Mo", "3 Mo", "4 Mo", "6 Mo", "1 Yr", "2 Yr", "3 Yr", "5 Yr", "7 Yr",
+                     "10 Yr", "20 Yr", "30 Yr"], pd.date_range("2000-01-07", "2025-12-31", freq="W-FRI")),
+    ("ism_manufacturing", ["PMI", "New Orders", "Production", "Employment", "Supplier Deliveries",
+                           "Inventories", "Customers' Inventories", "Prices", "Backlog of Orders",
+                           "New Export Orders", "Imports"], pd.date_range("1948-01-01", "2025-12-01", freq="MS")),
+    ("building_permits", ["total", "single_family", "two_to_four", "five_plus"],
+     pd.date_range("1960-01-01", "2025-12-01", freq="MS")),
+]
+
+def make_long(categories, dates) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({
+        "date": np.tile(dates, len(categories)),
+        "category": np.repeat(categories, len(dates)),
+        "value": rng.normal(50, 5, len(dates) * len(categories)).round(2),
+    })
+
+def table_bytes(conn, names) -> int:
+    marks = ", ".join("?" * len(names))
+    return conn.execute(f"SELECT COALESCE(SUM(pgsize), 0) FROM dbstat WHERE name IN ({marks})", names).fetchone()[0]
+
+def _best_time(func, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+def run_benchmark(repeat: int = 10):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = Path(tmp_dir) / "bench.db"
+        database_setup.DB_PATH = db_path
+        dao_module.DB_PATH = db_path
+        database_setup.setup_database()
+        dao = dao_module.IndicatorDAO()
+
+        print(f"\n{'Индикатор':<18} | {'строк long':>10} | {'long+pivot, мс':>14} | {'wide, мс':>8} | "
+              f"{'запись long, мс':>15} | {'запись +wide, мс':>16}")
+        print("-" * 100)
+        wide_tables = []
+        for name, categories, dates in DATASETS:
+            long_df = make_long(categories, dates)
+            plain_id = dao.add_indicator(f"{name}_long", name, "bench", "")
+            wide_id = dao.add_indicator(f"{name}_wide", name, "bench", "")
+            dao.enable_wide_storage(wide_id)
+            write_long = _best_time(lambda: dao.add_indicator_values_bulk(plain_id, long_df, category_col="category",
+                                                                          update=True), 1)
+            write_wide = _best_time(lambda: dao.add_indicator_values_bulk(wide_id, long_df, category_col="category",
+                                                                          update=True), 1)
+            wide_tables.append(f"values_{wide_id}")
+
+            read_long = _best_time(lambda: dao.get_indicator_values_wide(plain_id), repeat)
+            read_wide = _best_time(lambda: dao.get_indicator_values_wide(wide_id), repeat)
+            print(f"{name:<18} | {len(long_df):>10} | {read_long * 1000:>14.2f} | {read_wide * 1000:>8.2f} | "
+                  f"{write_long * 1000:>15.1f} | {write_wide * 1000:>16.1f}")
+
+        # Long-таблица хранит обе копии (plain + wide-индикаторы) — делим пополам
+        long_bytes = table_bytes(dao.conn, ["indicator_values", "sqlite_autoindex_indicator_values_1",
+                                            "idx_values_indicator_category_date"]) // 2
+        wide_bytes = table_bytes(dao.conn, wide_tables)
+        print(f"\nРазмер: long (таблица + индексы) {long_bytes / 1024:.0f} КБ, "
+              f"wide {wide_bytes / 1024:.0f} КБ ({long_bytes / max(wide_bytes, 1):.1f}x меньше)")
+        dao.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Бенчмарк широкого хранения индикаторов")
+    parser.add_argument("--repeat", type=int, default=10, help="Повторов чтения (берётся лучшее время)")
+    run_benchmark(parser.parse_args().repeat)
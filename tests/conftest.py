@@ -0,0 +1,17 @@
+# tests/conftest.py
+# Тесты направляют DAO во временную БД (make_dao, test_database_setup) — после каждого
+# теста исходные пути восстанавливаются, чтобы следующий тест не писал в чужую БД.
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import dao as dao_module
+import database_setup
+
+@pytest.fixture(autouse=True)
+def restore_db_path(monkeypatch):
+    monkeypatch.setattr(database_setup, "DB_PATH", database_setup.DB_PATH)
+    monkeypatch.setattr(dao_module, "DB_PATH", dao_module.DB_PATH)
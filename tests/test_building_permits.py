@@ -31,7 +31,7 @@ print("Categories:\n", cats)
 df = pd.read_sql_query(
     """
     SELECT date, category, value
-    FROM indicator_values
+    FROM indicator_values_text
     WHERE indicator_id = ?
     ORDER BY date DESC, category
     LIMIT 24
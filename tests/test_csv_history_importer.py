@@ -0,0 +1,232 @@
+# tests/test_csv_history_importer.py
+# Общий импорт исторических CSV: конфигурации ISM, Michigan и Building Permits на файлах из data/.
+import json
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from test_dao_upsert import make_dao
+from collectors import ism_historical_loader, ism_services_historical_loader, michigan_historical_loader
+from history_importers import import_building_permits_history
+from history_importers.csv_history_importer import checkpoint_path, import_history_csv, read_history_csv
+
+DATA_DIR = Path(__file__).parent.parent / "data"
+CASES = [
+    (DATA_DIR / "ism_manufacturing_historical.csv", ism_historical_loader.IMPORT_CONFIG),
+    (DATA_DIR / "michigan_historical.csv", michigan_historical_loader.IMPORT_CONFIG),
+    (DATA_DIR / "bps_history.csv", import_building_permits_history.IMPORT_CONFIG),
+    (DATA_DIR / "ism_nmi_historical.csv", ism_services_historical_loader.IMPORT_CONFIG),
+]
+
+def test_read_matches_csv_cells():
+    for csv_path, config in CASES:
+        long_df, rejected = read_history_csv(csv_path, config)
+        raw = pd.read_csv(csv_path, **config.get("read_csv", {}))
+        assert len(long_df) + len(rejected) == int(raw.drop(columns=[config["date_column"]]).notna().sum().sum())
+        assert set(long_df["category"]) == set(config["columns"].values()) & set(long_df["category"])
+        assert long_df["category"].notna().all() and long_df["date"].notna().all()
+
+    # Первая строка ISM: 10/01/13,56.6,61.3,...
+    long_df, _ = read_history_csv(CASES[0][0], CASES[0][1])
+    first = long_df[long_df["date"] == "2013-10-01"].set_index("category")["value"]
+    assert first["headline"] == 56.6 and first["new_orders"] == 61.3 and first["imports"] == 55.5
+
+    # ISM Services: 0.0 (пропуск в архиве) отбрасывается проверкой диапазона
+    _, rejected = read_history_csv(CASES[3][0], CASES[3][1])
+    assert rejected[["category", "value"]].values.tolist() == [["exports", 0.0]]
+
+def test_range_and_date_validation():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        csv_path = Path(tmp_dir) / "bad.csv"
+        csv_path.write_text(" Month ,PMI,Extra\n10/01/13,56.6,1\n11/01/13,150,2\nbad,50.0,3\n12/01/13,,4\n")
+        config = dict(ism_historical_loader.IMPORT_CONFIG)
+        long_df, rejected = read_history_csv(csv_path, config)
+        assert long_df[["category", "value"]].values.tolist() == [["headline", 56.6]]
+        assert sorted(rejected["value"].tolist()) == [50.0, 150.0]
+
+def test_import_insert_and_overwrite():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        dao = make_dao(tmp_dir)
+        csv_path, config = CASES[2]
+        stats = import_history_csv(csv_path, config, dao=dao)
+        assert stats["inserted"] == stats["rows"] > 0 and stats["rejected"] == 0
+        assert import_history_csv(csv_path, config, dao=dao)["ignored"] == stats["rows"]
+
+        indicator_id = dao.add_indicator(**config["indicator"])
+        dao.add_indicator_value(indicator_id, "1990-01-01", 1.0, "stale")
+        replaced = import_history_csv(csv_path, config, overwrite=True, dao=dao)
+        assert replaced["deleted"] == stats["rows"] + 1 and replaced["inserted"] == stats["rows"]
+        values = dao.get_indicator_values(indicator_id)
+        assert len(values) == stats["rows"]
+        watermarks = dao.get_watermarks(indicator_id)
+        assert watermarks["stale"]["row_count"] == 0 and watermarks["stale"]["last_date"] is None
+        assert watermarks["total"]["last_date"] == "2025-05-01"
+
+        assert import_history_csv(CASES[0][0], CASES[0][1], dry_run=True, dao=dao)["inserted"] == 0
+        assert dao.get_latest_indicator_date(dao.add_indicator(**CASES[0][1]["indicator"])) is None
+        dao.close()
+
+def test_delimiter_sniffing():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        csv_path = Path(tmp_dir) / "permits.csv"
+        csv_path.write_text("Date;Total;1 unit\nJan 1996;1387;1051\nFeb 1996;.;1085\n")
+        long_df, rejected = read_history_csv(csv_path, import_building_permits_history.IMPORT_CONFIG)
+        assert long_df[["category", "value"]].values.tolist() == [["total", 1387.0], ["1 unit", 1051.0],
+                                                                  ["1 unit", 1085.0]]
+        assert rejected.empty
+
+def test_chunked_import_matches_single_pass():
+    csv_path, config = CASES[0]
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        dao = make_dao(tmp_dir)
+        expected = import_history_csv(csv_path, config, dao=dao)
+        indicator_id = dao.add_indicator(**config["indicator"])
+        single = dao.get_indicator_values_wide(indicator_id)
+
+        stats = import_history_csv(csv_path, config, overwrite=True, dao=dao, chunk_rows=40)
+        assert stats["chunks"] == 4 and stats["resumed_from"] == 0
+        assert stats["rows"] == stats["inserted"] == expected["rows"] and stats["deleted"] == expected["rows"]
+        pd.testing.assert_frame_equal(dao.get_indicator_values_wide(indicator_id), single)
+        assert not checkpoint_path(csv_path).exists()
+        dao.close()
+
+def test_chunked_import_resumes_from_checkpoint():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        csv_path = Path(tmp_dir) / "bps_history.csv"
+        csv_path.write_bytes(CASES[2][0].read_bytes())
+        config = CASES[2][1]
+        dao = make_dao(tmp_dir)
+
+        # Сбой на третьем куске: первые два уже записаны и отмечены в контрольной точке
+        bulk = dao.add_indicator_values_bulk
+        calls = []
+        def failing_bulk(*args, **kwargs):
+            calls.append(1)
+            if len(calls) == 2:
+                raise OSError("disk full")
+            return bulk(*args, **kwargs)
+        dao.add_indicator_values_bulk = failing_bulk
+        try:
+            import_history_csv(csv_path, config, overwrite=True, dao=dao, chunk_rows=100)
+            raise AssertionError("ожидался сбой")
+        except OSError:
+            pass
+        assert checkpoint_path(csv_path).exists()
+        indicator_id = dao.add_indicator(**config["indicator"])
+        assert len(dao.get_indicator_values(indicator_id)) == 2 * 100 * 4
+
+        # Продолжение: старые значения повторно не удаляются, итог — весь файл
+        stats = import_history_csv(csv_path, config, overwrite=True, dao=dao, chunk_rows=100)
+        assert stats["resumed_from"] == 200 and stats["chunks"] == 2
+        assert stats["rows"] == stats["inserted"] == 1412 and stats["deleted"] == 0
+        assert len(dao.get_indicator_values(indicator_id)) == 1412
+        assert not checkpoint_path(csv_path).exists()
+        dao.close()
+
+def test_chunked_resume_with_multiline_fields():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # Примечания в кавычках с переводами строк и пустые строки: строки файла не равны записям CSV
+        lines = ["Month,PMI,Notes"]
+        for n, month in enumerate(pd.date_range("2000-01-01", periods=30, freq="MS")):
+            note = f'"пересмотр\nот {month:%Y-%m}, ""prelim"""' if n % 3 == 0 else "ok"
+            lines.append(f"{month:%m/%d/%y},{50 + n / 10},{note}")
+            if n % 7 == 0:
+                lines.append("")
+        csv_path = Path(tmp_dir) / "ism_notes.csv"
+        csv_path.write_text("\n".join(lines) + "\n")
+        config = ism_historical_loader.IMPORT_CONFIG
+        expected, _ = read_history_csv(csv_path, config)
+        assert len(expected) == 30
+        dao = make_dao(tmp_dir)
+
+        bulk = dao.add_indicator_values_bulk
+        calls = []
+        def failing_bulk(*args, **kwargs):
+            calls.append(1)
+            if len(calls) == 3:
+                raise OSError("disk full")
+            return bulk(*args, **kwargs)
+        dao.add_indicator_values_bulk = failing_bulk
+        try:
+            import_history_csv(csv_path, config, overwrite=True, dao=dao, chunk_rows=7)
+            raise AssertionError("ожидался сбой")
+        except OSError:
+            pass
+        dao.add_indicator_values_bulk = bulk
+        state = json.loads(checkpoint_path(csv_path).read_text())
+        assert state["rows_done"] == 21
+        # Смещение указывает на начало следующей записи, а не в середину поля в кавычках
+        with open(csv_path, "rb") as f:
+            f.seek(state["offset"])
+            assert f.readline().startswith(b"10/01/01,52.1")
+
+        stats = import_history_csv(csv_path, config, overwrite=True, dao=dao, chunk_rows=7)
+        assert stats["resumed_from"] == 21 and stats["chunks"] == 2
+        assert stats["rows"] == stats["inserted"] == 30
+        indicator_id = dao.get_indicator_id(config["indicator"]["name"])
+        values = dao.get_indicator_values_by_category(indicator_id, "headline").sort_values("date")
+        assert values["value"].tolist() == expected["value"].tolist()
+        assert not checkpoint_path(csv_path).exists()
+        dao.close()
+
+def test_diff_import_writes_only_delta():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        csv_path, config = CASES[2]
+        dao = make_dao(tmp_dir)
+        base = import_history_csv(csv_path, config, dao=dao)
+        indicator_id = dao.add_indicator(**config["indicator"])
+        # Метка «старых» строк: разностный импорт не должен их переписывать
+        dao.conn.execute("UPDATE indicator_values SET created_at = 0 WHERE indicator_id = ?", (indicator_id,))
+        dao.conn.commit()
+
+        # Одно изменённое значение, одно пропавшее и одна новая дата
+        lines = csv_path.read_text().splitlines()
+        assert lines[1].startswith("Jan 1996,1387,1051") and lines[2].startswith("Feb 1996,1420,1085")
+        lines[1] = lines[1].replace("1387", "1400", 1)
+        lines[2] = lines[2].replace("1085", ".", 1)
+        lines.insert(1, "Dec 1995,1300,,,")
+        changed_path = Path(tmp_dir) / "bps_history.csv"
+        changed_path.write_text("\n".join(lines) + "\n")
+
+        preview = import_history_csv(changed_path, config, dry_run=True, diff=True, dao=dao)
+        assert (preview["inserted"], preview["updated"], preview["deleted"]) == (1, 1, 1)
+        assert dao.conn.execute("SELECT COUNT(*) FROM indicator_values WHERE created_at != 0").fetchone()[0] == 0
+
+        stats = import_history_csv(changed_path, config, diff=True, dao=dao)
+        assert (stats["inserted"], stats["updated"], stats["deleted"]) == (1, 1, 1)
+        touched = dao.conn.execute("SELECT COUNT(*) FROM indicator_values WHERE created_at != 0").fetchone()[0]
+        assert touched == 2
+        values = dao.get_indicator_values_wide(indicator_id)
+        assert len(dao.get_indicator_values(indicator_id)) == base["rows"]
+        assert values.loc["1996-01-01", "total"] == 1400 and values.loc["1995-12-01", "total"] == 1300
+        assert pd.isna(values.loc["1996-02-01", "1 unit"])
+
+        # Повтор — пустая разница; новый индикатор в dry run — только вставки и без регистрации
+        assert import_history_csv(changed_path, config, diff=True, dao=dao)["inserted"] == 0
+        ism_path, ism_config = CASES[0]
+        preview = import_history_csv(ism_path, ism_config, dry_run=True, diff=True, dao=dao)
+        assert preview["inserted"] == preview["rows"] and preview["updated"] == preview["deleted"] == 0
+        assert dao.get_indicator_id(ism_config["indicator"]["name"]) is None
+        try:
+            import_history_csv(ism_path, ism_config, diff=True, chunk_rows=10, dao=dao)
+            raise AssertionError("ожидалась ошибка")
+        except ValueError:
+            pass
+        dao.close()
+
+if __name__ == "__main__":
+    test_read_matches_csv_cells()
+    test_range_and_date_validation()
+    test_import_insert_and_overwrite()
+    test_delimiter_sniffing()
+    test_chunked_import_matches_single_pass()
+    test_chunked_import_resumes_from_checkpoint()
+    test_chunked_resume_with_multiline_fields()
+    test_diff_import_writes_only_delta()
+    print("CSV history importer tests passed")
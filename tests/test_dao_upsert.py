@@ -0,0 +1,550 @@
+# tests/test_dao_upsert.py
+# Массовая запись и запись с учётом ревизий во временную БД.
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import dao as dao_module
+import database_setup
+from collectors.treasury_parser import reduce_to_fridays
+
+def make_dao(tmp_dir, concurrent=False):
+    # Переключает DB_PATH модулей на tmp_dir; под pytest прежние пути возвращает
+    # фикстура restore_db_path (tests/conftest.py)
+    db_path = Path(tmp_dir) / "test.db"
+    database_setup.DB_PATH = db_path
+    dao_module.DB_PATH = db_path
+    database_setup.setup_database()
+    return dao_module.IndicatorDAO(concurrent=concurrent)
+
+def test_bulk_insert_counts():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        dao = make_dao(tmp_dir)
+        indicator_id = dao.add_indicator("test_bulk", "Test", "Test", "Test")
+        df = pd.DataFrame({
+            "date": pd.to_datetime(["2024-01-01", "2024-02-01", "2024-02-01"]),
+            "category": ["a", "a", "b"],
+            "value": [1.0, 2.0, None],
+        })
+        assert dao.add_indicator_values_bulk(indicator_id, df, category_col="category") == \
+            {"inserted": 2, "ignored": 0, "updated": 0}
+        assert dao.add_indicator_values_bulk(indicator_id, df, category_col="category", chunk_size=1) == \
+            {"inserted": 0, "ignored": 2, "updated": 0}
+        revised = pd.DataFrame({
+            "date": pd.to_datetime(["2024-01-01", "2024-02-01", "2024-03-01"]),
+            "category": ["a", "a", "a"],
+            "value": [1.0, 2.5, 3.0],
+        })
+        assert dao.add_indicator_values_bulk(indicator_id, revised, category_col="category", update=True) == \
+            {"inserted": 1, "ignored": 1, "updated": 1}
+        assert dao.get_indicator_values_by_category(indicator_id, "a")["value"].tolist() == [3.0, 2.5, 1.0]
+        dao.close()
+
+def test_upsert_reports_revisions():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        dao = make_dao(tmp_dir)
+        indicator_id = dao.add_indicator("test_gdp", "Test", "Test", "Test")
+        first = pd.DataFrame({"date": pd.to_datetime(["2024-01-01", "2024-04-01"]), "value": [100.0, 101.0]})
+        report = dao.upsert_indicator_values(indicator_id, first)
+        assert (report["inserted"], report["updated"], report["unchanged"]) == (2, 0, 0)
+
+        revised = pd.DataFrame({
+            "date": pd.to_datetime(["2024-01-01", "2024-04-01", "2024-07-01"]),
+            "value": [100.005, 101.5, 102.0],
+        })
+        report = dao.upsert_indicator_values(indicator_id, revised, tolerance=0.01)
+        assert (report["inserted"], report["updated"], report["unchanged"]) == (1, 1, 1)
+        assert report["revisions"].iloc[0]["date"] == "2024-04-01"
+        assert report["revisions"].iloc[0]["change"] == 0.5
+
+        values = dao.get_indicator_values(indicator_id)
+        assert values["value"].tolist() == [100.0, 101.5, 102.0]
+        dao.close()
+
+def test_values_as_of_vintages():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        dao = make_dao(tmp_dir)
+        indicator_id = dao.add_indicator("test_vintages", "Test", "Test", "Test")
+        dates = pd.to_datetime(["2024-01-01", "2024-04-01"])
+        dao.upsert_indicator_values(indicator_id, pd.DataFrame({"date": dates, "value": [100.0, 101.0]}),
+                                    as_of="2024-05-01")
+        dao.upsert_indicator_values(indicator_id, pd.DataFrame({"date": dates, "value": [100.0, 103.0]}),
+                                    as_of="2024-06-01")
+
+        assert dao.get_values_as_of(indicator_id, "2024-04-30").empty
+        assert dao.get_values_as_of(indicator_id, "2024-05-15")["value"].tolist() == [100.0, 101.0]
+        latest = dao.get_values_as_of(indicator_id, "2024-06-01")
+        assert latest["value"].tolist() == [100.0, 103.0]
+        assert latest["as_of"].tolist() == ["2024-05-01", "2024-06-01"]
+        dao.close()
+
+def test_values_as_of_is_read_only():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        dao = make_dao(tmp_dir, concurrent=True)
+        indicator_id = dao.add_indicator("test_as_of_read", "Test", "Test", "Test")
+        dao.add_indicator_values_bulk(indicator_id, pd.DataFrame({"date": pd.to_datetime(["2024-01-01", "2024-02-01"]),
+                                                                  "value": [1.0, 2.0]}))
+        today = pd.Timestamp.now().strftime("%Y-%m-%d")
+        writer = dao_module.get_writer()
+        jobs, changes = writer.stats["jobs"], dao.conn.total_changes
+
+        # Индикатор без версий читается из indicator_values: значение известно со дня записи
+        assert dao.get_values_as_of(indicator_id, "2020-01-01").empty
+        current = dao.get_values_as_of(indicator_id, today, category="")
+        assert current["value"].tolist() == [1.0, 2.0] and current["as_of"].tolist() == [today] * 2
+        assert (writer.stats["jobs"], dao.conn.total_changes) == (jobs, changes)
+        assert dao.conn.execute("SELECT COUNT(*) FROM indicator_value_vintages").fetchone()[0] == 0
+        dao.close()
+        dao_module.shutdown_writers()
+
+def test_vintages_follow_every_write_path():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        dao = make_dao(tmp_dir)
+        indicator_id = dao.add_indicator("test_vintage_paths", "Test", "Test", "Test")
+        today = pd.Timestamp.now().strftime("%Y-%m-%d")
+        frame = lambda dates, values: pd.DataFrame({"date": pd.to_datetime(dates), "value": values})
+
+        # Массовая запись до версий, затем upsert (засевает версии из indicator_values)
+        dao.add_indicator_values_bulk(indicator_id, frame(["2024-01-01"], [100.0]))
+        dao.upsert_indicator_values(indicator_id, frame(["2024-04-01"], [101.0]), as_of="2024-05-01")
+        # Записи мимо upsert у индикатора с версиями тоже становятся версиями
+        dao.add_indicator_values_bulk(indicator_id, frame(["2024-04-01", "2024-07-01"], [102.0, 104.0]), update=True)
+        dao.sync_indicator_values(indicator_id, frame(["2024-01-01", "2024-04-01", "2024-07-01"], [100.0, 102.0, 104.5]))
+        dao.replace_indicator_values(indicator_id, frame(["2024-01-01", "2024-04-01", "2024-07-01"],
+                                                         [100.0, 102.0, 104.5]))
+        dao.add_indicator_value(indicator_id, "2024-10-01", 105.0)
+
+        assert dao.get_values_as_of(indicator_id, "2024-05-15")["value"].tolist() == [101.0]
+        latest = dao.get_values_as_of(indicator_id, today)
+        assert latest["value"].tolist() == [100.0, 102.0, 104.5, 105.0]
+        assert latest["as_of"].tolist() == [today] * 4
+        # Неизменённые значения (перезапись теми же числами) новых версий не дают
+        assert dao.conn.execute("SELECT COUNT(*) FROM indicator_value_vintages WHERE indicator_id = ?",
+                                (indicator_id,)).fetchone()[0] == 5
+        dao.close()
+
+def test_daily_curve_resampling():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        dao = make_dao(tmp_dir)
+        indicator_id = dao.add_indicator("test_curve", "Test", "Test", "Test")
+        # Рабочие дни 2024-03-25 .. 2024-05-03; 2024-03-29 (пятница) — выходной
+        dates = pd.bdate_range("2024-03-25", "2024-05-03").drop(pd.Timestamp("2024-03-29"))
+        curves = pd.DataFrame({"1 Mo": range(len(dates)), "10 Yr": [float(i) / 10 for i in range(len(dates))]},
+                              index=dates, dtype=float)
+        assert dao.add_daily_curve(indicator_id, curves.iloc[:20]) == {"inserted": 20, "updated": 0}
+        # Новый срок появляется как новый столбец, NaN не затирает сохранённое
+        curves["2 Mo"] = 5.0
+        update = curves.copy()
+        update.loc[dates[:20], "1 Mo"] = None
+        assert dao.add_daily_curve(indicator_id, update) == {"inserted": len(dates) - 20, "updated": 20}
+
+        daily = dao.get_daily_curve(indicator_id)
+        pd.testing.assert_frame_equal(daily, curves, check_names=False, check_freq=False)
+        assert dao.get_latest_daily_curve_date(indicator_id) == "2024-05-03"
+
+        long_df = curves.rename_axis("date").reset_index().melt(id_vars="date", var_name="category")
+        fridays = sorted(reduce_to_fridays(long_df)["date"].unique())
+        assert dao.get_daily_curve(indicator_id, freq="friday").index.tolist() == fridays
+        weeks = dao.get_daily_curve(indicator_id, freq="week").index.strftime("%Y-%m-%d").tolist()
+        assert weeks[:2] == ["2024-03-28", "2024-04-05"] and weeks[-1] == "2024-05-03"
+        months = dao.get_daily_curve(indicator_id, start="2024-04-01", freq="month").index.strftime("%Y-%m-%d")
+        assert months.tolist() == ["2024-04-30", "2024-05-03"]
+        dao.close()
+
+def test_wide_storage_stays_in_sync():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        dao = make_dao(tmp_dir)
+        indicator_id = dao.add_indicator("test_wide", "Test", "Test", "Test")
+        df = pd.DataFrame({"date": ["2024-01-01", "2024-01-01", "2024-02-01"],
+                           "category": ["a", "b", "a"], "value": [1.0, 2.0, 3.0]})
+        dao.add_indicator_values_bulk(indicator_id, df, category_col="category")
+        long_pivot = dao.get_indicator_values_wide(indicator_id)
+
+        dao.enable_wide_storage(indicator_id)
+        dao.enable_wide_storage(indicator_id)
+        pd.testing.assert_frame_equal(dao.get_indicator_values_wide(indicator_id), long_pivot)
+
+        # Новая категория, ревизия, одиночная запись и удаление в обход DAO
+        dao.add_indicator_values_bulk(indicator_id, pd.DataFrame({
+            "date": ["2024-02-01", "2024-03-01"], "category": ["c", "c"], "value": [5.0, 6.0]}), category_col="category")
+        dao.upsert_indicator_values(indicator_id, pd.DataFrame({"date": ["2024-01-01"], "category": ["a"],
+                                                                "value": [1.5]}), category_col="category")
+        dao.add_indicator_value(indicator_id, "2024-04-01", 7.0, "b")
+        dao.conn.execute("DELETE FROM indicator_values WHERE indicator_id = ? "
+                         "AND date = CAST(julianday('2024-03-01') - 2440587.5 AS INTEGER)", (indicator_id,))
+        dao.conn.commit()
+
+        wide = dao.get_indicator_values_wide(indicator_id)
+        assert wide.index.strftime("%Y-%m-%d").tolist() == ["2024-01-01", "2024-02-01", "2024-04-01"]
+        long_df = pd.read_sql_query("SELECT date, category, value FROM indicator_values_text WHERE indicator_id = ?",
+                                    dao.conn, params=(indicator_id,))
+        expected = long_df.pivot(index="date", columns="category", values="value")
+        expected.index = pd.to_datetime(expected.index)
+        pd.testing.assert_frame_equal(wide, expected, check_names=False)
+        dao.close()
+
+def test_numpy_read_path_matches_read_sql():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        dao = make_dao(tmp_dir)
+        indicator_id = dao.add_indicator("test_read", "Test", "Test", "Test")
+        dates = pd.date_range("1965-01-01", periods=40, freq="MS")
+        df = pd.DataFrame({"date": list(dates) * 2, "category": ["b"] * 40 + ["a"] * 40,
+                           "value": [float(i) for i in range(80)]})
+        dao.add_indicator_values_bulk(indicator_id, df, category_col="category")
+
+        dates_arr, values_arr = dao.get_series_arrays(indicator_id, "a")
+        assert dates_arr.dtype == "datetime64[D]" and values_arr.dtype == "float64"
+
+        expected = pd.read_sql_query("SELECT date, value FROM indicator_values_text WHERE indicator_id = ? "
+                                     "ORDER BY date, category", dao.conn, params=(indicator_id,))
+        expected["date"] = pd.to_datetime(expected["date"])
+        pd.testing.assert_frame_equal(dao.get_indicator_values(indicator_id), expected)
+
+        by_category = dao.get_indicator_values_by_category(indicator_id, "a")
+        assert by_category.index.is_monotonic_decreasing and by_category.index[0] == dates[-1]
+        assert by_category["value"].tolist() == [float(i) for i in range(79, 39, -1)]
+        assert (by_category["category"] == "a").all()
+        assert dao.get_indicator_values_by_category(indicator_id, "missing").empty
+        dao.close()
+
+def test_series_cache_hits_and_invalidation():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        dao = make_dao(tmp_dir)
+        indicator_id = dao.add_indicator("test_cache", "Test", "Test", "Test")
+        other_id = dao.add_indicator("test_cache_other", "Test", "Test", "Test")
+        df = pd.DataFrame({"date": ["2024-01-01", "2024-02-01", "2024-03-01"], "value": [1.0, 2.0, 3.0]})
+        dao.add_indicator_values_bulk(indicator_id, df)
+        dao.add_indicator_values_bulk(other_id, df)
+        before = dao.cache_stats()
+
+        first = dao.get_indicator_values(indicator_id)
+        first["value"] = 0.0  # изменение результата не портит кэш
+        assert dao.get_indicator_values(indicator_id)["value"].tolist() == [1.0, 2.0, 3.0]
+        assert dao.get_indicator_values(indicator_id, start="2024-02-01")["value"].tolist() == [2.0, 3.0]
+        dao.get_indicator_values_by_category(other_id)
+        dates, values = dao.get_series_arrays(indicator_id)
+        assert not values.flags.writeable
+        stats = dao.cache_stats()
+        assert (stats["hits"] - before["hits"], stats["misses"] - before["misses"]) == (2, 3)
+
+        # Запись в индикатор сбрасывает только его записи, в т.ч. для другого объекта DAO
+        other_dao = dao_module.IndicatorDAO()
+        other_dao.add_indicator_value(indicator_id, "2024-04-01", 4.0)
+        assert dao.get_indicator_values(indicator_id)["value"].tolist() == [1.0, 2.0, 3.0, 4.0]
+        dao.get_indicator_values_by_category(other_id)
+        stats_after = dao.cache_stats()
+        assert (stats_after["hits"] - stats["hits"], stats_after["misses"] - stats["misses"]) == (1, 1)
+        other_dao.close()
+
+        # Предел памяти: старые записи вытесняются
+        cache = dao_module.SeriesCache(max_bytes=2 * 16)
+        for n in range(3):
+            cache.put((n, None, None, None), (dates[:1].copy(), values[:1].copy()), cache.generation(n))
+        assert cache.get((0, None, None, None)) is None and cache.get((2, None, None, None)) is not None
+        assert cache.snapshot()["evictions"] == 1
+        dao.close()
+
+def test_watermarks_follow_writes():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        dao = make_dao(tmp_dir)
+        indicator_id = dao.add_indicator("test_watermarks", "Test", "Test", "Test")
+        df = pd.DataFrame({"date": ["2024-01-01", "2024-02-01", "2024-01-01"],
+                           "category": ["a", "a", "b"], "value": [1.0, 2.0, 3.0]})
+        dao.add_indicator_values_bulk(indicator_id, df, category_col="category")
+        dao.add_indicator_values_bulk(indicator_id, df, category_col="category")  # дубликаты не считаются
+        dao.upsert_indicator_values(indicator_id, pd.DataFrame({"date": ["2024-02-01"], "category": ["a"],
+                                                                "value": [2.5]}), category_col="category")
+        marks = dao.get_watermarks(indicator_id)
+        assert {c: (m["last_date"], m["row_count"]) for c, m in marks.items()} == \
+            {"a": ("2024-02-01", 2), "b": ("2024-01-01", 1)}
+        assert marks["a"]["last_fetch"] is not None
+        assert dao.get_latest_indicator_date(indicator_id) == "2024-02-01"
+
+        # Удаление последней даты в обход DAO: водяной знак откатывается на предыдущую
+        dao.conn.execute("DELETE FROM indicator_values WHERE indicator_id = ? AND category = 'a' "
+                         "AND date = CAST(julianday('2024-02-01') - 2440587.5 AS INTEGER)", (indicator_id,))
+        dao.conn.commit()
+        assert dao.get_watermark(indicator_id, "a")["last_date"] == "2024-01-01"
+        assert dao.get_watermark(indicator_id, "a")["row_count"] == 1
+        assert dao.get_latest_indicator_date(indicator_id) == "2024-01-01"
+
+        # Загрузка без новых данных отмечает только время
+        assert dao.get_watermark(indicator_id, "c") is None
+        dao.mark_fetched(indicator_id, ["c"])
+        mark = dao.get_watermark(indicator_id, "c")
+        assert mark["last_date"] is None and mark["row_count"] == 0 and mark["last_fetch"] is not None
+        dao.close()
+
+def stored_watermarks(conn, indicator_id):
+    return {row[0]: (row[1], row[2]) for row in conn.execute(
+        "SELECT category, last_date, row_count FROM indicator_watermarks WHERE indicator_id = ?", (indicator_id,))}
+
+def recount_watermarks(conn, indicator_id):
+    return {row[0]: (row[1], row[2]) for row in conn.execute(
+        "SELECT category, MAX(date), COUNT(*) FROM indicator_values WHERE indicator_id = ? GROUP BY category",
+        (indicator_id,))}
+
+def watermark_triggers(conn):
+    return {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'trigger' "
+                                           "AND name LIKE 'indicator_watermarks_%'")}
+
+def test_bulk_jobs_keep_watermarks_without_triggers():
+    # Массовые задания снимают построчные триггеры и ведут водяные знаки по диапазону дат
+    threshold = dao_module.WATERMARK_BULK_ROWS
+    dao_module.WATERMARK_BULK_ROWS = 2
+    try:
+        for concurrent in (False, True):
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                dao = make_dao(tmp_dir, concurrent=concurrent)
+                indicator_id = dao.add_indicator("test_bulk_marks", "Test", "Test", "Test")
+                dates = pd.date_range("2024-01-01", periods=6, freq="MS")
+                df = pd.DataFrame({"date": list(dates) * 2, "category": ["a"] * 6 + ["b"] * 6,
+                                   "value": range(12)})
+
+                def check():
+                    marks = stored_watermarks(dao.conn, indicator_id)
+                    expected = recount_watermarks(dao.conn, indicator_id)
+                    assert {c: m for c, m in marks.items() if m[1]} == expected
+                    assert all(m == (None, 0) for c, m in marks.items() if c not in expected)
+                    assert len(watermark_triggers(dao.conn)) == 3
+
+                dao.add_indicator_values_bulk(indicator_id, df.iloc[:8], category_col="category")
+                check()
+                dao.add_indicator_values_bulk(indicator_id, df.assign(value=df["value"] + 1),
+                                              category_col="category", update=True)
+                check()
+                dao.upsert_indicator_values(indicator_id, df.iloc[2:5].assign(value=-1.0), category_col="category")
+                check()
+                dao.sync_indicator_values(indicator_id, df.iloc[3:10], category_col="category")
+                check()
+                dao.replace_indicator_values(indicator_id, df.iloc[6:8], category_col="category")
+                check()
+                assert stored_watermarks(dao.conn, indicator_id) == {"a": (None, 0), "b": (19754, 2)}
+                fetched = dao.get_watermark(indicator_id, "b")["last_fetch"]
+                assert fetched is not None
+
+                # Прямой SQL по-прежнему ведут триггеры
+                with sqlite3.connect(database_setup.DB_PATH) as raw:
+                    raw.execute("INSERT INTO indicator_values (indicator_id, date, category, value) "
+                                "VALUES (?, 20000, 'a', 1.0)", (indicator_id,))
+                check()
+                assert dao.get_watermark(indicator_id, "a")["row_count"] == 1
+
+                # Упавшее задание откатывает и снятие триггеров
+                def failing(conn):
+                    with dao._range_watermarks(conn, indicator_id):
+                        conn.execute("DELETE FROM indicator_values WHERE indicator_id = ?", (indicator_id,))
+                        raise sqlite3.OperationalError("сбой задания")
+
+                try:
+                    dao._write(failing, indicator_id)
+                    assert False, "задание должно упасть"
+                except sqlite3.OperationalError:
+                    pass
+                check()
+                assert dao.get_watermark(indicator_id, "a")["row_count"] == 1
+                dao.close()
+    finally:
+        dao_module.WATERMARK_BULK_ROWS = threshold
+
+def test_write_signature_counts_writes():
+    threshold = dao_module.WATERMARK_BULK_ROWS
+    try:
+        for bulk_rows in (threshold, 1):
+            # Построчные триггеры и запись по диапазону одинаково увеличивают счётчик
+            dao_module.WATERMARK_BULK_ROWS = bulk_rows
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                dao = make_dao(tmp_dir)
+                indicator_id = dao.add_indicator("test_signature", "Test", "Test", "Test")
+                df = pd.DataFrame({"date": ["2024-01-01", "2024-02-01"], "value": [1.0, 2.0]})
+                dao.add_indicator_values_bulk(indicator_id, df)
+                signature = dao.get_write_signature(indicator_id)
+                assert signature > 0
+
+                # Повтор без изменений и отметка загрузки счётчик не трогают
+                dao.add_indicator_values_bulk(indicator_id, df, update=True)
+                dao.mark_fetched(indicator_id, ["", "x"])
+                assert dao.get_write_signature(indicator_id) == signature
+
+                # Правка значения в ту же секунду при том же числе строк — новая сигнатура
+                dao.add_indicator_values_bulk(indicator_id, df.assign(value=[1.0, 2.5]), update=True)
+                assert dao.get_write_signature(indicator_id) > signature
+                signature = dao.get_write_signature(indicator_id)
+                dao.replace_indicator_values(indicator_id, df.iloc[:0])
+                assert dao.get_write_signature(indicator_id) > signature
+                assert dao.get_write_signature(indicator_id + 1) == 0
+                dao.close()
+    finally:
+        dao_module.WATERMARK_BULK_ROWS = threshold
+
+def test_existing_keys_batch():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        dao = make_dao(tmp_dir)
+        indicator_id = dao.add_indicator("test_keys", "Test", "Test", "Test")
+        df = pd.DataFrame({"date": ["2024-01-01", "2024-01-01", "2024-02-01"],
+                           "category": ["PMI", "Prices", "PMI"], "value": [48.0, 55.0, 49.0]})
+        dao.add_indicator_values_bulk(indicator_id, df, category_col="category")
+
+        keys = dao.existing_keys(indicator_id, ["2024-01-01", pd.Timestamp("2024-02-01"), "2024-03-01"],
+                                 ["PMI", "Prices", "Employment"])
+        assert keys == {("2024-01-01", "PMI"), ("2024-01-01", "Prices"), ("2024-02-01", "PMI")}
+        assert dao.existing_keys(indicator_id, [], ["PMI"]) == set()
+        assert dao.existing_keys(indicator_id + 1, ["2024-01-01"], ["PMI"]) == set()
+        dao.close()
+
+def test_concurrent_writes_group_commit():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        dao = make_dao(tmp_dir, concurrent=True)
+        indicator_id = dao.add_indicator("test_concurrent", "Test", "Test", "Test")
+        dates = pd.date_range("2000-01-01", periods=50, freq="D")
+        errors = []
+
+        # Каждый поток — свой DAO (как параллельные коллекторы), запись поштучно и пачкой
+        def collector(n):
+            try:
+                own = dao_module.IndicatorDAO(concurrent=True)
+                for date in dates[:10]:
+                    own.add_indicator_value(indicator_id, date.strftime("%Y-%m-%d"), float(n), f"row{n}")
+                own.add_indicator_values_bulk(indicator_id, pd.DataFrame({"date": dates, "value": float(n)}))
+                assert own.conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+                own.close()
+            except Exception as e:
+                errors.append(e)
+
+        # Писатель занят долгой задачей, пока записи всех потоков не встанут в очередь:
+        # следующий коммит обязан забрать их одной транзакцией
+        writer = dao_module.get_writer()
+        started, release = threading.Event(), threading.Event()
+
+        def blocker(conn):
+            started.set()
+            release.wait(10)
+
+        holder = threading.Thread(target=writer.submit, args=(blocker,))
+        holder.start()
+        assert started.wait(10)
+
+        threads = [threading.Thread(target=collector, args=(n,)) for n in range(8)]
+        for t in threads:
+            t.start()
+        deadline = time.monotonic() + 10
+        while writer._queue.qsize() < len(threads) and time.monotonic() < deadline:
+            time.sleep(0.01)
+        release.set()
+        for t in threads + [holder]:
+            t.join()
+
+        assert not errors
+        count = dao.conn.execute("SELECT COUNT(*) FROM indicator_values WHERE indicator_id = ?",
+                                 (indicator_id,)).fetchone()[0]
+        assert count == 8 * 10 + 50
+        assert writer.stats["max_batch"] >= len(threads)
+        assert writer.stats["commits"] < writer.stats["jobs"]
+        dao.close()
+        dao_module.shutdown_writers()
+
+def run_with_timeout(func, timeout=10):
+    # Зависание writer.submit не должно вешать весь прогон тестов
+    outcome = {}
+    def target():
+        try:
+            outcome["result"] = func()
+        except BaseException as e:
+            outcome["error"] = e
+    thread = threading.Thread(target=target, daemon=True)
+    thread.start()
+    thread.join(timeout)
+    assert not thread.is_alive(), "submit завис"
+    return outcome
+
+def test_dead_writer_fails_fast():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # Соединение писателя не открылось: submit сразу падает
+        broken = dao_module.SQLiteWriter(Path(tmp_dir) / "missing" / "test.db")
+        broken._thread.join(10)
+        outcome = run_with_timeout(lambda: broken.submit(lambda conn: None))
+        assert isinstance(outcome["error"], RuntimeError) and not broken.alive
+
+        # Сбой вне savepoint задания: ошибку получают текущая пачка и все ожидающие
+        dao = make_dao(tmp_dir, concurrent=True)
+        writer = dao_module.get_writer()
+        started, release = threading.Event(), threading.Event()
+
+        def blocker(conn):
+            started.set()
+            release.wait(10)
+
+        def failing_commit(conn, batch):
+            raise sqlite3.OperationalError("disk I/O error")
+
+        holder = threading.Thread(target=run_with_timeout, args=(lambda: writer.submit(blocker),), daemon=True)
+        holder.start()
+        assert started.wait(10)
+        writer._commit_batch = failing_commit
+        results = []
+        queued = threading.Thread(target=lambda: results.append(run_with_timeout(
+            lambda: writer.submit(lambda conn: None))), daemon=True)
+        queued.start()
+        while writer._queue.qsize() < 1:
+            time.sleep(0.01)
+        release.set()
+        holder.join(10)
+        queued.join(10)
+        assert isinstance(results[0]["error"], sqlite3.OperationalError)
+        assert not writer.alive
+        assert isinstance(run_with_timeout(lambda: writer.submit(lambda conn: None))["error"], RuntimeError)
+        # Новый DAO получает нового писателя
+        restarted = dao_module.IndicatorDAO(concurrent=True)
+        assert restarted.add_indicator("test_restarted", "Test", "Test", "Test")
+        assert restarted._writer is not writer and restarted._writer.alive
+        restarted.close()
+        dao.close()
+        dao_module.shutdown_writers()
+
+def test_snapshot_without_pyarrow_falls_back_to_sqlite():
+    # pyarrow недоступен (None в sys.modules — import падает с ImportError)
+    saved = {name: sys.modules.get(name) for name in ("pyarrow", "pyarrow.parquet")}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        dao = make_dao(tmp_dir)
+        indicator_id = dao.add_indicator("test_no_pyarrow", "Test", "Test", "Test")
+        dao.add_indicator_value(indicator_id, "2024-01-01", 1.0, "a")
+        sys.modules.update(dict.fromkeys(saved))
+        try:
+            reader = dao_module.IndicatorDAO(snapshot_dir=Path(tmp_dir) / "parquet")
+        finally:
+            for name, module in saved.items():
+                if module is None:
+                    sys.modules.pop(name, None)
+                else:
+                    sys.modules[name] = module
+        assert reader._snapshot is None
+        assert reader.get_indicator_values(indicator_id)["value"].tolist() == [1.0]
+        reader.close()
+        dao.close()
+
+if __name__ == "__main__":
+    test_bulk_insert_counts()
+    test_upsert_reports_revisions()
+    test_values_as_of_vintages()
+    test_values_as_of_is_read_only()
+    test_vintages_follow_every_write_path()
+    test_daily_curve_resampling()
+    test_wide_storage_stays_in_sync()
+    test_numpy_read_path_matches_read_sql()
+    test_series_cache_hits_and_invalidation()
+    test_watermarks_follow_writes()
+    test_bulk_jobs_keep_watermarks_without_triggers()
+    test_write_signature_counts_writes()
+    test_existing_keys_batch()
+    test_concurrent_writes_group_commit()
+    test_dead_writer_fails_fast()
+    test_snapshot_without_pyarrow_falls_back_to_sqlite()
+    print("DAO upsert tests passed")
@@ -0,0 +1,113 @@
+# tests/test_database_setup.py
+# Миграции схемы на БД старого формата (созданной до появления версий) без потери данных.
+import os
+import sqlite3
+import sys
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import dao as dao_module
+import database_setup
+
+def make_legacy_db(db_path):
+    conn = sqlite3.connect(db_path)
+    for sql in (database_setup.INDICATORS_TABLE_SQL, database_setup.VALUES_TABLE_SQL,
+                database_setup.RELEASES_TABLE_SQL, database_setup.COMMENTS_TABLE_SQL):
+        conn.execute(sql)
+    conn.execute("INSERT INTO indicators (name) VALUES ('legacy')")
+    conn.executemany("INSERT INTO indicator_values (indicator_id, date, category, value, created_at) "
+                     "VALUES (1, ?, ?, ?, '2024-03-01 12:30:00')",
+                     [("2024-01-01", "", 1.0), ("2024-02-01", "", 2.0), ("2024-02-01", "x", 3.0)])
+    conn.commit()
+    return conn
+
+def test_migrate_legacy_database_keeps_data():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        conn = make_legacy_db(Path(tmp_dir) / "legacy.db")
+        assert database_setup.get_schema_version(conn) == 0
+
+        assert database_setup.migrate(conn) == [m['version'] for m in database_setup.MIGRATIONS]
+        assert database_setup.get_schema_version(conn) == database_setup.SCHEMA_VERSION
+        assert database_setup.migrate(conn) == []
+        assert conn.execute("SELECT COUNT(*) FROM indicator_values").fetchone()[0] == 3
+
+        indexes = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+        assert {"idx_releases_indicator_date", "idx_comments_indicator_date",
+                "idx_values_indicator_category_date"} <= indexes
+        plan = " ".join(row[3] for row in conn.execute(
+            "EXPLAIN QUERY PLAN SELECT date, value FROM indicator_values WHERE indicator_id = 1 AND category = 'x'"))
+        assert "COVERING INDEX idx_values_indicator_category_date" in plan
+        conn.close()
+
+def test_rebuild_without_rowid():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = Path(tmp_dir) / "legacy.db"
+        conn = make_legacy_db(db_path)
+        database_setup.migrate(conn)
+        dao_module.DB_PATH = db_path
+        dao = dao_module.IndicatorDAO()
+        dao.enable_wide_storage(1)
+        dao.close()
+        assert database_setup.rebuild_values_without_rowid(conn)
+        assert not database_setup.rebuild_values_without_rowid(conn)
+        assert database_setup.values_without_rowid(conn)
+        rows = conn.execute("SELECT date, category, value FROM indicator_values_text ORDER BY date, category").fetchall()
+        assert rows == [("2024-01-01", "", 1.0), ("2024-02-01", "", 2.0), ("2024-02-01", "x", 3.0)]
+        conn.close()
+
+        # DAO пишет в перестроенную таблицу так же, как в обычную; триггеры широкой таблицы сохранены
+        dao = dao_module.IndicatorDAO()
+        df = pd.DataFrame({"date": ["2024-02-01", "2024-03-01"], "value": [2.5, 4.0]})
+        assert dao.add_indicator_values_bulk(1, df, update=True) == {"inserted": 1, "ignored": 0, "updated": 1}
+        assert dao.get_indicator_values(1)["value"].tolist() == [1.0, 2.5, 3.0, 4.0]
+        assert dao.get_indicator_values_wide(1)[""].tolist() == [1.0, 2.5, 4.0]
+        dao.close()
+
+def test_epoch_days_migration():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = Path(tmp_dir) / "legacy.db"
+        conn = make_legacy_db(db_path)
+        database_setup.migrate(conn, target=4)
+        conn.execute("INSERT INTO indicator_value_vintages VALUES (1, '', '2024-01-01', '2024-01-15', 1.0)")
+        conn.execute("INSERT INTO wide_tables (table_name, indicator_id, kind) VALUES ('daily_curve_1', 1, 'daily_curve')")
+        conn.execute('CREATE TABLE daily_curve_1 (date TEXT PRIMARY KEY, "1 Mo" REAL) WITHOUT ROWID')
+        conn.execute("INSERT INTO daily_curve_1 VALUES ('2024-01-02', 5.25)")
+        conn.commit()
+
+        # DAO не мигрирует сам: на старой схеме — понятная ошибка, схема не тронута
+        dao_module.DB_PATH = db_path
+        try:
+            dao_module.IndicatorDAO()
+            raise AssertionError("ожидалась ошибка устаревшей схемы")
+        except RuntimeError as e:
+            assert "database_setup.py" in str(e)
+        assert database_setup.get_schema_version(conn) == 4
+
+        assert database_setup.migrate(conn) == [5, 6, 7]
+        dao = dao_module.IndicatorDAO()
+        assert conn.execute("SELECT DISTINCT typeof(date), typeof(created_at) FROM indicator_values").fetchall() == \
+            [("integer", "integer")]
+        assert conn.execute("SELECT date, created_at FROM indicator_values_text WHERE category = 'x'").fetchone() == \
+            ("2024-02-01", "2024-03-01 12:30:00")
+        assert conn.execute("SELECT date, as_of FROM indicator_value_vintages").fetchone() == (19723, 19737)
+
+        assert dao.get_latest_indicator_date(1) == "2024-02-01"
+        assert dao.get_values_as_of(1, "2024-01-31")["as_of"].tolist() == ["2024-01-15"]
+        assert dao.get_latest_daily_curve_date(1) == "2024-01-02"
+        assert dao.get_daily_curve(1)["1 Mo"].tolist() == [5.25]
+        signature = dao.get_write_signature(1)
+        dao.add_indicator_value(1, "2024-03-01", 4.0)
+        assert dao.get_write_signature(1) == signature + 1
+        assert dao.get_indicator_values(1)["date"].dt.strftime("%Y-%m-%d").tolist()[-1] == "2024-03-01"
+        dao.close()
+        conn.close()
+
+if __name__ == "__main__":
+    test_migrate_legacy_database_keeps_data()
+    test_rebuild_without_rowid()
+    test_epoch_days_migration()
+    print("Database setup tests passed")
@@ -0,0 +1,107 @@
+# tests/test_fred_parser.py
+# Загрузка рядов FRED (series/observations) через http_client на локальном сервере-заглушке.
+import http.server
+import json
+import os
+import sys
+import tempfile
+import threading
+from urllib.parse import parse_qs, urlsplit
+
+os.environ.setdefault("FRED_API_KEY", "test-key")
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from collectors import fred_parser, http_client
+
+OBSERVATIONS = {
+    "PERMIT": [("2024-01-01", "1489"), ("2024-02-01", "."), ("2024-03-01", "1467")],
+    "PERMIT1": [("2024-01-01", "994"), ("2024-02-01", "1012")],
+}
+
+class FredStubHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    requests = []
+
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        query = {k: v[0] for k, v in parse_qs(parts.query).items()}
+        FredStubHandler.requests.append((parts.path, query))
+        series_id = query.get("series_id")
+        if parts.path != "/fred/series/observations" or series_id not in OBSERVATIONS:
+            status, payload = 400, {"error_code": 400, "error_message": "Bad Request.  The series does not exist."}
+        else:
+            start = query.get("observation_start", "")
+            status, payload = 200, {"observations": [{"date": d, "value": v} for d, v in OBSERVATIONS[series_id]
+                                                     if d >= start]}
+        body = json.dumps(payload).encode()
+        etag = f'"{hash(body) & 0xffffffff:x}"'
+        if status == 200 and self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+def start_stub_server():
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), FredStubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    fred_parser.FRED_BASE_URL = f"http://127.0.0.1:{server.server_port}/fred"
+    return server
+
+def test_fetch_series_parses_observations():
+    server = start_stub_server()
+    FredStubHandler.requests.clear()
+    with tempfile.TemporaryDirectory() as cache_dir:
+        http_client.configure_cache(cache_dir)
+        series = fred_parser.fetch_fred_series("PERMIT")
+        assert series.name == "PERMIT"
+        assert series.index.strftime("%Y-%m-%d").tolist() == ["2024-01-01", "2024-02-01", "2024-03-01"]
+        assert series.iloc[0] == 1489.0 and series.isna().tolist() == [False, True, False]
+        path, query = FredStubHandler.requests[0]
+        assert query["series_id"] == "PERMIT" and query["file_type"] == "json" and "api_key" in query
+
+        history = fred_parser.get_fred_series_history("PERMIT", start_date="2024-02-01")
+        assert history["value"].tolist() == [1467.0]
+        wide = fred_parser.get_fred_series_batch(["PERMIT", "PERMIT1"], join="inner")
+        assert list(wide.columns) == ["PERMIT", "PERMIT1"] and len(wide) == 2
+
+        try:
+            fred_parser.fetch_fred_series("MISSING")
+            raise AssertionError("ожидалась ошибка FRED")
+        except ValueError as e:
+            assert "does not exist" in str(e)
+    server.shutdown()
+
+def test_fetch_series_revalidates_cache():
+    server = start_stub_server()
+    with tempfile.TemporaryDirectory() as cache_dir:
+        http_client.configure_cache(cache_dir)
+        first = fred_parser.fetch_fred_series("PERMIT1")
+        FredStubHandler.requests.clear()
+        # Кэш FRED не отдаётся без сети: каждый запуск переспрашивает сервер
+        OBSERVATIONS["PERMIT1"].append(("2024-03-01", "1030"))
+        try:
+            updated = fred_parser.fetch_fred_series("PERMIT1")
+        finally:
+            OBSERVATIONS["PERMIT1"].pop()
+        assert len(FredStubHandler.requests) == 1
+        assert len(first) == 2 and updated.iloc[-1] == 1030.0
+        # Без изменений сервер отвечает 304, ряд берётся из кэша
+        again = fred_parser.fetch_fred_series("PERMIT1")
+        assert len(FredStubHandler.requests) == 2
+        assert again.tolist() == first.tolist()
+    server.shutdown()
+
+if __name__ == "__main__":
+    test_fetch_series_parses_observations()
+    test_fetch_series_revalidates_cache()
+    print("FRED parser tests passed")
@@ -0,0 +1,79 @@
+# tests/test_http_cache.py
+# Проверка дискового HTTP-кэша на локальном сервере-заглушке (без выхода в сеть).
+import hashlib
+import http.server
+import os
+import sys
+import tempfile
+import threading
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from collectors import http_client
+
+class StubHandler(http.server.BaseHTTPRequestHandler):
+    """
+    Отдаёт тело с ETag и отвечает 304 на совпадающий If-None-Match.
+    """
+    protocol_version = "HTTP/1.1"
+    hits = {"200": 0, "304": 0}
+
+    def do_GET(self):
+        body = f"page {self.path.split('&api_key')[0]}".encode()
+        etag = '"' + hashlib.md5(body).hexdigest() + '"'
+        if self.headers.get("If-None-Match") == etag:
+            StubHandler.hits["304"] += 1
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        StubHandler.hits["200"] += 1
+        self.send_response(200)
+        self.send_header("ETag", etag)
+        self.send_header("Content-Type", "text/plain; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+def start_stub_server():
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def test_cache_hit_and_revalidation():
+    server = start_stub_server()
+    base = f"http://127.0.0.1:{server.server_port}"
+    StubHandler.hits.update({"200": 0, "304": 0})
+    with tempfile.TemporaryDirectory() as cache_dir:
+        http_client.configure_cache(cache_dir)
+
+        first = http_client.http_get(f"{base}/month?m=202401", cache=True, cache_ttl=3600)
+        assert first.text == "page /month?m=202401"
+        assert StubHandler.hits == {"200": 1, "304": 0}
+
+        # Свежая запись — без обращения к серверу
+        cached = http_client.http_get(f"{base}/month?m=202401", cache=True, cache_ttl=3600)
+        assert cached.from_cache and cached.text == first.text
+        assert StubHandler.hits == {"200": 1, "304": 0}
+
+        # TTL истёк — условный запрос, сервер отвечает 304
+        revalidated = http_client.http_get(f"{base}/month?m=202401", cache=True, cache_ttl=0)
+        assert revalidated.from_cache and revalidated.text == first.text
+        assert StubHandler.hits == {"200": 1, "304": 1}
+
+        # api_key не входит в ключ кэша и не сохраняется на диск
+        http_client.http_get(f"{base}/obs", params={"series_id": "GDPC1", "api_key": "k1"},
+                             cache=True, cache_ignore_params=("api_key",))
+        other_key = http_client.http_get(f"{base}/obs", params={"series_id": "GDPC1", "api_key": "k2"},
+                                         cache=True, cache_ignore_params=("api_key",))
+        assert other_key.from_cache and "api_key" not in other_key.url
+    server.shutdown()
+
+if __name__ == "__main__":
+    test_cache_hit_and_revalidation()
+    http_client.print_host_stats()
+    print("HTTP cache test passed")
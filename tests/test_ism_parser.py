@@ -0,0 +1,65 @@
+# tests/test_ism_parser.py
+# Табличное извлечение отчёта ISM: месяц отчёта и все подиндексы из таблицы индексов за один проход.
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from bench_ism_parser import load_fixtures
+from collectors.ism_manufacturing_parser import MANUFACTURING_INDEX_RE, parse_ism_report
+from collectors.ism_services_parser import SERVICES_INDEX_RE
+
+INDEX_RE = {"manufacturing": MANUFACTURING_INDEX_RE, "services": SERVICES_INDEX_RE}
+
+def test_fixtures_match_expected():
+    for name, content, expected in load_fixtures():
+        report = parse_ism_report(content, INDEX_RE[expected["report"]])
+        assert report == {"date": expected["date"], "values": expected["values"]}, name
+
+def test_values_keep_category_order():
+    for name, content, expected in load_fixtures():
+        index_re = INDEX_RE[expected["report"]]
+        categories = list(parse_ism_report(content, index_re)["values"])
+        assert categories == [c for c in index_re.groupindex if c in expected["values"]], name
+
+def test_row_labels():
+    for label, category in (("Manufacturing PMI®", "headline"), ("PMI", "headline"),
+                            ("Customers' Inventories", "customers_inventories"),
+                            ("Customers’ Inventories Index", "customers_inventories"),
+                            ("Inventories", "inventories"), ("Backlog of Orders", "order_backlog"),
+                            ("New Export Orders", "exports"), ("Prices Paid (%)", "prices_paid")):
+        assert MANUFACTURING_INDEX_RE.fullmatch(label).lastgroup == category, label
+    for label in ("Production schedules were slower", "Industry 3", "OVERALL ECONOMY"):
+        assert MANUFACTURING_INDEX_RE.fullmatch(label) is None, label
+    for label, category in (("Services PMI®", "headline"), ("NMI®", "headline"), ("Non-Manufacturing NMI", "headline"),
+                            ("Business Activity/Production", "business_activity"),
+                            ("Inventory Sentiment", "inventory_sentiment")):
+        assert SERVICES_INDEX_RE.fullmatch(label).lastgroup == category, label
+    assert SERVICES_INDEX_RE.fullmatch("Customers' Inventories") is None
+
+def test_page_without_index_table():
+    page = (b"<html><head><title>July 2025 Report</title></head><body>"
+            b"<p>New Orders 47.1, Production 51.4, Prices 64.8</p>"
+            b"<table><tr><td>Industry</td><td>1</td></tr></table></body></html>")
+    assert parse_ism_report(page) is None
+    _, content, _ = load_fixtures()[0]  # pmi_2023_03.html
+    undated = content.replace(b"March 2023", b"this month")
+    assert parse_ism_report(undated) is None
+
+def test_cells_wrapped_in_paragraphs():
+    # CMS-страницы часто оборачивают текст ячейки в <p>: <td><p>New Orders</p></td>
+    for name, content, expected in load_fixtures():
+        wrapped = content.replace(b"<td>", b"<td><p>").replace(b"</td>", b"</p></td>")
+        wrapped = wrapped.replace(b"<th>", b"<th><p>").replace(b"</th>", b"</p></th>")
+        assert wrapped != content, name
+        report = parse_ism_report(wrapped, INDEX_RE[expected["report"]])
+        assert report == {"date": expected["date"], "values": expected["values"]}, name
+
+if __name__ == "__main__":
+    test_fixtures_match_expected()
+    test_values_keep_category_order()
+    test_row_labels()
+    test_page_without_index_table()
+    test_cells_wrapped_in_paragraphs()
+    print("ISM parser tests passed")
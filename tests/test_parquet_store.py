@@ -0,0 +1,117 @@
+# tests/test_parquet_store.py
+# Parquet-снимок хранилища: экспорт по индикатору и году, импорт обратно в SQLite,
+# чтение рядов DAO из свежего снимка. Без pyarrow тесты пропускаются.
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("pyarrow")
+import pyarrow.parquet as pq
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import dao as dao_module
+from test_dao_upsert import make_dao
+from parquet_store import export_parquet, import_parquet, read_values
+
+def fill_store(dao):
+    indicator_id = dao.add_indicator("test_snapshot", "Test", "Test", "Test")
+    df = pd.DataFrame({
+        "date": pd.to_datetime(["2023-11-01", "2023-12-01", "2024-01-01", "2023-12-01", "2024-01-01"]),
+        "category": ["a", "a", "a", "b", "b"],
+        "value": [1.0, 2.0, 3.0, 20.0, 30.0],
+    })
+    dao.add_indicator_values_bulk(indicator_id, df, category_col="category")
+    dao.add_indicator_release(indicator_id, "2024-01-01", {"headline": 3.0}, "https://example.com/2024-01")
+    dao.add_indicator("test_other", "Other", "Test", "Test")
+    return indicator_id
+
+def test_export_partitions_and_import_roundtrip():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        dao = make_dao(tmp_dir)
+        indicator_id = fill_store(dao)
+        root = Path(tmp_dir) / "parquet"
+        stats = export_parquet(["test_snapshot"], root, dao=dao)
+        assert stats == {"test_snapshot": {"rows": 5, "releases": 1, "years": 2}}
+
+        values_dir = root / "values" / "indicator=test_snapshot"
+        assert sorted(p.name for p in values_dir.iterdir()) == ["year=2023", "year=2024"]
+        part = pq.ParquetFile(next((values_dir / "year=2024").glob("*.parquet")))
+        assert part.metadata.row_group(0).column(0).compression == "ZSTD"
+        table = read_values("test_snapshot", root, filters=[("year", "=", 2023)])
+        assert table["value"].to_pylist() == [1.0, 2.0, 20.0]
+        assert not (root / "values" / "indicator=test_other").exists()
+
+        # Импорт в пустую БД восстанавливает значения и релизы
+        other_dir = Path(tmp_dir) / "other"
+        other_dir.mkdir()
+        restored = make_dao(other_dir)
+        assert import_parquet(root=root, dao=restored)["test_snapshot"] == {"inserted": 5, "deleted": 0,
+                                                                            "releases": 1}
+        restored_id = restored.get_indicator_id("test_snapshot")
+        pd.testing.assert_frame_equal(restored.get_indicator_values_wide(restored_id),
+                                      dao.get_indicator_values_wide(indicator_id))
+        release = restored.conn.execute("SELECT date, category, release_data, source_url FROM indicator_releases "
+                                        "WHERE indicator_id = ?", (restored_id,)).fetchall()
+        assert [tuple(row) for row in release] == [("2024-01-01", None, '{\n    "headline": 3.0\n}',
+                                                    "https://example.com/2024-01")]
+        # Повтор с перезаписью не плодит релизы, режим добавления ничего не дописывает
+        assert import_parquet(root=root, dao=restored)["test_snapshot"]["deleted"] == 5
+        assert import_parquet(root=root, overwrite=False, dao=restored)["test_snapshot"] == \
+            {"inserted": 0, "deleted": 0, "releases": 0}
+        restored.close()
+        dao.close()
+
+def test_dao_reads_fresh_snapshot():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        dao = make_dao(tmp_dir)
+        indicator_id = fill_store(dao)
+        root = Path(tmp_dir) / "parquet"
+        export_parquet(root=root, dao=dao)
+
+        reader = dao_module.IndicatorDAO(cache=False, snapshot_dir=root)
+        for start, end in [(None, None), ("2024-01-01", None), ("2023-12-01", "2023-12-31"), (None, "2023-12-01")]:
+            snapshot_dates, snapshot_values = reader.get_series_arrays(indicator_id, start=start, end=end)
+            dates, values = dao.get_series_arrays(indicator_id, start=start, end=end)
+            np.testing.assert_array_equal(snapshot_dates, dates)
+            np.testing.assert_array_equal(snapshot_values, values)
+        assert reader._snapshot.stats == {"hits": 4, "stale": 0}
+        # Ряд одной категории читается из SQLite
+        assert reader.get_indicator_values_by_category(indicator_id, "b")["value"].tolist() == [30.0, 20.0]
+        assert reader._snapshot.stats == {"hits": 4, "stale": 0}
+
+        # После записи в индикатор снимок устарел — чтение снова из SQLite
+        dao.add_indicator_value(indicator_id, "2024-02-01", 4.0, "a")
+        assert reader.get_indicator_values(indicator_id)["value"].tolist() == [1.0, 2.0, 20.0, 3.0, 30.0, 4.0]
+        assert reader._snapshot.stats == {"hits": 4, "stale": 1}
+
+        # Отметка загрузки без данных снимок не старит, правка значения без изменения числа строк — старит
+        export_parquet(root=root, dao=dao)
+        dao.mark_fetched(indicator_id, ["a", "b"])
+        assert len(reader.get_indicator_values(indicator_id)) == 6
+        assert reader._snapshot.stats == {"hits": 5, "stale": 1}
+        dao.add_indicator_values_bulk(indicator_id, pd.DataFrame({"date": ["2024-02-01"], "category": ["a"],
+                                                                  "value": [4.5]}),
+                                      category_col="category", update=True)
+        assert reader.get_indicator_values(indicator_id)["value"].tolist()[-1] == 4.5
+        assert reader._snapshot.stats == {"hits": 5, "stale": 2}
+
+        # Снимок старше предела тоже не используется
+        export_parquet(root=root, dao=dao)
+        expired = dao_module.IndicatorDAO(cache=False, snapshot_dir=root, snapshot_max_age=0)
+        assert len(expired.get_indicator_values(indicator_id)) == 6
+        assert expired._snapshot.stats == {"hits": 0, "stale": 1}
+        expired.close()
+        reader.close()
+        dao.close()
+
+if __name__ == "__main__":
+    test_export_partitions_and_import_roundtrip()
+    test_dao_reads_fresh_snapshot()
+    print("Parquet snapshot tests passed")
@@ -0,0 +1,64 @@
+# tests/test_treasury_parser.py
+# Потоковый парсер страниц Treasury даёт тот же результат, что и прежний путь через BeautifulSoup + read_html.
+import os
+import sys
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from bench_treasury_parser import FIXTURES_DIR, legacy_parse_month, load_fixtures
+from collectors.treasury_parser import _extract_table_columns, _parse_feed, _parse_month, reduce_to_fridays
+
+def test_extracted_columns_are_typed():
+    _, _, _, content = load_fixtures()[0]
+    columns = _extract_table_columns(content)
+    assert columns["date"].dtype == np.dtype("datetime64[D]")
+    assert all(values.dtype == np.float64 for name, values in columns.items() if name != "date")
+    assert all(len(values) == len(columns["date"]) for values in columns.values())
+
+def test_matches_legacy_parser():
+    for name, year, month, content in load_fixtures():
+        expected = legacy_parse_month(content, year, month).reset_index(drop=True)
+        actual = reduce_to_fridays(_parse_month(content, year, month)).reset_index(drop=True)
+        pd.testing.assert_frame_equal(actual, expected, check_dtype=True, obj=name)
+
+def test_month_without_fridays_keeps_last_date():
+    _, year, month, content = load_fixtures()[1]
+    daily = _parse_month(content, year, month)
+    partial = daily[daily["date"] <= f"{year}-{month:02d}-04"]
+    assert partial["date"].dt.dayofweek.max() < 4
+    reduced = reduce_to_fridays(partial)
+    assert reduced["date"].unique().tolist() == [partial["date"].max()]
+    assert len(reduced) == (partial["date"] == partial["date"].max()).sum()
+
+def test_page_without_table():
+    assert _extract_table_columns(b"<html><body><p>No data</p></body></html>") is None
+    assert _parse_month(b"<html><body><p>No data</p></body></html>", 2024, 1) is None
+
+def test_feeds_match_monthly_pages():
+    # Годовой CSV содержит январь и июль 2024, XML — декабрь 2023 (те же ставки, что на страницах)
+    pages = {(year, month): content for _, year, month, content in load_fixtures()}
+    csv_content = (FIXTURES_DIR / "daily_treasury_yield_curve_2024.csv").read_bytes()
+    xml_content = (FIXTURES_DIR / "daily_treasury_real_yield_curve_2023.xml").read_bytes()
+
+    for content, feed_format, start_date, months in (
+            (csv_content, "csv", date(2024, 1, 1), [(2024, 1), (2024, 7)]),
+            (csv_content, "csv", date(2024, 7, 15), [(2024, 7)]),
+            (xml_content, "xml", date(2023, 1, 1), [(2023, 12)])):
+        expected = pd.concat([_parse_month(pages[m], *m) for m in months])
+        expected = expected.sort_values(["date", "category"], ignore_index=True)
+        actual = _parse_feed(content, feed_format, start_date)
+        actual = actual.sort_values(["date", "category"], ignore_index=True)
+        pd.testing.assert_frame_equal(actual, expected, obj=feed_format)
+
+if __name__ == "__main__":
+    test_extracted_columns_are_typed()
+    test_matches_legacy_parser()
+    test_month_without_fridays_keeps_last_date()
+    test_page_without_table()
+    test_feeds_match_monthly_pages()
+    print("Treasury parser tests passed")
@@ -11,6 +11,15 @@ DB_SUBDIR = os.getenv("DB_SUBDIR", "Documents")
 DB_FILE = os.getenv("DB_FILE", "economic_indicators.db")
 DB_PATH = home_dir / DB_SUBDIR / DB_FILE
 
+# В indicator_values даты — номера дней от 1970-01-01: фильтр и сортировка идут по целому
+# столбцу (индекс по indicator_id и дате), в текст 'YYYY-MM-DD' переводим только для вывода
+VALUES_DATE_SQL = "CAST(julianday(?) - 2440587.5 AS INTEGER)"
+
+def _has_id_column(cursor, table):
+    """В indicator_values, перестроенной в WITHOUT ROWID, столбца id нет"""
+    cursor.execute(f"PRAGMA table_info({table})")
+    return any(row[1] == 'id' for row in cursor.fetchall())
+
 def show_indicators():
     """Показать все доступные индикаторы с количеством записей во всех таблицах"""
     try:
@@ -59,7 +68,10 @@ def show_recent_data(indicator_id, limit=2):
         print("="*90)
         cursor.execute("""
             SELECT DISTINCT date FROM (
-                SELECT date FROM indicator_values WHERE indicator_id = ?
+                SELECT date(date * 86400, 'unixepoch') AS date FROM (
+                    SELECT DISTINCT date FROM indicator_values WHERE indicator_id = ?
+                    ORDER BY date DESC LIMIT ?
+                )
                 UNION
                 SELECT date FROM indicator_releases WHERE indicator_id = ?
                 UNION  
@@ -67,7 +79,7 @@ def show_recent_data(indicator_id, limit=2):
             )
             ORDER BY date DESC
             LIMIT ?
-        """, (indicator_id, indicator_id, indicator_id, limit))
+        """, (indicator_id, limit, indicator_id, indicator_id, limit))
         recent_dates = [row[0] for row in cursor.fetchall()]
         if not recent_dates:
             print("❌ Нет данных для этого индикатора")
@@ -79,10 +91,12 @@ def show_recent_data(indicator_id, limit=2):
             print(f"\n🗓️  ДАТА: {date_str}")
             print("="*50)
             # VALUES
-            cursor.execute("""
-                SELECT id, date, category, value, created_at
-                FROM indicator_values 
-                WHERE indicator_id = ? AND date = ?
+            id_column = "id" if _has_id_column(cursor, "indicator_values") else "'-'"
+            cursor.execute(f"""
+                SELECT {id_column}, date(date * 86400, 'unixepoch'), category, value,
+                       datetime(created_at, 'unixepoch', 'localtime')
+                FROM indicator_values
+                WHERE indicator_id = ? AND date = {VALUES_DATE_SQL}
                 ORDER BY category
             """, (indicator_id, date_str))
             date_values = cursor.fetchall()
@@ -217,7 +231,8 @@ def delete_by_date_and_indicator(indicator_id, date_str):
         tables = ["indicator_values", "indicator_releases", "comments"]
         total_deleted = 0
         for table in tables:
-            cursor.execute(f"DELETE FROM {table} WHERE indicator_id = ? AND date = ?", (indicator_id, date_str))
+            date_sql = VALUES_DATE_SQL if table == "indicator_values" else "?"
+            cursor.execute(f"DELETE FROM {table} WHERE indicator_id = ? AND date = {date_sql}", (indicator_id, date_str))
             total_deleted += cursor.rowcount
         conn.commit()
         conn.close()
@@ -232,6 +247,10 @@ def delete_record_by_table_and_id(table_name, record_id):
     try:
         conn = sqlite3.connect(DB_PATH)
         cursor = conn.cursor()
+        if not _has_id_column(cursor, table_name):
+            print(f"❌ В таблице {table_name} нет столбца ID — удаляйте по индикатору и дате")
+            conn.close()
+            return 0
         cursor.execute(f"DELETE FROM {table_name} WHERE id = ?", (record_id,))
         deleted = cursor.rowcount
         conn.commit()